@@ -8,8 +8,43 @@ SECRET_KEY = config('SECRET_KEY')
 DEBUG = config('DEBUG', default=False, cast=bool)
 GEMINI_API_KEY = config('GEMINI_API_KEY')
 
+# AI roadmap jobs: size of the in-process worker pool; set ROADMAP_INLINE_WORKER=False
+# to leave the queue to `manage.py roadmap_worker` instead
+ROADMAP_WORKERS = config('ROADMAP_WORKERS', default=2, cast=int)
+ROADMAP_INLINE_WORKER = config('ROADMAP_INLINE_WORKER', default=True, cast=bool)
+
+# Per-request SQL/latency instrumentation (skills.instrumentation); 0 turns a warning off.
+# /metrics needs a staff session or "Authorization: Bearer <METRICS_TOKEN>"
+QUERY_COUNT_WARNING = config('QUERY_COUNT_WARNING', default=30, cast=int)
+DUPLICATE_QUERY_WARNING = config('DUPLICATE_QUERY_WARNING', default=5, cast=int)
+DB_TIME_WARNING_MS = config('DB_TIME_WARNING_MS', default=200, cast=int)
+WALL_TIME_WARNING_MS = config('WALL_TIME_WARNING_MS', default=1000, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 ALLOWED_HOSTS = []
 
+# Cache tier: locmem (per process), file (shared by the processes of one host,
+# CACHE_LOCATION is a directory) or redis (CACHE_LOCATION=redis://host:6379/0,
+# needs the redis package). Graph snapshots, diagrams and page fragments live here.
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'aurora'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/var/tmp/aurora_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/0'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='aurora'),
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+        if CACHE_BACKEND != 'redis' else {},
+    }
+}
+LANDING_CACHE_TIMEOUT = config('LANDING_CACHE_TIMEOUT', default=60 * 60, cast=int)
+SKILL_CARD_CACHE_TIMEOUT = config('SKILL_CARD_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
 #Video embending fix
 
 SECURE_REFERRER_POLICY = 'no-referrer-when-downgrade'
@@ -23,11 +58,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'skills',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'skills.instrumentation.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,6 +103,10 @@ DATABASES = {
     }
 }
 
+# loads request.user together with its profile (skills.profiles); ModelBackend stays
+# listed for sessions that were stored with it, new logins go through ProfileBackend
+AUTHENTICATION_BACKENDS = ['skills.profiles.ProfileBackend', 'django.contrib.auth.backends.ModelBackend']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
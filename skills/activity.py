@@ -0,0 +1,181 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .gamification import XP_PER_DIFFICULTY
+from .graph import DONE
+from .models import DailyActivity, Skill, UserSkillProgress
+
+# Completion history as (user, day, category) counters. Transitions add a
+# completion on the day it happens and take it back from the day it was made
+# when a skill leaves "done", under the category and XP it was credited with;
+# deleting a skill does not rewrite history.
+
+ACTIVITY_CHART_DAYS = getattr(settings, 'ACTIVITY_CHART_DAYS', 30)
+STREAK_WINDOW_DAYS = 366
+
+ActivityDay = namedtuple('ActivityDay', ['day', 'completed', 'xp', 'percent'])
+CategoryActivity = namedtuple('CategoryActivity', ['category', 'completed', 'xp', 'percent'])
+ActivitySummary = namedtuple('ActivitySummary', ['days', 'categories', 'current_streak', 'longest_streak', 'active_days'])
+
+ADD_SQL = """
+INSERT INTO {activity} (user_id, day, category, completed, xp)
+SELECT %(user)s, t.day, t.category, t.completed, t.xp
+FROM unnest(%(days)s::date[], %(categories)s::varchar[], %(completed)s::int[], %(xp)s::int[])
+     AS t(day, category, completed, xp)
+ON CONFLICT (user_id, day, category) DO UPDATE SET
+    completed = {activity}.completed + EXCLUDED.completed,
+    xp = {activity}.xp + EXCLUDED.xp
+"""
+
+# progress rows from before finished_at was stamped have no day and are left out
+BACKFILL_SQL = """
+INSERT INTO {activity} (user_id, day, category, completed, xp)
+SELECT p.user_id, (p.finished_at AT TIME ZONE %(tz)s)::date, COALESCE(p.credited_category, s.category),
+       COUNT(*), SUM(COALESCE(p.credited_xp, s.difficulty * %(xp)s))
+FROM {progress} p
+JOIN {skill} s ON s.id = p.skill_id
+WHERE p.status = 'done' AND p.finished_at IS NOT NULL AND p.user_id BETWEEN %(first)s AND %(last)s
+GROUP BY 1, 2, 3
+"""
+
+
+def _tables():
+    return {
+        'activity': DailyActivity._meta.db_table,
+        'progress': UserSkillProgress._meta.db_table,
+        'skill': Skill._meta.db_table,
+    }
+
+
+def add_activity(user_id, deltas):
+    # deltas: {(day, category): [completed, xp]}
+    deltas = {key: value for key, value in deltas.items() if any(value)}
+    if not deltas:
+        return
+    keys = sorted(deltas)
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_SQL.format(**_tables()), {
+            'user': user_id,
+            'days': [day for day, _ in keys],
+            'categories': [category for _, category in keys],
+            'completed': [deltas[key][0] for key in keys],
+            'xp': [deltas[key][1] for key in keys],
+        })
+
+
+def record_transitions(user_id, graph, changed, now):
+    # runs before the progress upsert: it still needs the old finished_at and credit
+    deltas = defaultdict(lambda: [0, 0])
+    undone = {}
+    for state in changed:
+        i = graph.index[state.id]
+        xp = graph.difficulties[i] * XP_PER_DIFFICULTY
+        if state.status == 'done':
+            entry = deltas[timezone.localdate(now), graph.categories[i]]
+            entry[0] += 1
+            entry[1] += xp
+        elif graph.status[i] == DONE:
+            undone[state.id] = (graph.categories[i], xp)
+
+    if undone:
+        for skill_id, finished_at, credited_category, credited_xp in UserSkillProgress.objects.filter(
+                user_id=user_id, skill_id__in=undone, finished_at__isnull=False
+        ).values_list('skill_id', 'finished_at', 'credited_category', 'credited_xp'):
+            # rows finished before the credit was stored fall back to the skill as it is now
+            category, xp = undone[skill_id]
+            category = credited_category if credited_category is not None else category
+            xp = credited_xp if credited_xp is not None else xp
+            entry = deltas[timezone.localdate(finished_at), category]
+            entry[0] -= 1
+            entry[1] -= xp
+
+    add_activity(user_id, deltas)
+
+
+def _rebuild_range(first, last):
+    DailyActivity.objects.filter(user_id__gte=first, user_id__lte=last).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(BACKFILL_SQL.format(**_tables()), {
+            'tz': settings.TIME_ZONE, 'xp': XP_PER_DIFFICULTY, 'first': first, 'last': last,
+        })
+        return cursor.rowcount
+
+
+def rebuild_user_activity(user_id):
+    return _rebuild_range(user_id, user_id)
+
+
+def rebuild_activity(batch_size=500, since_user_id=0, progress=None):
+    # one transaction per chunk of users, so a long backfill can be stopped and resumed
+    totals = [0, 0]
+    chunk = []
+
+    def flush():
+        with transaction.atomic():
+            totals[1] += _rebuild_range(chunk[0], chunk[-1])
+        totals[0] += len(chunk)
+        if progress is not None:
+            progress(chunk[-1], *totals)
+        chunk.clear()
+
+    user_ids = User.objects.filter(id__gte=since_user_id).order_by('id').values_list('id', flat=True)
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        chunk.append(user_id)
+        if len(chunk) == batch_size:
+            flush()
+    if chunk:
+        flush()
+    return tuple(totals)
+
+
+def _streaks(active, today):
+    current = 0
+    day = today if today in active else today - timedelta(days=1)
+    while day in active:
+        current += 1
+        day -= timedelta(days=1)
+
+    longest = run = 0
+    previous = None
+    for day in sorted(active):
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    return current, longest
+
+
+def activity_summary(user, today=None, chart_days=ACTIVITY_CHART_DAYS):
+    today = today or timezone.localdate()
+    per_day = {
+        row['day']: (row['total'], row['total_xp'])
+        for row in DailyActivity.objects.filter(
+            user=user, day__gt=today - timedelta(days=STREAK_WINDOW_DAYS)
+        ).values('day').annotate(total=Sum('completed'), total_xp=Sum('xp')).filter(total__gt=0)
+    }
+    per_category = list(
+        DailyActivity.objects.filter(user=user).values('category').annotate(
+            total=Sum('completed'), total_xp=Sum('xp')
+        ).filter(total__gt=0).order_by('-total', 'category')
+    )
+
+    chart = [today - timedelta(days=offset) for offset in range(chart_days - 1, -1, -1)]
+    peak = max((per_day.get(day, (0, 0))[0] for day in chart), default=0) or 1
+    days = []
+    for day in chart:
+        completed, xp = per_day.get(day, (0, 0))
+        days.append(ActivityDay(day, completed, xp, round(completed * 100 / peak)))
+
+    top = per_category[0]['total'] if per_category else 1
+    categories = [
+        CategoryActivity(row['category'], row['total'], row['total_xp'], round(row['total'] * 100 / top))
+        for row in per_category
+    ]
+
+    current, longest = _streaks(set(per_day), today)
+    return ActivitySummary(days, categories, current, longest, len(per_day))
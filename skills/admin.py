@@ -1,5 +1,7 @@
+from django import forms
 from django.contrib import admin
-from .models import Skill, SkillDependency, UserSkillProgress, Feedback
+from .models import Category, Skill, SkillDependency, UserSkillProgress, Feedback, UserXP, RoadmapJob
+from .topology import DependencyCycleError, add_dependency, check_dependency, replace_dependency
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
@@ -8,16 +10,59 @@ class SkillAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description')
     prepopulated_fields = {'slug': ('title',)}
 
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'author', 'skill_count', 'done_count')
+    search_fields = ('name', 'author__username')
+    readonly_fields = ('skill_count', 'done_count')
+
+class SkillDependencyAdminForm(forms.ModelForm):
+    class Meta:
+        model = SkillDependency
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        from_skill, to_skill = cleaned_data.get('from_skill'), cleaned_data.get('to_skill')
+        if from_skill and to_skill:
+            try:
+                check_dependency(SkillDependency(pk=self.instance.pk, from_skill=from_skill, to_skill=to_skill))
+            except DependencyCycleError:
+                raise forms.ValidationError("Ця залежність створить цикл: обрана навичка сама залежить від поточної.")
+        return cleaned_data
+
+
 @admin.register(SkillDependency)
 class SkillDependencyAdmin(admin.ModelAdmin):
     list_display = ('from_skill', 'to_skill', 'dependency_type')
     list_filter = ('dependency_type',)
+    form = SkillDependencyAdminForm
+
+    def save_model(self, request, obj, form, change):
+        # through topology, so the author's order and the closure stay in step
+        if change:
+            replace_dependency(obj)
+        else:
+            add_dependency(obj)
 
 @admin.register(UserSkillProgress)
 class UserSkillProgressAdmin(admin.ModelAdmin):
     list_display = ('user', 'skill', 'status')
     list_filter = ('status', 'user')
 
+@admin.register(UserXP)
+class UserXPAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_xp', 'finished_count', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('updated_at',)
+
+@admin.register(RoadmapJob)
+class RoadmapJobAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'user', 'status', 'skills_count', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('topic', 'user__username')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('category', 'subject', 'user', 'created_at', 'is_resolved')
@@ -6,8 +6,10 @@ import re
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
 
-def generate_roadmap(topic):
-    model = genai.GenerativeModel('gemini-2.0-flash')
+def generate_roadmap(topic, model=None):
+    # model can be any object with generate_content(prompt) -> response.text
+    if model is None:
+        model = genai.GenerativeModel('gemini-2.0-flash')
 
     #promt
     #only json
@@ -0,0 +1,301 @@
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .activity import rebuild_user_activity
+from .categories import assign_categories, rebuild_category_counts
+from .closure import rebuild_author_closure
+from .gamification import rebuild_user_xp
+from .graph import bump_graph_version
+from .instrumentation import record_queries
+from .jobs import run_job
+from .leaderboard import take_snapshot
+from .models import RoadmapJob, Skill, SkillDependency, UserSkillProgress
+
+# Synthetic catalogs for the view benchmarks. Everything belongs to users named
+# "<prefix>-<n>", so a dataset can be topped up, measured and deleted on its own.
+BENCH_PREFIX = 'bench-user'
+BENCH_PASSWORD = 'bench-password'
+RESULTS_FORMAT = 1
+
+CATEGORIES = [
+    'Python', 'Django', 'Бази даних', 'DevOps', 'Алгоритми', 'Frontend', 'Безпека', 'Тестування',
+    'Мережі', 'Архітектура', 'Linux', 'Хмари',
+]
+TOPICS = ['основи', 'поглиблено', 'практика', 'патерни', 'інструменти', 'оптимізація', 'налагодження']
+
+Dataset = namedtuple('Dataset', ['users', 'skills', 'dependencies', 'progress'])
+ViewCase = namedtuple('ViewCase', ['name', 'method', 'url', 'data'])
+
+
+def bench_users(prefix=BENCH_PREFIX):
+    return User.objects.filter(username__startswith=f'{prefix}-').order_by('id')
+
+
+def _skill_graph(rnd, count, max_parents, soft_ratio):
+    # skills come in category blocks; a skill mostly builds on recent skills of
+    # its own block, sometimes on anything before it. Parents always have a
+    # lower index, so the result is a DAG already in topological order.
+    per_category = max(5, count // len(CATEGORIES))
+    edges = []
+    for i in range(1, count):
+        block = i - i % per_category
+        wanted = min(i, rnd.choice(range(max_parents + 1)))
+        parents = set()
+        for _ in range(wanted):
+            if i > block and rnd.random() < 0.8:
+                parents.add(rnd.randrange(max(block, i - 8), i))
+            else:
+                parents.add(rnd.randrange(i))
+        for parent in parents:
+            edges.append((parent, i, 'soft' if rnd.random() < soft_ratio else 'hard'))
+    return per_category, edges
+
+
+def _progress(rnd, count, edges, done_ratio):
+    # learners finish skills in order: only skills whose hard prerequisites are
+    # done can be done; a few of the next ones are in progress
+    hard = [[] for _ in range(count)]
+    for parent, child, dependency_type in edges:
+        if dependency_type == 'hard':
+            hard[child].append(parent)
+
+    status = {}
+    for i in range(count):
+        if any(status.get(j) != 'done' for j in hard[i]):
+            continue
+        roll = rnd.random()
+        if roll < done_ratio:
+            status[i] = 'done'
+        elif roll < done_ratio + 0.1:
+            status[i] = 'in_progress'
+    return status
+
+
+def seed_dataset(users=10, skills=200, max_parents=3, soft_ratio=0.25, done_ratio=0.6,
+                 prefix=BENCH_PREFIX, seed=42, batch_size=2000, stdout=None):
+    rnd = random.Random(seed)
+    password = make_password(BENCH_PASSWORD)
+    created = Dataset(0, 0, 0, 0)
+
+    for n in range(users):
+        username = f'{prefix}-{n}'
+        if User.objects.filter(username=username).exists():
+            continue
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            # one by one so the profile and XP ledger signals run
+            user = User.objects.create(username=username, password=password, email=f'{username}@example.com')
+
+            per_category, edges = _skill_graph(rnd, skills, max_parents, soft_ratio)
+            batch = []
+            for i in range(skills):
+                title = f"{CATEGORIES[i // per_category % len(CATEGORIES)]}: {rnd.choice(TOPICS)} {i}"
+                skill = Skill(
+                    title=title,
+                    slug=f'{username}-{i}',
+                    category=CATEGORIES[i // per_category % len(CATEGORIES)],
+                    difficulty=rnd.randint(1, 4),
+                    description=f"{title}\n\n- {rnd.choice(TOPICS)}\n- {rnd.choice(TOPICS)}",
+                    video_url='',
+                    author=user,
+                )
+                skill.render_description()
+                batch.append(skill)
+            # inserted in index order, so topo_order from the sequence already fits the DAG
+            Skill.objects.bulk_create(assign_categories(batch), batch_size=batch_size)
+
+            SkillDependency.objects.bulk_create([
+                SkillDependency(from_skill=batch[parent], to_skill=batch[child], dependency_type=dependency_type)
+                for parent, child, dependency_type in edges
+            ], batch_size=batch_size)
+
+            now = timezone.now()
+            progress = [
+                UserSkillProgress(
+                    user=user,
+                    skill=batch[i],
+                    status=status,
+                    started_at=now,
+                    finished_at=now if status == 'done' else None,
+                )
+                for i, status in _progress(rnd, skills, edges, done_ratio).items()
+            ]
+            UserSkillProgress.objects.bulk_create(progress, batch_size=batch_size)
+
+            # bulk_create skips signals, same bookkeeping as SkillImporter.finish()
+            rebuild_author_closure(user.id, batch_size)
+            rebuild_user_xp(user.id)
+            rebuild_user_activity(user.id)
+            rebuild_category_counts(user.id)
+            bump_graph_version(user.id)
+
+        created = Dataset(created.users + 1, created.skills + skills,
+                          created.dependencies + len(edges), created.progress + len(progress))
+        if stdout is not None:
+            stdout.write(f"{username}: {skills} skills, {len(edges)} dependencies, "
+                         f"{len(progress)} progress rows in {time.perf_counter() - started:.1f}s")
+
+    with connection.cursor() as cursor:
+        for model in (Skill, SkillDependency, UserSkillProgress):
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+    take_snapshot()
+    return created
+
+
+def dataset_size(prefix=BENCH_PREFIX):
+    users = bench_users(prefix)
+    return Dataset(
+        users.count(),
+        Skill.objects.filter(author__in=users).count(),
+        SkillDependency.objects.filter(to_skill__author__in=users).count(),
+        UserSkillProgress.objects.filter(user__in=users).count(),
+    )
+
+
+def stub_roadmap(topic):
+    # stands in for generate_roadmap: a small valid roadmap with unique titles
+    titles = [f"{topic} {i}" for i in range(8)]
+    return {
+        'skills': [{'title': title, 'difficulty': i % 4 + 1, 'description': f"Крок {i}"}
+                   for i, title in enumerate(titles)],
+        'dependencies': [{'from': parent, 'to': child, 'type': 'hard' if i % 3 else 'soft'}
+                         for i, (parent, child) in enumerate(zip(titles, titles[1:]))],
+    }
+
+
+def view_cases(user):
+    # the last unstarted skill in topological order has the longest chain behind it
+    skill = Skill.objects.filter(author=user).exclude(
+        userskillprogress__user=user
+    ).order_by('-topo_order').first() or Skill.objects.filter(author=user).first()
+    cases = [
+        ViewCase('skill_list', 'get', reverse('skill_list'), None),
+        ViewCase('skill_list_search', 'get', reverse('skill_list'), {'search': 'основи'}),
+        ViewCase('leaderboard', 'get', reverse('leaderboard'), None),
+        ViewCase('user_profile', 'get', reverse('profile'), None),
+        ViewCase('ai_generator', 'get', reverse('ai_generator'), None),
+    ]
+    if skill is not None:
+        cases.insert(2, ViewCase('skill_detail', 'get', reverse('skill_detail', args=[skill.slug]), None))
+    return cases
+
+
+def _summary(timings, queries, statuses):
+    ordered = sorted(timings)
+    return {
+        'samples': len(timings),
+        'min_ms': round(ordered[0], 3),
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_ms': round(ordered[-1], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'queries': max(queries),
+        'statuses': sorted(set(statuses)),
+    }
+
+
+def _timed(call):
+    with record_queries() as recorder:
+        started = time.perf_counter()
+        status = call()
+        elapsed = (time.perf_counter() - started) * 1000
+    return elapsed, recorder.count, status
+
+
+def run_benchmarks(repeat=20, warmup=2, prefix=BENCH_PREFIX, sample_users=3):
+    users = list(bench_users(prefix)[:sample_users])
+    if not users:
+        raise ValueError(f"no benchmark users named '{prefix}-*', run seed_benchmark_data first")
+
+    timings = {}
+
+    def add(name, elapsed, queries, status):
+        entry = timings.setdefault(name, ([], [], []))
+        entry[0].append(elapsed)
+        entry[1].append(queries)
+        entry[2].append(status)
+
+    # testserver is what the test client sends as Host; no inline worker, the
+    # roadmap job runs below with the stub instead of Gemini
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], ROADMAP_INLINE_WORKER=False):
+        for user in users:
+            client = Client()
+            client.force_login(user)
+
+            for case in view_cases(user):
+                def request(case=case):
+                    return getattr(client, case.method)(case.url, case.data).status_code
+
+                # the first request fills per-user caches (graph snapshot, diagrams)
+                cold = _timed(request)
+                add(f'{case.name}:cold', *cold)
+                for _ in range(warmup):
+                    request()
+                for _ in range(repeat):
+                    add(case.name, *_timed(request))
+
+            for n in range(max(1, repeat // 5)):
+                topic = f"Benchmark {user.id}-{n}-{time.monotonic_ns()}"
+                add('ai_generator_post', *_timed(
+                    lambda: client.post(reverse('ai_generator'), {'topic': topic}).status_code
+                ))
+                job = RoadmapJob.objects.filter(user=user, topic=topic).latest('id')
+                add('ai_generator_job', *_timed(lambda: run_job(job.id, generate=stub_roadmap).status))
+
+    return {name: _summary(*values) for name, values in sorted(timings.items())}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def benchmark_report(repeat=20, warmup=2, prefix=BENCH_PREFIX, sample_users=3):
+    dataset = dataset_size(prefix)
+    views = run_benchmarks(repeat, warmup, prefix, sample_users)
+    return {
+        'format': RESULTS_FORMAT,
+        'revision': git_revision(),
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'cache': settings.CACHES['default']['BACKEND'],
+        },
+        'dataset': dataset._asdict(),
+        'settings': {'repeat': repeat, 'warmup': warmup, 'sample_users': sample_users},
+        'views': views,
+    }
+
+
+def compare_reports(baseline, current, metric='p50_ms'):
+    # (view, before, after, change in %) for views present in both runs
+    rows = []
+    for name, result in current['views'].items():
+        before = baseline.get('views', {}).get(name)
+        if before is None or not before.get(metric):
+            continue
+        after = result[metric]
+        rows.append((name, before[metric], after, (after - before[metric]) / before[metric] * 100))
+    return rows
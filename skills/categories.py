@@ -0,0 +1,126 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .closure import rebuild_author_closure
+from .diagrams import invalidate_skill_diagrams
+from .gamification import apply_skills_deleted
+from .graph import bump_graph_version
+from .models import Category, Skill, SkillClosure, SkillDependency, UserSkillProgress
+
+# Categories are per author and found by (author, name); Skill.category keeps the
+# name for search, the graph snapshot and exports. skill_count and done_count are
+# adjusted with F() updates on every change and recounted after bulk writes.
+
+ADD_DONE_SQL = """
+UPDATE {category} c SET done_count = c.done_count + t.delta
+FROM unnest(%(names)s::varchar[], %(deltas)s::int[]) AS t(name, delta)
+WHERE c.author_id = %(author)s AND c.name = t.name
+"""
+
+# rows pointing at the category's skills, then the skills and the category itself;
+# plain deletes instead of the ORM collector, which loads and signals row by row
+DELETE_SQL = [
+    "DELETE FROM {closure} WHERE ancestor_id = ANY(%(skills)s::bigint[]) OR descendant_id = ANY(%(skills)s::bigint[])",
+    "DELETE FROM {dependency} WHERE from_skill_id = ANY(%(skills)s::bigint[]) OR to_skill_id = ANY(%(skills)s::bigint[])",
+    "DELETE FROM {progress} WHERE skill_id = ANY(%(skills)s::bigint[])",
+    "DELETE FROM {skill} WHERE category_ref_id = %(category)s",
+    "DELETE FROM {category} WHERE id = %(category)s",
+]
+
+
+def _tables():
+    return {
+        'category': Category._meta.db_table,
+        'closure': SkillClosure._meta.db_table,
+        'dependency': SkillDependency._meta.db_table,
+        'progress': UserSkillProgress._meta.db_table,
+        'skill': Skill._meta.db_table,
+    }
+
+
+def author_categories(user):
+    return Category.objects.filter(author=user, skill_count__gt=0).only('id', 'name', 'skill_count', 'done_count')
+
+
+def assign_categories(skills):
+    # for bulk_create, which skips Skill.save(); counters are recounted afterwards.
+    # Ownerless skills stay without a category, as in Skill.resolve_category()
+    wanted = {(skill.author_id, skill.category) for skill in skills if skill.author_id is not None}
+    if not wanted:
+        return skills
+    Category.objects.bulk_create(
+        [Category(author_id=author_id, name=name) for author_id, name in wanted], ignore_conflicts=True
+    )
+    found = {
+        (author_id, name): category_id
+        for category_id, author_id, name in Category.objects.filter(
+            author_id__in={author_id for author_id, _ in wanted}, name__in={name for _, name in wanted}
+        ).values_list('id', 'author_id', 'name')
+    }
+    for skill in skills:
+        skill.category_ref_id = found.get((skill.author_id, skill.category))
+    return skills
+
+
+def add_category_counts(category_id, skills=0, done=0):
+    if category_id is None or not (skills or done):
+        return
+    Category.objects.filter(id=category_id).update(
+        skill_count=F('skill_count') + skills, done_count=F('done_count') + done
+    )
+
+
+def add_done_counts(author_id, deltas):
+    # deltas: {category name: finished skills gained or lost}
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    names = sorted(deltas)
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_DONE_SQL.format(**_tables()), {
+            'author': author_id, 'names': names, 'deltas': [deltas[name] for name in names],
+        })
+
+
+def is_done_by_author(skill):
+    return UserSkillProgress.objects.filter(user_id=skill.author_id, skill=skill, status='done').exists()
+
+
+def rebuild_category_counts(author_id):
+    skills = Skill.objects.filter(category_ref=OuterRef('pk')).order_by().values('category_ref')
+    done = skills.filter(userskillprogress__user=F('author'), userskillprogress__status='done')
+    return Category.objects.filter(author_id=author_id).update(
+        skill_count=Coalesce(Subquery(skills.annotate(total=Count('id')).values('total')), 0),
+        done_count=Coalesce(Subquery(done.annotate(total=Count('id')).values('total')), 0),
+    )
+
+
+def delete_category(category):
+    with transaction.atomic():
+        # skills cannot be added to the category while it is locked
+        Category.objects.select_for_update().filter(id=category.id).exists()
+        skill_ids = list(Skill.objects.filter(category_ref=category).order_by().values_list('id', flat=True))
+        doomed = set(skill_ids)
+        edges = list(SkillDependency.objects.filter(
+            Q(from_skill_id__in=skill_ids) | Q(to_skill_id__in=skill_ids)
+        ).values_list('from_skill_id', 'to_skill_id', 'to_skill__author_id')) if skill_ids else []
+        learners = set(UserSkillProgress.objects.filter(
+            skill_id__in=skill_ids
+        ).order_by().values_list('user_id', flat=True).distinct()) if skill_ids else set()
+
+        apply_skills_deleted(skill_ids)
+        with connection.cursor() as cursor:
+            for sql in DELETE_SQL:
+                cursor.execute(sql.format(**_tables()), {'skills': skill_ids, 'category': category.id})
+
+        # paths between surviving skills can run through the category only over
+        # an edge that leaves it; without one the deleted closure rows were all of it
+        neighbours = {skill_id for edge in edges for skill_id in edge[:2]} - doomed
+        if neighbours:
+            rebuild_author_closure(category.author_id)
+
+        for user_id in {category.author_id, *learners, *(edge[2] for edge in edges)}:
+            bump_graph_version(user_id)
+        invalidate_skill_diagrams(doomed | neighbours)
+    return len(skill_ids)
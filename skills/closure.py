@@ -0,0 +1,189 @@
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from .models import Skill, SkillClosure, SkillDependency, UserSkillProgress
+
+# paths ending at the new/removed edge's parent and starting at its child,
+# plus the empty path on each side; every path through the edge is one of each joined
+EDGE_PATHS_SQL = """
+    WITH up AS (
+        SELECT ancestor_id, depth, hard_only, paths
+        FROM skills_skillclosure WHERE descendant_id = %(parent)s
+        UNION ALL SELECT %(parent)s::bigint, 0, TRUE, 1
+    ), down AS (
+        SELECT descendant_id, depth, hard_only, paths
+        FROM skills_skillclosure WHERE ancestor_id = %(child)s
+        UNION ALL SELECT %(child)s::bigint, 0, TRUE, 1
+    ), through_edge AS (
+        SELECT up.ancestor_id, down.descendant_id,
+               up.depth + down.depth + 1 AS depth,
+               up.hard_only AND down.hard_only AND %(hard)s AS hard_only,
+               SUM(up.paths * down.paths) AS paths
+        FROM up CROSS JOIN down
+        GROUP BY 1, 2, 3, 4
+    )
+"""
+
+ADD_EDGE_SQL = EDGE_PATHS_SQL + """
+    INSERT INTO skills_skillclosure (ancestor_id, descendant_id, depth, hard_only, paths)
+    SELECT ancestor_id, descendant_id, depth, hard_only, paths FROM through_edge
+    ON CONFLICT (ancestor_id, descendant_id, depth, hard_only)
+    DO UPDATE SET paths = skills_skillclosure.paths + EXCLUDED.paths
+"""
+
+SUBTRACT_PATHS_SQL = """
+    , dropped AS (
+        DELETE FROM skills_skillclosure c USING through_edge t
+        WHERE c.ancestor_id = t.ancestor_id AND c.descendant_id = t.descendant_id
+          AND c.depth = t.depth AND c.hard_only = t.hard_only AND c.paths <= t.paths
+    )
+    UPDATE skills_skillclosure c SET paths = c.paths - t.paths
+    FROM through_edge t
+    WHERE c.ancestor_id = t.ancestor_id AND c.descendant_id = t.descendant_id
+      AND c.depth = t.depth AND c.hard_only = t.hard_only AND c.paths > t.paths
+"""
+
+REMOVE_EDGE_SQL = EDGE_PATHS_SQL + SUBTRACT_PATHS_SQL
+
+REMOVE_SKILL_SQL = """
+    WITH through_edge AS (
+        SELECT up.ancestor_id, down.descendant_id,
+               up.depth + down.depth AS depth,
+               up.hard_only AND down.hard_only AS hard_only,
+               SUM(up.paths * down.paths) AS paths
+        FROM skills_skillclosure up
+        JOIN skills_skillclosure down ON down.ancestor_id = up.descendant_id
+        WHERE up.descendant_id = %(skill)s
+        GROUP BY 1, 2, 3, 4
+    ), own AS (
+        DELETE FROM skills_skillclosure
+        WHERE ancestor_id = %(skill)s OR descendant_id = %(skill)s
+    )
+""" + SUBTRACT_PATHS_SQL
+
+
+def _execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def add_edge(parent_id, child_id, dependency_type):
+    _execute(ADD_EDGE_SQL, {'parent': parent_id, 'child': child_id, 'hard': dependency_type == 'hard'})
+
+
+def remove_edge(parent_id, child_id, dependency_type):
+    _execute(REMOVE_EDGE_SQL, {'parent': parent_id, 'child': child_id, 'hard': dependency_type == 'hard'})
+
+
+def remove_skill(skill_id):
+    # must run before the delete, while paths through the skill are still stored
+    _execute(REMOVE_SKILL_SQL, {'skill': skill_id})
+
+
+def compute_closure(ordered_ids, edges):
+    # ordered_ids is a topological order; edges pointing backwards (left from old cycles) are skipped
+    position = {skill_id: i for i, skill_id in enumerate(ordered_ids)}
+    children = defaultdict(list)
+    for parent, child, dependency_type in edges:
+        if position[parent] < position[child]:
+            children[parent].append((child, dependency_type == 'hard'))
+
+    reachable = {}
+    for skill_id in reversed(ordered_ids):
+        paths = Counter()
+        for child, hard in children[skill_id]:
+            paths[child, 1, hard] += 1
+            for (descendant, depth, hard_only), count in reachable[child].items():
+                paths[descendant, depth + 1, hard and hard_only] += count
+        reachable[skill_id] = paths
+
+    return {
+        (ancestor, descendant, depth, hard_only): count
+        for ancestor, paths in reachable.items()
+        for (descendant, depth, hard_only), count in paths.items()
+    }
+
+
+def is_closure_edge(dependency):
+    # the closure follows each author's own graph, like topo_order does; prerequisites
+    # borrowed from another author only take part in lock checks (skills.graph)
+    return dependency.from_skill.author_id == dependency.to_skill.author_id
+
+
+def author_closure(author_id):
+    ordered_ids = list(Skill.objects.filter(author_id=author_id).order_by('topo_order').values_list('id', flat=True))
+    edges = SkillDependency.objects.filter(
+        from_skill__author_id=author_id, to_skill__author_id=author_id
+    ).values_list('from_skill_id', 'to_skill_id', 'dependency_type')
+    return compute_closure(ordered_ids, edges)
+
+
+def stored_closure(author_id):
+    return {
+        (ancestor, descendant, depth, hard_only): paths
+        for ancestor, descendant, depth, hard_only, paths in SkillClosure.objects.filter(
+            ancestor__author_id=author_id
+        ).values_list('ancestor_id', 'descendant_id', 'depth', 'hard_only', 'paths')
+    }
+
+
+def _create_rows(closure, batch_size=1000):
+    SkillClosure.objects.bulk_create([
+        SkillClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth, hard_only=hard_only, paths=paths)
+        for (ancestor, descendant, depth, hard_only), paths in closure.items()
+    ], batch_size=batch_size)
+    return len(closure)
+
+
+def rebuild_author_closure(author_id, batch_size=1000):
+    # by ancestor id, straight off the unique index: filtering through the skill join
+    # makes Django delete by a self-joined id subquery the planner can loop over
+    skill_ids = list(Skill.objects.filter(author_id=author_id).values_list('id', flat=True))
+    SkillClosure.objects.filter(ancestor_id__in=skill_ids).delete()
+    return _create_rows(author_closure(author_id), batch_size)
+
+
+def add_new_skills_closure(skills, dependencies):
+    # bulk-created roadmaps never touch existing skills, so their closure stands alone
+    ordered = sorted(skills, key=lambda skill: skill.topo_order)
+    return _create_rows(compute_closure(
+        [skill.id for skill in ordered],
+        [(dep.from_skill_id, dep.to_skill_id, dep.dependency_type) for dep in dependencies],
+    ))
+
+
+def closure_authors():
+    return Skill.objects.filter(required_by__isnull=False).order_by().values_list('author_id', flat=True).distinct()
+
+
+def rebuild_closure(batch_size=1000):
+    SkillClosure.objects.all().delete()
+    return sum(_create_rows(author_closure(author_id), batch_size) for author_id in closure_authors())
+
+
+def verify_closure():
+    # (author_id, missing_rows, unexpected_rows) for every author whose table is off
+    mismatches = []
+    author_ids = set(closure_authors()) | set(
+        SkillClosure.objects.values_list('ancestor__author_id', flat=True).distinct()
+    )
+    for author_id in sorted(author_ids):
+        expected = set(author_closure(author_id).items())
+        actual = set(stored_closure(author_id).items())
+        if expected != actual:
+            mismatches.append((author_id, len(expected - actual), len(actual - expected)))
+    return mismatches
+
+
+def unfinished_prerequisites(user, skill):
+    # everything reachable backwards over hard edges only, not yet done; EXISTS keeps
+    # each skill once and lets the planner start from the closure index
+    ancestors = SkillClosure.objects.filter(descendant=skill, hard_only=True, ancestor=OuterRef('pk'))
+    done = UserSkillProgress.objects.filter(user=user, status='done').values('skill_id')
+    return Skill.objects.filter(Exists(ancestors)).exclude(id__in=done)
+
+
+def downstream_count(skill):
+    return SkillClosure.objects.filter(ancestor=skill).values('descendant').distinct().count()
@@ -0,0 +1,99 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .graph import load_skill_subgraph
+from .mermaid import skill_subgraph_mermaid
+
+DIAGRAM_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Every skill has a random version token. A cached diagram remembers the tokens
+# of all skills it shows, so touching one skill only invalidates the diagrams
+# that include it. Tokens (not counters) keep an evicted key from matching again.
+
+
+class DiagramStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidated = 0
+
+    def count(self, field, amount=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def as_dict(self):
+        with self.lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'invalidated': self.invalidated,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+diagram_stats = DiagramStats()
+
+
+def _version_key(skill_id):
+    return f'mermaid:skill:{skill_id}'
+
+
+def _diagram_key(user_id, skill_id):
+    return f'mermaid:diagram:{user_id}:{skill_id}'
+
+
+def skill_versions(skill_ids):
+    keys = [_version_key(skill_id) for skill_id in skill_ids]
+    versions = cache.get_many(keys)
+
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def invalidate_skill_diagrams(skill_ids):
+    skill_ids = {skill_id for skill_id in skill_ids if skill_id is not None}
+    if not skill_ids:
+        return
+
+    # after commit, so a diagram rebuilt meanwhile cannot carry the new token with old data
+    def bump():
+        cache.set_many({_version_key(skill_id): uuid.uuid4().hex for skill_id in skill_ids}, None)
+        diagram_stats.count('invalidated', len(skill_ids))
+
+    transaction.on_commit(bump)
+
+
+def get_skill_mermaid(skill, user):
+    key = _diagram_key(user.pk, skill.id)
+    known, stamp, text = cache.get(key) or ([skill.id], None, None)
+
+    # tokens are read before the subgraph: a bump landing during the build leaves
+    # an old token in the stamp, so the diagram is stale next time instead of
+    # pairing the new token with the old text
+    versions = skill_versions(known)
+    if stamp is not None and versions == stamp:
+        diagram_stats.count('hits')
+        return text
+    diagram_stats.count('misses' if stamp is None else 'stale')
+
+    subgraph = load_skill_subgraph(skill, user)
+    text = skill_subgraph_mermaid(subgraph)
+
+    tokens = dict(zip(known, versions))
+    members = sorted({skill.id}.union(*({e.parent.id, e.child.id} for e in subgraph.edges)))
+    if tokens.keys() >= set(members):
+        cache.set(key, (members, tuple(tokens[member] for member in members), text), DIAGRAM_CACHE_TIMEOUT)
+    else:
+        # skills not read above: only remember them, the next build reads their tokens first
+        cache.set(key, (members, None, None), DIAGRAM_CACHE_TIMEOUT)
+    return text
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Skill, SkillDependency, Profile, Feedback
+from .models import Skill, SkillDependency, Profile, Feedback, RoadmapJob
 from django.contrib.auth.models import User
 
 class SkillForm(forms.ModelForm):
@@ -43,6 +43,16 @@ class DependencyForm(forms.ModelForm):
         )
 
 
+class RoadmapForm(forms.ModelForm):
+    class Meta:
+        model = RoadmapJob
+        fields = ['topic']
+        widgets = {
+            'topic': forms.TextInput(attrs={'class': 'form-control form-control-lg text-center',
+                                            'placeholder': 'Наприклад: DevOps, React, Cooking...'}),
+        }
+
+
 class UserUpdateForm(forms.ModelForm):
     email = forms.EmailField(widget=forms.EmailInput(attrs={'class': 'form-control'}))
 
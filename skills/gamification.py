@@ -1,3 +1,10 @@
+from django.contrib.auth.models import User
+from django.db.models import Sum, Count, F
+
+from .models import UserXP, UserSkillProgress
+
+XP_PER_DIFFICULTY = 10
+
 RANKS = {
     0: '🌱 Новачок',
     50: '👶 Студент',
@@ -38,4 +45,104 @@ def get_rank_info(total_xp):
         'next_rank': next_rank,
         'xp_needed': xp_for_next - total_xp if xp_for_next else 0,
         'progress_percent': progress_percent
-    }
\ No newline at end of file
+    }
+
+
+def skill_xp(skill):
+    return skill.difficulty * XP_PER_DIFFICULTY
+
+
+def compute_xp_totals(user_ids=None):
+    done = UserSkillProgress.objects.filter(status='done')
+    if user_ids is not None:
+        done = done.filter(user_id__in=user_ids)
+
+    rows = done.values('user_id').annotate(
+        xp=Sum(F('skill__difficulty') * XP_PER_DIFFICULTY),
+        finished=Count('id')
+    )
+    return {row['user_id']: (row['xp'] or 0, row['finished']) for row in rows}
+
+
+def rebuild_user_xp(user_id):
+    xp, finished = compute_xp_totals([user_id]).get(user_id, (0, 0))
+    ledger, _ = UserXP.objects.update_or_create(
+        user_id=user_id,
+        defaults={'total_xp': xp, 'finished_count': finished}
+    )
+    return ledger
+
+
+def add_xp(user_id, xp, finished):
+    updated = UserXP.objects.filter(user_id=user_id).update(
+        total_xp=F('total_xp') + xp,
+        finished_count=F('finished_count') + finished
+    )
+    if not updated:
+        # no ledger row yet: progress is already saved, so count it from scratch
+        rebuild_user_xp(user_id)
+
+
+def get_user_xp(user):
+    ledger = UserXP.objects.filter(user=user).first()
+    return ledger or rebuild_user_xp(user.id)
+
+
+# Callers run these inside the same transaction as the change itself.
+
+def apply_difficulty_change(skill, old_difficulty):
+    delta = (skill.difficulty - old_difficulty) * XP_PER_DIFFICULTY
+    if not delta:
+        return
+
+    UserXP.objects.filter(
+        user__skill_progress__skill=skill,
+        user__skill_progress__status='done'
+    ).update(total_xp=F('total_xp') + delta)
+
+
+def apply_skills_deleted(skills):
+    # call before the delete, while the progress rows still exist
+    losses = UserSkillProgress.objects.filter(
+        skill__in=skills,
+        status='done'
+    ).values('user_id').annotate(
+        xp=Sum(F('skill__difficulty') * XP_PER_DIFFICULTY),
+        finished=Count('id')
+    )
+
+    for row in losses:
+        add_xp(row['user_id'], -row['xp'], -row['finished'])
+
+
+def rebuild_xp_ledger(batch_size=1000):
+    totals = compute_xp_totals()
+    rows = []
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        xp, finished = totals.get(user_id, (0, 0))
+        rows.append(UserXP(user_id=user_id, total_xp=xp, finished_count=finished))
+
+    UserXP.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['total_xp', 'finished_count', 'updated_at'],
+    )
+    return len(rows)
+
+
+def verify_xp_ledger():
+    totals = compute_xp_totals()
+    mismatches = []
+
+    ledger = UserXP.objects.values_list('user_id', 'total_xp', 'finished_count')
+    ledger_map = {user_id: (xp, finished) for user_id, xp, finished in ledger.iterator()}
+
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        expected = totals.get(user_id, (0, 0))
+        actual = ledger_map.get(user_id)
+        if actual != expected:
+            mismatches.append((user_id, expected, actual))
+
+    return mismatches
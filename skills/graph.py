@@ -0,0 +1,304 @@
+from array import array
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Skill, SkillDependency, UserSkillProgress, SkillGraphVersion
+
+GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+# bump when SkillGraph's pickled layout changes
+GRAPH_FORMAT = 2
+
+STATUS_CODES = {'todo': 0, 'in_progress': 1, 'done': 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+DONE = STATUS_CODES['done']
+
+Prerequisite = namedtuple('Prerequisite', ['title', 'dependency_type', 'is_met'])
+
+
+def bump_graph_version(user_id):
+    if user_id is None:
+        return
+
+    updated = SkillGraphVersion.objects.filter(user_id=user_id).update(
+        version=F('version') + 1,
+        changed_at=timezone.now()
+    )
+    if not updated:
+        SkillGraphVersion.objects.get_or_create(user_id=user_id)
+
+
+def get_graph_version(user):
+    row = SkillGraphVersion.objects.filter(user=user).values_list('version', 'changed_at').first()
+    return row or (0, None)
+
+
+def _csr(count, pairs):
+    # pairs: (row, col) -> (indptr, indices), rows keep insertion order
+    indptr = array('i', [0]) * (count + 1)
+    for row, _ in pairs:
+        indptr[row + 1] += 1
+    for i in range(count):
+        indptr[i + 1] += indptr[i]
+
+    indices = array('i', [0]) * len(pairs)
+    cursor = array('i', indptr[:-1])
+    for row, col in pairs:
+        indices[cursor[row]] = col
+        cursor[row] += 1
+
+    return indptr, indices
+
+
+# Compiled view of one user's skill graph: nodes are dense indexes into `ids`,
+# hard/soft prerequisites and dependents are CSR arrays (indptr + indices).
+# Lock state is computed once per graph version, not once per request.
+class SkillGraph:
+    def __init__(self, nodes, edges, progress, own_count=None):
+        self.ids = array('q', (node[0] for node in nodes))
+        self.titles = [node[1] for node in nodes]
+        self.categories = [node[2] for node in nodes]
+        self.slugs = [node[3] for node in nodes]
+        self.difficulties = bytearray(node[4] for node in nodes)
+        self.index = {pk: i for i, pk in enumerate(self.ids)}
+
+        size = len(self.ids)
+        self.own_count = size if own_count is None else own_count
+
+        self.status = bytearray(size)
+        for skill_id, status in progress:
+            i = self.index.get(skill_id)
+            if i is not None:
+                self.status[i] = STATUS_CODES.get(status, 0)
+
+        hard, soft, unlocks = [], [], []
+        for from_id, to_id, dependency_type in edges:
+            src, dst = self.index[from_id], self.index[to_id]
+            (hard if dependency_type == 'hard' else soft).append((dst, src))
+            unlocks.append((src, dst))
+
+        self.hard_ptr, self.hard_idx = _csr(size, hard)
+        self.soft_ptr, self.soft_idx = _csr(size, soft)
+        self.unlock_ptr, self.unlock_idx = _csr(size, unlocks)
+
+        # a skill is locked when any hard prerequisite is not done
+        self.locked = bytearray(size)
+        for dst, src in hard:
+            if self.status[src] != DONE:
+                self.locked[dst] = 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    def status_of(self, skill_id):
+        i = self.index.get(skill_id)
+        return STATUS_NAMES[self.status[i]] if i is not None else 'todo'
+
+    def is_locked(self, skill_id):
+        i = self.index.get(skill_id)
+        return bool(self.locked[i]) if i is not None else False
+
+    def ids_with_status(self, status):
+        code = STATUS_CODES.get(status)
+        if code is None:
+            return set()
+        return {self.ids[i] for i, value in enumerate(self.status) if value == code}
+
+    def locked_ids(self):
+        return {self.ids[i] for i, value in enumerate(self.locked) if value}
+
+    def prerequisites(self, skill_id):
+        i = self.index.get(skill_id)
+        if i is None:
+            return []
+
+        result = []
+        for ptr, idx, dependency_type in (
+                (self.hard_ptr, self.hard_idx, 'hard'),
+                (self.soft_ptr, self.soft_idx, 'soft')):
+            for j in idx[ptr[i]:ptr[i + 1]]:
+                result.append(Prerequisite(self.titles[j], dependency_type, self.status[j] == DONE))
+        return result
+
+    def unlocks(self, skill_id):
+        i = self.index.get(skill_id)
+        if i is None:
+            return []
+        return [self.titles[j] for j in self.unlock_idx[self.unlock_ptr[i]:self.unlock_ptr[i + 1]]]
+
+    def prerequisite_indexes(self, i):
+        yield from self.hard_idx[self.hard_ptr[i]:self.hard_ptr[i + 1]]
+        yield from self.soft_idx[self.soft_ptr[i]:self.soft_ptr[i + 1]]
+
+    def neighborhood(self, skill_id, depth):
+        # indexes within `depth` hops up (prerequisites) and down (unlocks) of the skill
+        start = self.index.get(skill_id)
+        if start is None:
+            return set()
+
+        found = {start}
+        for step in (self.prerequisite_indexes,
+                     lambda i: self.unlock_idx[self.unlock_ptr[i]:self.unlock_ptr[i + 1]]):
+            frontier = {start}
+            for _ in range(depth):
+                frontier = {j for i in frontier for j in step(i) if j not in found}
+                found.update(frontier)
+        return found
+
+    def category_indexes(self, category):
+        return {i for i in range(self.own_count) if self.categories[i] == category}
+
+    def payload(self, indexes):
+        # compact JSON-ready view: edges are [from_id, to_id, type] between the given nodes
+        nodes = []
+        edges = []
+        for i in sorted(indexes):
+            nodes.append({
+                'id': self.ids[i],
+                'title': self.titles[i],
+                'slug': self.slugs[i],
+                'category': self.categories[i],
+                'status': STATUS_NAMES[self.status[i]],
+                'locked': bool(self.locked[i]),
+            })
+            for ptr, idx, dependency_type in (
+                    (self.hard_ptr, self.hard_idx, 'hard'),
+                    (self.soft_ptr, self.soft_idx, 'soft')):
+                for j in idx[ptr[i]:ptr[i + 1]]:
+                    if j in indexes:
+                        edges.append([self.ids[j], self.ids[i], dependency_type])
+        return {'nodes': nodes, 'edges': edges}
+
+    def annotate(self, skills):
+        for skill in skills:
+            skill.my_status = self.status_of(skill.id)
+            skill.is_locked = self.is_locked(skill.id)
+            skill.prerequisites = self.prerequisites(skill.id)
+            skill.unlocks = self.unlocks(skill.id)
+        return skills
+
+
+def compile_skill_graph(user):
+    nodes = list(
+        Skill.objects.filter(author=user).order_by('id').values_list('id', 'title', 'category', 'slug', 'difficulty')
+    )
+    edges = list(
+        SkillDependency.objects.filter(to_skill__author=user).order_by('id').values_list(
+            'from_skill_id', 'to_skill_id', 'dependency_type',
+            'from_skill__title', 'from_skill__category', 'from_skill__slug', 'from_skill__difficulty'
+        )
+    )
+
+    # prerequisites owned by another author still take part in lock checks
+    own_count = len(nodes)
+    known_ids = {node[0] for node in nodes}
+    for from_id, _, _, *node in edges:
+        if from_id not in known_ids:
+            known_ids.add(from_id)
+            nodes.append((from_id, *node))
+
+    progress = UserSkillProgress.objects.filter(user=user).values_list('skill_id', 'status')
+
+    return SkillGraph(nodes, [edge[:3] for edge in edges], progress, own_count)
+
+
+def get_skill_graph(user, version=None):
+    if version is None:
+        version, _ = get_graph_version(user)
+    key = f'skill_graph:{GRAPH_FORMAT}:{user.pk}:{version}'
+
+    graph = cache.get(key)
+    if graph is None:
+        graph = compile_skill_graph(user)
+        cache.set(key, graph, GRAPH_CACHE_TIMEOUT)
+    return graph
+
+
+SUBGRAPH_MAX_DEPTH = 10
+
+SubgraphNode = namedtuple('SubgraphNode', ['id', 'title', 'slug', 'status'])
+SubgraphEdge = namedtuple('SubgraphEdge', ['id', 'parent', 'child', 'dependency_type', 'depth', 'direction'])
+
+# Ancestors ('up') and descendants ('down') of one skill, walked by a single
+# recursive CTE. UNION + depth limit keeps cycles from looping forever.
+SUBGRAPH_SQL = """
+WITH RECURSIVE
+up(from_id, to_id, depth) AS (
+    SELECT from_skill_id, to_skill_id, 1 FROM {dependency} WHERE to_skill_id = %(skill)s
+    UNION
+    SELECT d.from_skill_id, d.to_skill_id, up.depth + 1
+    FROM {dependency} d JOIN up ON d.to_skill_id = up.from_id
+    WHERE up.depth < %(depth)s
+),
+down(from_id, to_id, depth) AS (
+    SELECT from_skill_id, to_skill_id, 1 FROM {dependency} WHERE from_skill_id = %(skill)s
+    UNION
+    SELECT d.from_skill_id, d.to_skill_id, down.depth + 1
+    FROM {dependency} d JOIN down ON d.from_skill_id = down.to_id
+    WHERE down.depth < %(depth)s
+),
+edges(from_id, to_id, depth, direction) AS (
+    SELECT from_id, to_id, MIN(depth), 'up' FROM up GROUP BY from_id, to_id
+    UNION ALL
+    SELECT from_id, to_id, MIN(depth), 'down' FROM down GROUP BY from_id, to_id
+)
+SELECT d.id, d.dependency_type, e.depth, e.direction,
+       fs.id, fs.title, fs.slug, COALESCE(fp.status, 'todo'),
+       ts.id, ts.title, ts.slug, COALESCE(tp.status, 'todo')
+FROM edges e
+JOIN {dependency} d ON d.from_skill_id = e.from_id AND d.to_skill_id = e.to_id
+JOIN {skill} fs ON fs.id = e.from_id
+JOIN {skill} ts ON ts.id = e.to_id
+LEFT JOIN {progress} fp ON fp.skill_id = fs.id AND fp.user_id = %(user)s
+LEFT JOIN {progress} tp ON tp.skill_id = ts.id AND tp.user_id = %(user)s
+ORDER BY e.direction DESC, e.depth, d.id
+"""
+
+
+class SkillSubgraph:
+    def __init__(self, skill, edges):
+        self.skill = skill
+        self.edges = edges
+
+    def requires(self):
+        return [e for e in self.edges if e.direction == 'up' and e.depth == 1]
+
+    def required_by(self):
+        return [e for e in self.edges if e.direction == 'down' and e.depth == 1]
+
+    def is_locked(self):
+        return any(
+            e.dependency_type == 'hard' and e.parent.status != 'done'
+            for e in self.requires()
+        )
+
+
+def load_skill_subgraph(skill, user, depth=SUBGRAPH_MAX_DEPTH):
+    sql = SUBGRAPH_SQL.format(
+        dependency=SkillDependency._meta.db_table,
+        skill=Skill._meta.db_table,
+        progress=UserSkillProgress._meta.db_table,
+    )
+
+    edges = []
+    seen = set()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'skill': skill.id, 'user': user.id, 'depth': depth})
+        for row in cursor.fetchall():
+            # on a cycle the same edge is reachable both up and down
+            if row[0] in seen:
+                continue
+            seen.add(row[0])
+            edges.append(SubgraphEdge(
+                id=row[0],
+                dependency_type=row[1],
+                depth=row[2],
+                direction=row[3],
+                parent=SubgraphNode(*row[4:8]),
+                child=SubgraphNode(*row[8:12]),
+            ))
+
+    return SkillSubgraph(skill, edges)
@@ -0,0 +1,156 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# warn when a single request goes over any of these; 0 disables the check
+QUERY_COUNT_WARNING = getattr(settings, 'QUERY_COUNT_WARNING', 30)
+DUPLICATE_QUERY_WARNING = getattr(settings, 'DUPLICATE_QUERY_WARNING', 5)
+DB_TIME_WARNING_MS = getattr(settings, 'DB_TIME_WARNING_MS', 200)
+WALL_TIME_WARNING_MS = getattr(settings, 'WALL_TIME_WARNING_MS', 1000)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_placeholder_lists = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_savepoints = re.compile(r'^(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT) ')
+
+
+def fingerprint(sql):
+    # params arrive separately, so the template already hides literal values;
+    # IN (...) lists of any length still have to collapse into one shape
+    return _placeholder_lists.sub('(%s, ...)', sql)
+
+
+class QueryRecorder:
+    # used with connection.execute_wrapper(); savepoints are bookkeeping, not queries
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not _savepoints.match(sql):
+                self.count += 1
+                self.duration += time.perf_counter() - started
+                self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold=2):
+        return {sql: count for sql, count in self.fingerprints.items() if count >= threshold}
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        yield recorder
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label, value):
+        counts, total = self.series.get(label, ([0] * (len(self.buckets) + 1), 0.0))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.series[label] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{view="{label}",le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total:.6f}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return lines
+
+
+class ViewMetrics:
+    # per-process; every worker process is scraped on its own
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wall_time = Histogram('aurora_view_duration_seconds', 'Wall time per request.', SECONDS_BUCKETS)
+        self.db_time = Histogram('aurora_view_db_seconds', 'Time spent in SQL per request.', SECONDS_BUCKETS)
+        self.queries = Histogram('aurora_view_queries', 'SQL queries per request.', QUERY_BUCKETS)
+        self.duplicates = Counter()
+        self.warnings = Counter()
+
+    def observe(self, view, wall_time, recorder):
+        duplicated = sum(count - 1 for count in recorder.duplicates().values())
+        with self.lock:
+            self.wall_time.observe(view, wall_time)
+            self.db_time.observe(view, recorder.duration)
+            self.queries.observe(view, recorder.count)
+            self.duplicates[view] += duplicated
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for histogram in (self.wall_time, self.db_time, self.queries):
+                lines.extend(histogram.render())
+            for name, help_text, counter in (
+                    ('aurora_view_duplicate_queries_total', 'Queries repeating an earlier fingerprint in the same request.',
+                     self.duplicates),
+                    ('aurora_view_slow_requests_total', 'Requests over a configured threshold.', self.warnings)):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                lines += [f'{name}{{view="{view}"}} {count}' for view, count in sorted(counter.items())]
+            return '\n'.join(lines) + '\n'
+
+
+view_metrics = ViewMetrics()
+
+
+def check_thresholds(view, wall_time, recorder):
+    problems = []
+    if QUERY_COUNT_WARNING and recorder.count > QUERY_COUNT_WARNING:
+        problems.append(f"{recorder.count} queries")
+    if DB_TIME_WARNING_MS and recorder.duration * 1000 > DB_TIME_WARNING_MS:
+        problems.append(f"{recorder.duration * 1000:.0f} ms in SQL")
+    if WALL_TIME_WARNING_MS and wall_time * 1000 > WALL_TIME_WARNING_MS:
+        problems.append(f"{wall_time * 1000:.0f} ms total")
+    if DUPLICATE_QUERY_WARNING:
+        for sql, count in recorder.duplicates(DUPLICATE_QUERY_WARNING).items():
+            problems.append(f"possible N+1, {count}x: {sql[:200]}")
+    return problems
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        wall_time = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        view_metrics.observe(view, wall_time, recorder)
+
+        problems = check_thresholds(view, wall_time, recorder)
+        if problems:
+            with view_metrics.lock:
+                view_metrics.warnings[view] += 1
+            logger.warning("Slow view %s (%s %s): %s", view, request.method, request.path, "; ".join(problems))
+
+        return response
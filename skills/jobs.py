@@ -0,0 +1,131 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RoadmapJob
+from .roadmap_cache import generate_roadmap_cached
+from .mermaid import roadmap_mermaid
+from .roadmaps import RoadmapValidationError, ai_category, materialize_roadmap
+
+logger = logging.getLogger(__name__)
+
+GENERATION_FAILED = "AI не зміг згенерувати план. Спробуйте спростити тему (наприклад 'Python Basics')."
+GENERATION_INTERRUPTED = "Генерацію перервано. Спробуйте ще раз."
+
+# a job still "running" after this long lost its worker (restart, crash); one still
+# "queued" lost its place in the in-process executor, or no worker is reading the queue
+ROADMAP_JOB_TIMEOUT = getattr(settings, 'ROADMAP_JOB_TIMEOUT', 15 * 60)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ROADMAP_WORKERS,
+                thread_name_prefix='roadmap'
+            )
+        return _executor
+
+
+def enqueue_roadmap(user, topic):
+    job = RoadmapJob.objects.create(user=user, topic=topic)
+    if settings.ROADMAP_INLINE_WORKER:
+        # no roadmap_worker loop to clean up after a restarted web process
+        fail_stale_jobs()
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.id))
+    return job
+
+
+def claim_job(job_id):
+    # the status check makes claiming atomic between the thread pool and roadmap_worker
+    return RoadmapJob.objects.filter(pk=job_id, status='queued').update(
+        status='running',
+        started_at=timezone.now()
+    ) == 1
+
+
+def _stale(timeout):
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Q(status='running', started_at__lt=cutoff) | Q(status='queued', created_at__lt=cutoff)
+
+
+def fail_stale_jobs(timeout=ROADMAP_JOB_TIMEOUT):
+    # failed rather than requeued: a running roadmap may already be half written
+    # and a second run would add its skills again
+    return RoadmapJob.objects.filter(_stale(timeout)).update(
+        status='failed', error=GENERATION_INTERRUPTED, finished_at=timezone.now()
+    )
+
+
+def fail_if_stale(job, timeout=ROADMAP_JOB_TIMEOUT):
+    # for the polled job, so ai_job.html stops even if nothing else cleans up;
+    # no query while the job is still within its time
+    since = job.started_at if job.status == 'running' else job.created_at
+    if job.is_finished or since >= timezone.now() - timedelta(seconds=timeout):
+        return job
+    if RoadmapJob.objects.filter(_stale(timeout), pk=job.pk).update(
+        status='failed', error=GENERATION_INTERRUPTED, finished_at=timezone.now()
+    ):
+        job.refresh_from_db()
+    return job
+
+
+def claim_next_job():
+    with transaction.atomic():
+        job_id = RoadmapJob.objects.select_for_update(skip_locked=True).filter(
+            status='queued'
+        ).order_by('created_at').values_list('id', flat=True).first()
+
+        if job_id is None or not claim_job(job_id):
+            return None
+        return job_id
+
+
+def execute_job(job_id, generate=generate_roadmap_cached):
+    job = RoadmapJob.objects.select_related('user').get(pk=job_id)
+
+    try:
+        data = generate(job.topic)
+        if data:
+            result = materialize_roadmap(job.user, data, ai_category(job.topic))
+            job.status = 'done'
+            job.skills_count = len(result.skills)
+            job.mermaid_graph = roadmap_mermaid(result.skills, result.dependencies)
+        else:
+            job.status = 'failed'
+            job.error = GENERATION_FAILED
+    except RoadmapValidationError as exc:
+        logger.warning("Roadmap job %s returned an invalid roadmap: %s", job_id, exc)
+        job.status = 'failed'
+        job.error = f"{GENERATION_FAILED} {exc}"
+    except Exception:
+        logger.exception("Roadmap job %s failed", job_id)
+        job.status = 'failed'
+        job.error = GENERATION_FAILED
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'skills_count', 'mermaid_graph', 'finished_at'])
+    return job
+
+
+def run_job(job_id, generate=generate_roadmap_cached):
+    if not claim_job(job_id):
+        return None
+    return execute_job(job_id, generate)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
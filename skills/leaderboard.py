@@ -0,0 +1,159 @@
+from collections import namedtuple
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .gamification import get_rank_info
+from .models import UserXP
+
+PAGE_SIZE = 50
+SNAPSHOT_SIZE = PAGE_SIZE * 4
+SNAPSHOT_TTL = 60
+SNAPSHOT_CACHE_KEY = 'leaderboard:snapshot'
+CURSOR_SALT = 'skills.leaderboard.cursor'
+
+LeaderboardPage = namedtuple('LeaderboardPage', ['entries', 'prev_cursor', 'next_cursor', 'taken_at'])
+
+# Leaderboard order is (-total_xp, user_id); a cursor is "<xp>.<user_id>.<position>"
+# of the row next to the page edge, so every page is a keyset seek on
+# userxp_leaderboard_idx and positions never need a count. Cursors are signed,
+# so the positions shown are always ones the server handed out.
+
+
+def make_cursor(entry):
+    return signing.Signer(salt=CURSOR_SALT).sign(f"{entry['xp']}.{entry['user_id']}.{entry['position']}")
+
+
+def parse_cursor(value):
+    try:
+        xp, user_id, position = (int(part) for part in signing.Signer(salt=CURSOR_SALT).unsign(value).split('.'))
+    except (TypeError, ValueError, signing.BadSignature):
+        return None
+    return xp, user_id, position
+
+
+def public_ledger():
+    # profiles are created lazily (skills.profiles); no profile yet means the defaults
+    return UserXP.objects.filter(Q(user__profile__is_public=True) | Q(user__profile__isnull=True))
+
+
+# the redundant bound on total_xp gives the index a range to start from;
+# the OR alone is only a filter
+def ranked_after(xp, user_id):
+    return Q(total_xp__lte=xp) & (Q(total_xp__lt=xp) | Q(total_xp=xp, user_id__gt=user_id))
+
+
+def ranked_before(xp, user_id):
+    return Q(total_xp__gte=xp) & (Q(total_xp__gt=xp) | Q(total_xp=xp, user_id__lt=user_id))
+
+
+def _entries(rows, first_position):
+    return [
+        {
+            'user_id': user_id,
+            'username': username,
+            'xp': xp,
+            'rank': get_rank_info(xp)['current_rank'],
+            'position': first_position + i,
+        }
+        for i, (user_id, username, xp) in enumerate(rows)
+    ]
+
+
+def _forward(queryset, limit):
+    return list(queryset.order_by('-total_xp', 'user_id').values_list(
+        'user_id', 'user__username', 'total_xp'
+    )[:limit])
+
+
+def _backward(queryset, limit):
+    rows = list(queryset.order_by('total_xp', '-user_id').values_list(
+        'user_id', 'user__username', 'total_xp'
+    )[:limit])
+    rows.reverse()
+    return rows
+
+
+def _page(entries, has_next, taken_at=None):
+    prev_cursor = make_cursor(entries[0]) if entries and entries[0]['position'] > 1 else None
+    next_cursor = make_cursor(entries[-1]) if entries and has_next else None
+    return LeaderboardPage(entries, prev_cursor, next_cursor, taken_at)
+
+
+def take_snapshot():
+    rows = _forward(public_ledger(), SNAPSHOT_SIZE + 1)
+    snapshot = {
+        'taken_at': timezone.now(),
+        'entries': _entries(rows[:SNAPSHOT_SIZE], 1),
+        'complete': len(rows) <= SNAPSHOT_SIZE,
+    }
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, SNAPSHOT_TTL)
+    return snapshot
+
+
+def get_snapshot():
+    return cache.get(SNAPSHOT_CACHE_KEY) or take_snapshot()
+
+
+def _snapshot_page(after):
+    snapshot = get_snapshot()
+    entries = snapshot['entries']
+
+    start = 0
+    if after:
+        xp, user_id, position = after
+        # only trust the snapshot if the cursor row still sits where it says
+        if not (0 < position <= len(entries)):
+            return None
+        edge = entries[position - 1]
+        if (edge['xp'], edge['user_id']) != (xp, user_id):
+            return None
+        start = position
+
+    page = entries[start:start + PAGE_SIZE]
+    if start + PAGE_SIZE > len(entries) and not snapshot['complete']:
+        return None
+
+    has_next = start + PAGE_SIZE < len(entries) or not snapshot['complete']
+    return _page(page, has_next, snapshot['taken_at'])
+
+
+def leaderboard_page(after=None, before=None):
+    if before:
+        xp, user_id, position = before
+        rows = _backward(public_ledger().filter(ranked_before(xp, user_id)), PAGE_SIZE)
+        return _page(_entries(rows, position - len(rows)), has_next=True)
+
+    cached = _snapshot_page(after)
+    if cached is not None:
+        return cached
+
+    queryset = public_ledger()
+    first_position = 1
+    if after:
+        xp, user_id, position = after
+        queryset = queryset.filter(ranked_after(xp, user_id))
+        first_position = position + 1
+
+    rows = _forward(queryset, PAGE_SIZE + 1)
+    return _page(_entries(rows[:PAGE_SIZE], first_position), has_next=len(rows) > PAGE_SIZE)
+
+
+def position_of(ledger):
+    return public_ledger().filter(ranked_before(ledger.total_xp, ledger.user_id)).count() + 1
+
+
+def page_around(ledger):
+    position = position_of(ledger)
+    key = (ledger.total_xp, ledger.user_id)
+
+    above = _backward(public_ledger().filter(ranked_before(*key)), PAGE_SIZE // 2)
+    rest = _forward(
+        public_ledger().filter(Q(user_id=ledger.user_id) | ranked_after(*key)),
+        PAGE_SIZE - len(above) + 1
+    )
+    rows = above + rest
+    has_next = len(rows) > PAGE_SIZE
+    return _page(_entries(rows[:PAGE_SIZE], position - len(above)), has_next), position
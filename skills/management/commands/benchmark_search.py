@@ -0,0 +1,119 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from skills.models import Skill
+from skills.search import search_skills
+
+BENCH_USERNAME = 'search-benchmark'
+
+WORDS_EN = [
+    'python', 'django', 'docker', 'kubernetes', 'testing', 'databases', 'postgres', 'networking',
+    'algorithms', 'security', 'react', 'typescript', 'linux', 'caching', 'queues', 'graphs',
+]
+WORDS_UK = [
+    'основи', 'навички', 'бази', 'даних', 'мережі', 'алгоритми', 'безпека', 'тестування',
+    'контейнери', 'розгортання', 'архітектура', 'програмування', 'графи', 'черги',
+]
+
+SYLLABLES_EN = ['ka', 'lo', 'ver', 'tin', 'mar', 'sol', 'pen', 'dri', 'gus', 'hel']
+SYLLABLES_UK = ['ка', 'ло', 'вер', 'тін', 'мар', 'сол', 'пен', 'дри', 'гус', 'хел']
+
+QUERIES = [
+    ('english word', 'docker'),
+    ('english stem', 'testing databases'),
+    ('ukrainian', 'алгоритми'),
+    ('ukrainian prefix', 'навичк'),
+    ('typo', 'kubernetis'),
+    ('no match', 'haskell'),
+]
+
+
+class Command(BaseCommand):
+    help = "Seeds a synthetic skill catalog and reports skill search latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skills', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--cleanup', action='store_true', help="Delete the seeded catalog afterwards")
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        self.seed(user, options['skills'], options['batch_size'])
+
+        base = Skill.objects.filter(author=user).only('id', 'title', 'slug', 'category', 'difficulty')
+
+        self.stdout.write(f"{'query':<18}{'backend':<10}{'rows':>7}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, text in QUERIES:
+            legacy = base.filter(Q(title__icontains=text) | Q(description__icontains=text))
+            fts = search_skills(base, text).order_by('category', '-search_rank', 'title')
+
+            for backend, queryset in (('icontains', legacy), ('fts', fts)):
+                rows, timings = self.measure(queryset, options['repeat'])
+                self.stdout.write(
+                    f"{label:<18}{backend:<10}{rows:>7}"
+                    f"{statistics.median(timings):>10.2f}{self.p95(timings):>10.2f}"
+                )
+
+        if options['cleanup']:
+            user.delete()
+            self.stdout.write("Benchmark catalog deleted")
+
+    def seed(self, user, total, batch_size):
+        existing = Skill.objects.filter(author=user).count()
+        if existing >= total:
+            return
+
+        rnd = random.Random(42)
+        run = uuid.uuid4().hex[:6]
+        started = time.perf_counter()
+
+        # keywords are rare among a few thousand filler words, as in real text
+        filler = {
+            'en': [a + b + c for a in SYLLABLES_EN for b in SYLLABLES_EN for c in SYLLABLES_EN],
+            'uk': [a + b + c for a in SYLLABLES_UK for b in SYLLABLES_UK for c in SYLLABLES_UK],
+        }
+
+        for start in range(existing, total, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, total)):
+                words, lang = (WORDS_EN, 'en') if i % 2 else (WORDS_UK, 'uk')
+                title = ' '.join([rnd.choice(words)] + rnd.sample(filler[lang], 2)).capitalize()
+                description = ' '.join(rnd.choices(filler[lang], k=40) + rnd.sample(words, 2))
+                batch.append(Skill(
+                    title=title,
+                    slug=f'bench-{run}-{i}',
+                    category=rnd.choice(words).capitalize(),
+                    difficulty=rnd.randint(1, 4),
+                    description=description,
+                    author=user,
+                ))
+            with transaction.atomic():
+                Skill.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Skill._meta.db_table}')
+
+        self.stdout.write(
+            f"Seeded {total - existing} skills in {time.perf_counter() - started:.1f}s"
+        )
+
+    def measure(self, queryset, repeat):
+        timings = []
+        rows = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = len(list(queryset[:200]))
+            timings.append((time.perf_counter() - started) * 1000)
+        return rows, timings
+
+    def p95(self, timings):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
@@ -0,0 +1,46 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from skills.benchmarks import BENCH_PREFIX, benchmark_report, compare_reports
+
+
+class Command(BaseCommand):
+    help = "Times the main views through the test client on the seeded dataset and writes JSON results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--sample-users', type=int, default=3, help="Benchmark users to log in as")
+        parser.add_argument('--prefix', default=BENCH_PREFIX)
+        parser.add_argument('--output', '-o', help="File to write results to; stdout by default")
+        parser.add_argument('--compare', help="Earlier results file to compare p50 latency against")
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help="With --compare, exit with an error if a view got this many percent slower")
+
+    def handle(self, *args, **options):
+        try:
+            report = benchmark_report(options['repeat'], options['warmup'], options['prefix'], options['sample_users'])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(text + '\n')
+        else:
+            sys.stdout.write(text + '\n')
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as stream:
+                baseline = json.load(stream)
+
+            slower = []
+            self.stderr.write(f"{'view':<24}{'before':>10}{'after':>10}{'change':>9}")
+            for name, before, after, change in compare_reports(baseline, report):
+                self.stderr.write(f"{name:<24}{before:>10.2f}{after:>10.2f}{change:>8.1f}%")
+                if change > options['threshold']:
+                    slower.append(name)
+            if slower:
+                raise CommandError(f"Slower than {baseline.get('revision') or 'baseline'}: {', '.join(slower)}")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from skills.pagecache import invalidate_landing_page, invalidate_skill_cards
+
+
+class Command(BaseCommand):
+    help = "Drops the cached landing page and skill card fragments (run after deploying template changes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landing', action='store_true', help="Only the landing page")
+        parser.add_argument('--cards', action='store_true', help="Only the skill cards")
+
+    def handle(self, *args, **options):
+        both = not options['landing'] and not options['cards']
+        if both or options['landing']:
+            invalidate_landing_page()
+            self.stdout.write("Landing page dropped")
+        if both or options['cards']:
+            invalidate_skill_cards()
+            self.stdout.write("Skill cards dropped")
@@ -0,0 +1,33 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from skills.transfer import RateReporter, export_records, write_ndjson
+
+
+class Command(BaseCommand):
+    help = "Streams skills, dependencies and progress as NDJSON (one user or the whole site)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to export; the whole site by default")
+        parser.add_argument('--output', '-o', help="File to write; stdout by default")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"User {options['user']!r} does not exist")
+
+        reporter = RateReporter(self.stderr)
+        records = export_records(user, chunk_size=options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                write_ndjson(records, stream, reporter)
+        else:
+            write_ndjson(records, sys.stdout, reporter)
+
+        self.stderr.write(self.style.SUCCESS(f"Exported {reporter.summary()}"))
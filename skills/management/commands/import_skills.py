@@ -0,0 +1,46 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from skills.transfer import RateReporter, SkillImporter, TransferError, read_ndjson
+
+
+class Command(BaseCommand):
+    help = "Imports an NDJSON export from export_skills in batched transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="NDJSON file, or - for stdin")
+        parser.add_argument('--user', help="Import everything as this user instead of the original authors")
+        parser.add_argument('--on-conflict', choices=['rename', 'skip'], default='rename',
+                            help="What to do with a skill whose slug is taken (default: rename)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"User {options['user']!r} does not exist")
+
+        reporter = RateReporter(self.stderr)
+        importer = SkillImporter(user, options['on_conflict'], options['batch_size'], reporter)
+
+        stream = sys.stdin if options['input'] == '-' else open(options['input'], encoding='utf-8')
+        try:
+            importer.run(read_ndjson(stream))
+        except TransferError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {reporter.summary()}"))
+        if importer.renamed_count:
+            sample = ", ".join(f"{slug} -> {new_slug}" for slug, new_slug in importer.renamed_sample.items())
+            self.stdout.write(f"Renamed {importer.renamed_count} skills with taken slugs, e.g. {sample}")
+        skipped = {kind: count for kind, count in importer.skipped.items() if count}
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped: {skipped}"))
+        if importer.cycles:
+            self.stderr.write(f"{importer.cycles} dependencies were left out because they would close a cycle")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from skills.activity import rebuild_activity
+
+
+class Command(BaseCommand):
+    help = ("Backfills the daily activity rollup from finished_at of done progress rows, a chunk of users "
+            "per transaction. Replaces the rollup of every user it processes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Users per chunk")
+        parser.add_argument('--since-user', type=int, default=0, help="Resume from this user id")
+
+    def handle(self, *args, **options):
+        def progress(last_user_id, users, rows):
+            self.stdout.write(f"up to user {last_user_id}: {users} users, {rows} rollup rows")
+
+        users, rows = rebuild_activity(options['batch_size'], options['since_user'], progress)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily activity for {users} users ({rows} rows)"))
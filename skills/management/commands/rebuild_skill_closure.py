@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from skills.closure import rebuild_closure, verify_closure
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the SkillClosure path table from SkillDependency and verifies it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only verify, do not rewrite the table")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                count = rebuild_closure(batch_size=options['batch_size'])
+            self.stdout.write(f"Rebuilt skill closure: {count} rows")
+
+        mismatches = verify_closure()
+        for author_id, missing, unexpected in mismatches[:20]:
+            self.stderr.write(f"author {author_id}: {missing} missing rows, {unexpected} unexpected rows")
+
+        if mismatches:
+            raise CommandError(f"Skill closure is off for {len(mismatches)} authors")
+
+        self.stdout.write(self.style.SUCCESS("Skill closure is consistent"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from skills.gamification import rebuild_xp_ledger, verify_xp_ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the UserXP ledger from UserSkillProgress and verifies it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only verify, do not rewrite the ledger")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                count = rebuild_xp_ledger(batch_size=options['batch_size'])
+            self.stdout.write(f"Rebuilt XP ledger for {count} users")
+
+        mismatches = verify_xp_ledger()
+        for user_id, expected, actual in mismatches[:20]:
+            self.stderr.write(f"user {user_id}: expected {expected}, ledger {actual}")
+
+        if mismatches:
+            raise CommandError(f"XP ledger has {len(mismatches)} mismatched users")
+
+        self.stdout.write(self.style.SUCCESS("XP ledger is consistent"))
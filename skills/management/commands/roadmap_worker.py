@@ -0,0 +1,53 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from skills.jobs import claim_next_job, execute_job, fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Runs queued AI roadmap jobs with a bounded number of concurrent generations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.ROADMAP_WORKERS)
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        slots = threading.Semaphore(options['concurrency'])
+        threads = []
+
+        self.stdout.write(f"Roadmap worker started, concurrency {options['concurrency']}")
+        try:
+            while True:
+                slots.acquire()
+                stale = fail_stale_jobs()
+                if stale:
+                    self.stdout.write(f"Marked {stale} abandoned jobs as failed")
+                job_id = claim_next_job()
+                if job_id is None:
+                    slots.release()
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                thread = threading.Thread(target=self.run, args=(job_id, slots), daemon=True)
+                thread.start()
+                threads = [t for t in threads if t.is_alive()] + [thread]
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping, waiting for running jobs...")
+
+        for thread in threads:
+            thread.join()
+
+    def run(self, job_id, slots):
+        try:
+            job = execute_job(job_id)
+            self.stdout.write(f"Job {job.id} ({job.topic}): {job.status}")
+        finally:
+            connection.close()
+            slots.release()
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from skills.benchmarks import BENCH_PREFIX, bench_users, dataset_size, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Seeds synthetic users with skill DAGs and progress for benchmark_views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--skills', type=int, default=200, help="Skills per user")
+        parser.add_argument('--max-parents', type=int, default=3, help="Most prerequisites one skill gets")
+        parser.add_argument('--soft-ratio', type=float, default=0.25, help="Share of soft dependencies")
+        parser.add_argument('--done-ratio', type=float, default=0.6, help="Chance an unlocked skill is done")
+        parser.add_argument('--prefix', default=BENCH_PREFIX, help="Benchmark usernames are <prefix>-<n>")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--delete', action='store_true', help="Delete the benchmark users instead")
+
+    def handle(self, *args, **options):
+        if options['delete']:
+            deleted, _ = bench_users(options['prefix']).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} rows"))
+            return
+
+        created = seed_dataset(
+            users=options['users'],
+            skills=options['skills'],
+            max_parents=options['max_parents'],
+            soft_ratio=options['soft_ratio'],
+            done_ratio=options['done_ratio'],
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        total = dataset_size(options['prefix'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created.users} users; dataset has {total.users} users, {total.skills} skills, "
+            f"{total.dependencies} dependencies, {total.progress} progress rows"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from skills.leaderboard import take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Refreshes the cached leaderboard snapshot (run periodically, e.g. from cron)"
+
+    def handle(self, *args, **options):
+        snapshot = take_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f"Snapshot of {len(snapshot['entries'])} leaders taken at {snapshot['taken_at']:%H:%M:%S}")
+        )
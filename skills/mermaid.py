@@ -0,0 +1,50 @@
+STATUS_CLASSES = [
+    "classDef done fill:#198754,stroke:#198754,stroke-width:2px,color:#fff;",
+    "classDef in_progress fill:#ffc107,stroke:#ffc107,stroke-width:2px,color:#000;",
+    "classDef todo fill:transparent,stroke:#6c757d,stroke-width:1px,stroke-dasharray: 5 5,color:#e9ecef;",
+    "classDef locked fill:#343a40,stroke:#adb5bd,stroke-width:1px,color:#6c757d;",
+    "classDef current fill:#0d6efd,stroke:#0d6efd,stroke-width:4px,color:#fff;",
+]
+
+
+def pad(text):
+    return f" {text} "
+
+
+def skill_subgraph_mermaid(subgraph):
+    skill = subgraph.skill
+    mermaid_graph = ["graph TD"]
+    mermaid_graph.extend(STATUS_CLASSES)
+
+    mermaid_graph.append(f'N{skill.id}["{pad(skill.title)}"]')
+    mermaid_graph.append(f'class N{skill.id} current;')
+
+    declared = {skill.id}
+    for edge in subgraph.edges:
+        for node in (edge.parent, edge.child):
+            if node.id in declared:
+                continue
+            declared.add(node.id)
+            mermaid_graph.append(f'N{node.id}["{pad(node.title)}"]')
+            mermaid_graph.append(f'class N{node.id} {node.status};')
+            mermaid_graph.append(f'click N{node.id} "/skill/{node.slug}/"')
+
+        arrow = '-->' if edge.dependency_type == 'hard' else '-.->'
+        mermaid_graph.append(f'N{edge.parent.id} {arrow} N{edge.child.id}')
+
+    return "\n".join(mermaid_graph)
+
+
+def roadmap_mermaid(skills, dependencies):
+    mermaid_graph = ["graph TD"]
+    mermaid_graph.append("classDef default fill:#e3f2fd,stroke:#0d6efd,stroke-width:2px;")
+
+    for dep in dependencies:
+        parent, child = dep.from_skill, dep.to_skill
+        mermaid_graph.append(f'N{parent.id}["{parent.title}"] --> N{child.id}["{child.title}"]')
+
+    if not dependencies:
+        for skill in skills:
+            mermaid_graph.append(f'N{skill.id}["{skill.title}"]')
+
+    return "\n".join(mermaid_graph)
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserXP = apps.get_model('skills', 'UserXP')
+    UserSkillProgress = apps.get_model('skills', 'UserSkillProgress')
+
+    totals = {
+        row['user_id']: row
+        for row in UserSkillProgress.objects.filter(status='done').values('user_id').annotate(
+            xp=Sum(F('skill__difficulty') * 10),
+            finished=Count('id')
+        )
+    }
+
+    UserXP.objects.bulk_create([
+        UserXP(
+            user_id=user_id,
+            total_xp=totals.get(user_id, {}).get('xp') or 0,
+            finished_count=totals.get(user_id, {}).get('finished') or 0,
+        )
+        for user_id in User.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0010_skillgraphversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserXP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_xp', models.IntegerField(default=0, verbose_name='Досвід (XP)')),
+                ('finished_count', models.IntegerField(default=0, verbose_name='Вивчено навичок')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='xp', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Досвід користувача',
+                'verbose_name_plural': 'Досвід користувачів',
+                'indexes': [models.Index(fields=['-total_xp', 'user'], name='userxp_leaderboard_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:06
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The 'english' config stems English words and keeps Ukrainian ones as-is
+# (PostgreSQL ships no Ukrainian stemmer); title outweighs the description.
+SEARCH_VECTOR_TRIGGER = """
+CREATE OR REPLACE FUNCTION skills_skill_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER skills_skill_search_vector
+    BEFORE INSERT OR UPDATE OF title, category, description ON skills_skill
+    FOR EACH ROW EXECUTE FUNCTION skills_skill_search_vector_update();
+
+UPDATE skills_skill SET title = title;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS skills_skill_search_vector ON skills_skill;
+DROP FUNCTION IF EXISTS skills_skill_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0011_userxp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='skill',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.AddIndex(
+            model_name='skill',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='skill_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='skill_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+import markdown as md
+from django.db import migrations, models
+
+
+def render_descriptions(apps, schema_editor):
+    Skill = apps.get_model('skills', 'Skill')
+
+    batch = []
+    for skill in Skill.objects.exclude(description='').only('id', 'description').iterator(chunk_size=1000):
+        skill.description_html = md.markdown(skill.description, extensions=['fenced_code', 'nl2br'])
+        batch.append(skill)
+        if len(batch) >= 1000:
+            Skill.objects.bulk_update(batch, ['description_html'])
+            batch = []
+    Skill.objects.bulk_update(batch, ['description_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0012_skill_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_descriptions, migrations.RunPython.noop),
+    ]
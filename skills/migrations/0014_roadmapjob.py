@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0013_skill_description_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoadmapJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=255, verbose_name='Тема')),
+                ('status', models.CharField(choices=[('queued', 'В черзі'), ('running', 'Генерується'), ('done', 'Готово'), ('failed', 'Помилка')], default='queued', max_length=20, verbose_name='Статус')),
+                ('error', models.TextField(blank=True)),
+                ('skills_count', models.PositiveIntegerField(default=0)),
+                ('mermaid_graph', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roadmap_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'AI генерація',
+                'verbose_name_plural': 'AI генерації',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='roadmapjob_queue_idx')],
+            },
+        ),
+    ]
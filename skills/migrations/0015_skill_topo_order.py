@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:19
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def order_existing_graphs(apps, schema_editor):
+    Skill = apps.get_model('skills', 'Skill')
+    SkillDependency = apps.get_model('skills', 'SkillDependency')
+
+    skills_by_author = defaultdict(list)
+    for skill_id, author_id, topo_order in Skill.objects.values_list('id', 'author_id', 'topo_order').order_by('id'):
+        skills_by_author[author_id].append((skill_id, topo_order))
+
+    requires = defaultdict(set)
+    dependents = defaultdict(set)
+    for from_id, to_id in SkillDependency.objects.values_list('from_skill_id', 'to_skill_id'):
+        requires[to_id].add(from_id)
+        dependents[from_id].add(to_id)
+
+    for skills in skills_by_author.values():
+        ids = [skill_id for skill_id, _ in skills]
+        slots = sorted(topo_order for _, topo_order in skills)
+        own = set(ids)
+
+        # Kahn's algorithm; skills left on a pre-existing cycle keep id order at the end
+        pending = {skill_id: len(requires[skill_id] & own) for skill_id in ids}
+        ready = [skill_id for skill_id in ids if not pending[skill_id]]
+        ordered = []
+        while ready:
+            skill_id = ready.pop(0)
+            ordered.append(skill_id)
+            for child in dependents[skill_id] & own:
+                pending[child] -= 1
+                if not pending[child]:
+                    ready.append(child)
+
+        placed = set(ordered)
+        ordered += [skill_id for skill_id in ids if skill_id not in placed]
+
+        Skill.objects.bulk_update(
+            [Skill(id=skill_id, topo_order=slot) for skill_id, slot in zip(ordered, slots)],
+            ['topo_order'],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0014_roadmapjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE SEQUENCE skills_skill_topo_order_seq;",
+            "DROP SEQUENCE skills_skill_topo_order_seq;",
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='topo_order',
+            field=models.BigIntegerField(db_default=models.Func(models.Value('skills_skill_topo_order_seq'), function='nextval'), editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['author', 'topo_order'], name='skill_author_topo_idx'),
+        ),
+        migrations.RunPython(order_existing_graphs, migrations.RunPython.noop),
+    ]
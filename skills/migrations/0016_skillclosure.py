@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0015_skill_topo_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('hard_only', models.BooleanField()),
+                ('paths', models.PositiveBigIntegerField(default=1)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_paths', to='skills.skill')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_paths', to='skills.skill')),
+            ],
+            options={
+                'verbose_name': 'Шлях між навичками',
+                'verbose_name_plural': 'Шляхи між навичками',
+                'indexes': [models.Index(fields=['descendant', 'hard_only'], name='skill_closure_descendant_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant', 'depth', 'hard_only'), name='skill_closure_path_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# one category per distinct (author, name), counted in the same pass
+BACKFILL_SQL = """
+INSERT INTO skills_category (author_id, name, skill_count, done_count)
+SELECT s.author_id, s.category, COUNT(*), COUNT(p.id)
+FROM skills_skill s
+LEFT JOIN skills_userskillprogress p ON p.skill_id = s.id AND p.user_id = s.author_id AND p.status = 'done'
+WHERE s.author_id IS NOT NULL
+GROUP BY 1, 2;
+
+UPDATE skills_skill s SET category_ref_id = c.id
+FROM skills_category c
+WHERE c.author_id = s.author_id AND c.name = s.category;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0018_dailyactivity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Назва')),
+                ('skill_count', models.IntegerField(default=0, verbose_name='Навичок')),
+                ('done_count', models.IntegerField(default=0, verbose_name='Вивчено')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categories', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Категорія',
+                'verbose_name_plural': 'Категорії',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='category_ref',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='skills.category'),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('author', 'name'), name='category_author_name_uniq'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
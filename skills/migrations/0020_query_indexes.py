@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+COVERED_INDEXES = [
+    ('category', 'author'),
+    ('dailyactivity', 'user'),
+    ('skill', 'author'),
+    ('skillclosure', 'ancestor'),
+    ('skillclosure', 'descendant'),
+    ('skilldependency', 'from_skill'),
+    ('skilldependency', 'to_skill'),
+    ('userskillprogress', 'user'),
+]
+
+
+def covered_indexes(apps, schema_editor):
+    # the names Django gave the db_index=True foreign key indexes
+    for model_name, field_name in COVERED_INDEXES:
+        model = apps.get_model('skills', model_name)
+        column = model._meta.get_field(field_name).column
+        table = model._meta.db_table
+        yield table, column, schema_editor._create_index_name(table, [column])
+
+
+def drop_covered_indexes(apps, schema_editor):
+    for _, _, name in covered_indexes(apps, schema_editor):
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}')
+
+
+def create_covered_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, column, name in covered_indexes(apps, schema_editor):
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(name)} ON {quote(table)} ({quote(column)})')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; it keeps the
+    # tables writable while the indexes build
+    atomic = False
+
+    dependencies = [
+        ('skills', '0019_category'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='skill',
+            index=models.Index(fields=['author', 'category', 'difficulty', 'title'], name='skill_author_order_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='skilldependency',
+            index=models.Index(fields=['to_skill', 'dependency_type'], name='dependency_to_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userskillprogress',
+            index=models.Index(fields=['user', 'status'], name='progress_user_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='userskillprogress',
+            index=models.Index(condition=models.Q(('status', 'done')), fields=['user', 'skill'], name='progress_done_idx'),
+        ),
+        # single-column FK indexes covered by a composite one leading with the same column,
+        # dropped once the composites exist; AlterField would also re-validate every FK
+        # under a lock, so only the indexes are dropped in the database
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='category',
+                    name='author',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='categories', to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AlterField(
+                    model_name='dailyactivity',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AlterField(
+                    model_name='skill',
+                    name='author',
+                    field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='skills', to=settings.AUTH_USER_MODEL),
+                ),
+                migrations.AlterField(
+                    model_name='skillclosure',
+                    name='ancestor',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_paths', to='skills.skill'),
+                ),
+                migrations.AlterField(
+                    model_name='skillclosure',
+                    name='descendant',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_paths', to='skills.skill'),
+                ),
+                migrations.AlterField(
+                    model_name='skilldependency',
+                    name='from_skill',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='required_by', to='skills.skill'),
+                ),
+                migrations.AlterField(
+                    model_name='skilldependency',
+                    name='to_skill',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='requires', to='skills.skill'),
+                ),
+                migrations.AlterField(
+                    model_name='userskillprogress',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='skill_progress', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_covered_indexes, create_covered_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0020_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userskillprogress',
+            name='credited_category',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='userskillprogress',
+            name='credited_xp',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
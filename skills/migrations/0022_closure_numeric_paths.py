@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0021_progress_credit'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='skillclosure',
+            name='paths',
+            field=models.DecimalField(decimal_places=0, default=1, max_digits=1000),
+        ),
+    ]
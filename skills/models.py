@@ -1,6 +1,30 @@
 import re
 from django.db import models
+from django.db.models import Func, Q, Value
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
+from .rendering import render_markdown
+
+class Category(models.Model):
+    # an author's skill group; the counters are kept by skills.categories
+    # leads the (author, name) constraint, no index of its own
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories', db_index=False)
+    name = models.CharField(max_length=100, verbose_name="Назва")
+    skill_count = models.IntegerField(default=0, verbose_name="Навичок")
+    # skills of the category the author has finished
+    done_count = models.IntegerField(default=0, verbose_name="Вивчено")
+
+    class Meta:
+        verbose_name = "Категорія"
+        verbose_name_plural = "Категорії"
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'name'], name='category_author_name_uniq'),
+        ]
+
+    def __str__(self):
+        return self.name
 
 class Skill(models.Model):
     DIFFICULTY_CHOICES = [
@@ -13,12 +37,30 @@ class Skill(models.Model):
     title = models.CharField(max_length=255, verbose_name="Назва навички")
     slug = models.SlugField(unique=True, max_length=255, verbose_name="URL ідентифікатор")
     category = models.CharField(max_length=100, verbose_name="Категорія")
+    # the author's Category named `category`, set by save(); bulk paths use skills.categories
+    category_ref = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='skills',
+                                     null=True, editable=False)
     difficulty = models.IntegerField(choices=DIFFICULTY_CHOICES, default=1, verbose_name="Складність")
-    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skills', null=True)
+    # leads the composite indexes in Meta, no index of its own
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skills', null=True, db_index=False)
 
     description = models.TextField(blank=True, verbose_name="Опис (Markdown)")
+    description_html = models.TextField(blank=True, editable=False)
     video_url = models.URLField(blank=True, null=True, verbose_name="Посилання на відео (YouTube)")
 
+    # part of the skill card cache key (skills.pagecache); queryset updates must set it too
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # filled by the skills_skill_search_vector trigger (migration 0012)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # position in the author's dependency order: every prerequisite has a lower
+    # value than the skills requiring it; kept by skills.topology
+    topo_order = models.BigIntegerField(
+        db_default=Func(Value('skills_skill_topo_order_seq'), function='nextval'),
+        editable=False,
+    )
+
     #Directed Graph
     dependencies = models.ManyToManyField(
         'self',
@@ -27,6 +69,51 @@ class Skill(models.Model):
         related_name='related_to'
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_category = instance._category_state()
+        return instance
+
+    def _category_state(self):
+        if {'category', 'category_ref_id'} & self.get_deferred_fields():
+            return None
+        return self.category_ref_id, self.category
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'description' in update_fields:
+            self.render_description()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'description_html'}
+        if update_fields is None or 'category' in update_fields:
+            self.resolve_category()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'category_ref'}
+        super().save(*args, **kwargs)
+        self._loaded_category = self._category_state()
+
+    def resolve_category(self):
+        # a moved skill keeps (old, new) category ids for the post_save signal's counters
+        previous = self.category_ref_id
+        self._category_moved = None
+        if self.author_id is None:
+            # ownerless skills (author is nullable) have nobody to keep a category for
+            self.category_ref = None
+            if not self._state.adding and previous is not None:
+                self._category_moved = (previous, None)
+            return
+        if previous is not None and getattr(self, '_loaded_category', None) == (previous, self.category):
+            return
+        category, _ = Category.objects.get_or_create(author_id=self.author_id, name=self.category)
+        self.category_ref = category
+        if not self._state.adding and previous != category.id:
+            self._category_moved = (previous, category.id)
+
+    def render_description(self):
+        # bulk_create skips save(), so bulk paths call this themselves
+        self.description_html = render_markdown(self.description)
+
     def get_video_id(self):
         if not self.video_url:
             return None
@@ -46,6 +133,13 @@ class Skill(models.Model):
         verbose_name = "Навичка"
         verbose_name_plural = "Навички"
         ordering = ['category', 'difficulty', 'title']
+        indexes = [
+            models.Index(fields=['author', 'topo_order'], name='skill_author_topo_idx'),
+            # the author's list in Meta.ordering, read straight off the index
+            models.Index(fields=['author', 'category', 'difficulty', 'title'], name='skill_author_order_idx'),
+            GinIndex(fields=['search_vector'], name='skill_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='skill_title_trgm_idx'),
+        ]
 
 
 class SkillDependency(models.Model):
@@ -54,10 +148,10 @@ class SkillDependency(models.Model):
         ('soft', 'Бажано'),
     ]
 
-    # from_skill
-    from_skill = models.ForeignKey(Skill, related_name='required_by', on_delete=models.CASCADE)
-    # to_skill
-    to_skill = models.ForeignKey(Skill, related_name='requires', on_delete=models.CASCADE)
+    # from_skill; indexed by unique_together
+    from_skill = models.ForeignKey(Skill, related_name='required_by', on_delete=models.CASCADE, db_index=False)
+    # to_skill; indexed together with the type in Meta
+    to_skill = models.ForeignKey(Skill, related_name='requires', on_delete=models.CASCADE, db_index=False)
 
     dependency_type = models.CharField(max_length=10, choices=DEPENDENCY_TYPE, default='hard')
 
@@ -65,10 +159,37 @@ class SkillDependency(models.Model):
         unique_together = ('from_skill', 'to_skill')
         verbose_name = "Залежність"
         verbose_name_plural = "Залежності"
+        indexes = [
+            models.Index(fields=['to_skill', 'dependency_type'], name='dependency_to_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.from_skill.title} -> {self.to_skill.title}"
 
+class SkillClosure(models.Model):
+    # every path between two skills, grouped by length and whether all its edges are hard;
+    # path counts let removals be subtracted exactly. Kept in sync by skills.closure.
+    # Both ends are looked up through the indexes in Meta.
+    ancestor = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='descendant_paths', db_index=False)
+    descendant = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='ancestor_paths', db_index=False)
+    depth = models.PositiveIntegerField()
+    hard_only = models.BooleanField()
+    # numeric: counts multiply along layered graphs and outgrow bigint long before the graph is large
+    paths = models.DecimalField(max_digits=1000, decimal_places=0, default=1)
+
+    class Meta:
+        verbose_name = "Шлях між навичками"
+        verbose_name_plural = "Шляхи між навичками"
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant', 'depth', 'hard_only'], name='skill_closure_path_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'hard_only'], name='skill_closure_descendant_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
 class UserSkillProgress(models.Model):
     STATUS_CHOICES = [
         ('todo', 'Треба вивчити'),
@@ -76,17 +197,76 @@ class UserSkillProgress(models.Model):
         ('done', 'Завершено'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_progress')
+    # leads unique_together and the indexes in Meta
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_progress', db_index=False)
     skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='todo')
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # what the finish was credited to in DailyActivity, so undoing it takes back the
+    # same thing after the skill was renamed or re-rated; NULL on older rows
+    credited_category = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    credited_xp = models.IntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('user', 'skill')
         verbose_name = "Прогрес користувача"
         verbose_name_plural = "Прогрес користувачів"
+        indexes = [
+            models.Index(fields=['user', 'status'], name='progress_user_status_idx'),
+            # finished skills per user: lock checks, XP and category/activity recounts
+            models.Index(fields=['user', 'skill'], condition=Q(status='done'), name='progress_done_idx'),
+        ]
+
+class DailyActivity(models.Model):
+    # completions and XP per user, day and category; kept by skills.activity
+    # leads the unique constraint, no index of its own
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_activity', db_index=False)
+    day = models.DateField()
+    category = models.CharField(max_length=100)
+    completed = models.IntegerField(default=0)
+    xp = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Активність за день"
+        verbose_name_plural = "Активність за днями"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day', 'category'], name='daily_activity_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.day} {self.category}: {self.completed}'
+
+class SkillGraphVersion(models.Model):
+    # bumped by signals on every change of user's skills, dependencies or progress
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='graph_version')
+    version = models.PositiveIntegerField(default=1)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Версія графа"
+        verbose_name_plural = "Версії графів"
+
+    def __str__(self):
+        return f'{self.user.username} v{self.version}'
+
+class UserXP(models.Model):
+    # materialized XP ledger, kept in sync by skills.gamification
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='xp')
+    total_xp = models.IntegerField(default=0, verbose_name="Досвід (XP)")
+    finished_count = models.IntegerField(default=0, verbose_name="Вивчено навичок")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Досвід користувача"
+        verbose_name_plural = "Досвід користувачів"
+        indexes = [
+            models.Index(fields=['-total_xp', 'user'], name='userxp_leaderboard_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username}: {self.total_xp} XP'
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -101,9 +281,76 @@ class Profile(models.Model):
     linkedin_link = models.URLField(max_length=200, blank=True, verbose_name='LinkedIn')
     website_link = models.URLField(max_length=200, blank=True, verbose_name='Вебсайт')
 
+    # values as loaded, so save() writes only what changed (or nothing)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded = instance._snapshot()
+        return instance
+
+    def _snapshot(self):
+        deferred = self.get_deferred_fields()
+        return {
+            field.attname: field.get_prep_value(field.value_from_object(self))
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded', None)
+        if loaded is None:
+            return None
+        current = self._snapshot()
+        return [name for name, value in current.items() if name in loaded and loaded[name] != value]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            changed = self.changed_fields()
+            if changed is not None:
+                if not changed:
+                    return
+                kwargs['update_fields'] = changed
+        super().save(*args, **kwargs)
+        self._loaded = self._snapshot()
+
     def __str__(self):
         return f'{self.user.username} Profile'
 
+class RoadmapJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'В черзі'),
+        ('running', 'Генерується'),
+        ('done', 'Готово'),
+        ('failed', 'Помилка'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='roadmap_jobs')
+    topic = models.CharField(max_length=255, verbose_name="Тема")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name="Статус")
+    error = models.TextField(blank=True)
+
+    skills_count = models.PositiveIntegerField(default=0)
+    mermaid_graph = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "AI генерація"
+        verbose_name_plural = "AI генерації"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='roadmapjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
 class Feedback(models.Model):
     CATEGORY_CHOICES = [
         ('bug', '🐛 Помилка / Баг'),
@@ -0,0 +1,151 @@
+from collections import Counter, defaultdict, deque
+
+from django.core.cache import cache
+
+from .graph import GRAPH_CACHE_TIMEOUT, GRAPH_FORMAT, STATUS_CODES, STATUS_NAMES, get_skill_graph
+
+TODO = STATUS_CODES['todo']
+
+# Whole-graph layout, computed once per graph version: skills get a layer by
+# longest prerequisite chain, categories become super-nodes placed by the
+# earliest layer of their skills. Coordinates are grid cells; the browser only
+# scales them, it never runs a layout itself.
+
+
+def node_layers(graph):
+    size = graph.own_count
+    pending = [0] * size
+    for i in range(size):
+        pending[i] = sum(1 for j in graph.prerequisite_indexes(i) if j < size)
+
+    layers = [0] * size
+    queue = deque(i for i in range(size) if not pending[i])
+    placed = 0
+    while queue:
+        i = queue.popleft()
+        placed += 1
+        for k in graph.unlock_idx[graph.unlock_ptr[i]:graph.unlock_ptr[i + 1]]:
+            if k < size:
+                layers[k] = max(layers[k], layers[i] + 1)
+                pending[k] -= 1
+                if not pending[k]:
+                    queue.append(k)
+
+    # skills on a cycle left from before cycle checks go after everything else
+    if placed < size:
+        last = max(layers) + 1
+        for i in range(size):
+            if pending[i]:
+                layers[i] = last
+    return layers
+
+
+def _order_columns(columns, predecessors, position):
+    # one barycenter sweep left to right: each item sits near what points at it
+    rows = {}
+    for column in sorted(columns):
+        def barycenter(item):
+            placed = [rows[p] for p in predecessors[item] if p in rows]
+            return (sum(placed) / len(placed) if placed else float('inf'), position(item))
+
+        for row, item in enumerate(sorted(columns[column], key=barycenter)):
+            rows[item] = row
+    return rows
+
+
+def compute_overview(graph):
+    size = graph.own_count
+    layers = node_layers(graph)
+
+    names = sorted(set(graph.categories[:size]))
+    cluster_of = {name: index for index, name in enumerate(names)}
+    members = defaultdict(list)
+    for i in range(size):
+        members[cluster_of[graph.categories[i]]].append(i)
+
+    inner_edges = defaultdict(list)
+    outer_edges = Counter()
+    predecessors = defaultdict(set)
+    for i in range(size):
+        for ptr, idx, dependency_type in (
+                (graph.hard_ptr, graph.hard_idx, 'hard'),
+                (graph.soft_ptr, graph.soft_idx, 'soft')):
+            for j in idx[ptr[i]:ptr[i + 1]]:
+                if j >= size:
+                    continue
+                source, target = cluster_of[graph.categories[j]], cluster_of[graph.categories[i]]
+                if source == target:
+                    inner_edges[target].append((j, i, dependency_type))
+                    predecessors[i].add(j)
+                else:
+                    outer_edges[source, target] += 1
+
+    cluster_layer = {c: min(layers[i] for i in nodes) for c, nodes in members.items()}
+    cluster_predecessors = defaultdict(set)
+    for source, target in outer_edges:
+        cluster_predecessors[target].add(source)
+
+    columns = defaultdict(list)
+    column_of = {layer: n for n, layer in enumerate(sorted(set(cluster_layer.values())))}
+    for c, layer in cluster_layer.items():
+        columns[column_of[layer]].append(c)
+    cluster_rows = _order_columns(columns, cluster_predecessors, lambda c: names[c])
+
+    clusters = []
+    details = {}
+    for c, name in enumerate(names):
+        nodes = members[c]
+        local_columns = defaultdict(list)
+        local_column_of = {layer: n for n, layer in enumerate(sorted({layers[i] for i in nodes}))}
+        for i in nodes:
+            local_columns[local_column_of[layers[i]]].append(i)
+        rows = _order_columns(local_columns, predecessors, lambda i: graph.titles[i])
+
+        counts = Counter(
+            'locked' if graph.locked[i] and graph.status[i] == TODO else STATUS_NAMES[graph.status[i]]
+            for i in nodes
+        )
+        clusters.append({
+            'index': c,
+            'name': name,
+            'column': column_of[cluster_layer[c]],
+            'row': cluster_rows[c],
+            'size': len(nodes),
+            'counts': {status: counts.get(status, 0) for status in ('done', 'in_progress', 'todo', 'locked')},
+        })
+        details[c] = {
+            'index': c,
+            'name': name,
+            'columns': len(local_columns),
+            'rows': max(len(items) for items in local_columns.values()),
+            'nodes': [
+                {
+                    'id': graph.ids[i],
+                    'title': graph.titles[i],
+                    'slug': graph.slugs[i],
+                    'status': STATUS_NAMES[graph.status[i]],
+                    'locked': bool(graph.locked[i]),
+                    'column': local_column_of[layers[i]],
+                    'row': rows[i],
+                }
+                for i in nodes
+            ],
+            'edges': [[graph.ids[j], graph.ids[i], dependency_type] for j, i, dependency_type in inner_edges[c]],
+        }
+
+    return {
+        'clusters': clusters,
+        'edges': [[source, target, count] for (source, target), count in sorted(outer_edges.items())],
+        'columns': len(columns),
+        'rows': max((len(items) for items in columns.values()), default=0),
+        'details': details,
+    }
+
+
+def get_overview(user, version):
+    key = f'overview:{GRAPH_FORMAT}:{user.pk}:{version}'
+    overview = cache.get(key)
+    if overview is None:
+        overview = compute_overview(get_skill_graph(user, version))
+        cache.set(key, overview, GRAPH_CACHE_TIMEOUT)
+    return overview
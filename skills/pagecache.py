@@ -0,0 +1,82 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .models import Skill
+
+LANDING_CACHE_TIMEOUT = getattr(settings, 'LANDING_CACHE_TIMEOUT', 60 * 60)
+SKILL_CARD_CACHE_TIMEOUT = getattr(settings, 'SKILL_CARD_CACHE_TIMEOUT', 60 * 60 * 24)
+
+LANDING_CACHE_KEY = 'page:landing'
+CARD_GENERATION_KEY = 'skill_card:generation'
+
+# Skill cards are cached one by one, keyed on the card generation, the skill's
+# updated_at, the viewer's status and lock and the prerequisite/unlock lines
+# (other skills can change those). A list page is one get_many plus renders of
+# the cards that changed.
+
+
+def landing_page(request):
+    # the anonymous landing page is the same for everyone unless a message is queued
+    if len(get_messages(request)):
+        return HttpResponse(render_to_string('landing.html', request=request))
+
+    html = cache.get(LANDING_CACHE_KEY)
+    if html is None:
+        html = render_to_string('landing.html', request=request)
+        cache.set(LANDING_CACHE_KEY, html, LANDING_CACHE_TIMEOUT)
+    return HttpResponse(html)
+
+
+def invalidate_landing_page():
+    cache.delete(LANDING_CACHE_KEY)
+
+
+def card_generation():
+    generation = cache.get(CARD_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache.set(CARD_GENERATION_KEY, generation, None)
+    return generation
+
+
+def card_key(skill, generation):
+    # run after SkillGraph.annotate()
+    parts = (generation, skill.updated_at.timestamp(), skill.my_status, skill.is_locked,
+             skill.prerequisites, skill.unlocks)
+    return f"skill_card:{skill.id}:{hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()}"
+
+
+def render_skill_cards(skills, user):
+    generation = card_generation()
+    keys = {skill.id: card_key(skill, generation) for skill in skills}
+    cached = cache.get_many(keys.values())
+
+    template = get_template('skills/skill_card.html')
+    rendered = {}
+    for skill in skills:
+        html = cached.get(keys[skill.id])
+        if html is None:
+            # cards do not need the request context processors, only the viewer
+            html = rendered[keys[skill.id]] = template.render({'skill': skill, 'user': user})
+        skill.card_html = mark_safe(html)
+
+    if rendered:
+        cache.set_many(rendered, SKILL_CARD_CACHE_TIMEOUT)
+    return skills
+
+
+def invalidate_skill_cards(skill_ids=None):
+    # queryset.update() and bulk_update() skip auto_now, so bulk paths that change
+    # what a card shows call this; without ids every card is dropped
+    if skill_ids is None:
+        cache.set(CARD_GENERATION_KEY, uuid.uuid4().hex, None)
+        return 0
+    return Skill.objects.filter(id__in=skill_ids).update(updated_at=timezone.now())
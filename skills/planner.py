@@ -0,0 +1,80 @@
+import heapq
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+
+from .gamification import XP_PER_DIFFICULTY
+from .graph import DONE, STATUS_NAMES, get_graph_version, get_skill_graph
+from .lru import LRUCache
+
+PlanStep = namedtuple('PlanStep', ['id', 'title', 'slug', 'difficulty', 'status'])
+LearningPath = namedtuple('LearningPath', ['steps', 'total_difficulty', 'total_xp', 'version'])
+
+# plans are tiny, keep them per process keyed by the graph version they were built from
+LEARNING_PATH_CACHE_SIZE = getattr(settings, 'LEARNING_PATH_CACHE_SIZE', 2048)
+
+learning_path_cache = LRUCache(LEARNING_PATH_CACHE_SIZE)
+
+
+def _prerequisites(graph, i, include_soft):
+    yield from graph.hard_idx[graph.hard_ptr[i]:graph.hard_ptr[i + 1]]
+    if include_soft:
+        yield from graph.soft_idx[graph.soft_ptr[i]:graph.soft_ptr[i + 1]]
+
+
+def plan_steps(graph, skill_id, include_soft=False):
+    # unfinished prerequisites of the target, prerequisites first; among skills
+    # that are ready at the same time the easier one goes first
+    target = graph.index.get(skill_id)
+    if target is None:
+        return []
+
+    needed = {target} if graph.status[target] != DONE else set()
+    stack = [target]
+    while stack:
+        i = stack.pop()
+        for j in _prerequisites(graph, i, include_soft):
+            if graph.status[j] != DONE and j not in needed:
+                needed.add(j)
+                stack.append(j)
+
+    pending = dict.fromkeys(needed, 0)
+    dependents = defaultdict(list)
+    for i in needed:
+        for j in _prerequisites(graph, i, include_soft):
+            if j in needed:
+                pending[i] += 1
+                dependents[j].append(i)
+
+    ready = [(graph.difficulties[i], i) for i in needed if not pending[i]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.append(i)
+        for k in dependents[i]:
+            pending[k] -= 1
+            if not pending[k]:
+                heapq.heappush(ready, (graph.difficulties[k], k))
+
+    # skills stuck on a cycle from before cycle checks existed still have to be learned
+    placed = set(order)
+    order += sorted(needed - placed, key=lambda i: (graph.difficulties[i], i))
+
+    return [
+        PlanStep(graph.ids[i], graph.titles[i], graph.slugs[i], graph.difficulties[i], STATUS_NAMES[graph.status[i]])
+        for i in order
+    ]
+
+
+def get_learning_path(user, skill_id, include_soft=False):
+    version, _ = get_graph_version(user)
+    key = (user.pk, version, skill_id, include_soft)
+
+    path = learning_path_cache.get(key)
+    if path is None:
+        steps = plan_steps(get_skill_graph(user, version), skill_id, include_soft)
+        total_difficulty = sum(step.difficulty for step in steps)
+        path = LearningPath(steps, total_difficulty, total_difficulty * XP_PER_DIFFICULTY, version)
+        learning_path_cache.set(key, path)
+    return path
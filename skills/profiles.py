@@ -0,0 +1,28 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+
+from .models import Profile
+
+
+def get_profile(user):
+    # users from before Profile existed get theirs the first time it is needed
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
+
+
+class ProfileBackend(ModelBackend):
+    # request.user comes with its profile: base.html reads dark_mode and the
+    # avatar on every page, and this saves that query
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        if not self.user_can_authenticate(user):
+            return None
+        get_profile(user)
+        return user
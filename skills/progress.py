@@ -0,0 +1,136 @@
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .activity import record_transitions
+from .categories import add_done_counts
+from .diagrams import invalidate_skill_diagrams
+from .gamification import XP_PER_DIFFICULTY, add_xp
+from .graph import DONE, STATUS_CODES, STATUS_NAMES, bump_graph_version, get_graph_version, get_skill_graph
+from .models import UserSkillProgress
+
+# most (skill, status) pairs one bulk request may carry
+PROGRESS_BATCH_LIMIT = getattr(settings, 'PROGRESS_BATCH_LIMIT', 500)
+
+SkillState = namedtuple('SkillState', ['id', 'slug', 'status', 'locked'])
+TransitionResult = namedtuple('TransitionResult', ['changed', 'downstream', 'xp_delta', 'version'])
+
+# started_at survives in_progress -> done, both stamps go on the way back to todo;
+# the DailyActivity credit is set with finished_at and cleared with it
+UPSERT_SQL = """
+INSERT INTO {progress} (user_id, skill_id, status, started_at, finished_at, credited_category, credited_xp)
+SELECT %(user)s, t.skill_id, t.status,
+       CASE WHEN t.status <> 'todo' THEN %(now)s END, CASE WHEN t.status = 'done' THEN %(now)s END,
+       CASE WHEN t.status = 'done' THEN t.category END, CASE WHEN t.status = 'done' THEN t.xp END
+FROM unnest(%(skills)s::bigint[], %(statuses)s::varchar[], %(categories)s::varchar[], %(xp)s::int[])
+     AS t(skill_id, status, category, xp)
+ON CONFLICT (user_id, skill_id) DO UPDATE SET
+    status = EXCLUDED.status,
+    started_at = CASE WHEN EXCLUDED.status = 'todo' THEN NULL
+                      ELSE COALESCE({progress}.started_at, EXCLUDED.started_at) END,
+    finished_at = EXCLUDED.finished_at,
+    credited_category = EXCLUDED.credited_category,
+    credited_xp = EXCLUDED.credited_xp
+"""
+
+
+class TransitionError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+def _hard_prerequisites(graph, i):
+    return graph.hard_idx[graph.hard_ptr[i]:graph.hard_ptr[i + 1]]
+
+
+def _hard_dependents(graph, i):
+    for k in graph.unlock_idx[graph.unlock_ptr[i]:graph.unlock_ptr[i + 1]]:
+        if i in _hard_prerequisites(graph, k):
+            yield k
+
+
+def plan_transitions(graph, transitions):
+    # transitions: {skill_id: status}. The batch is checked as a whole, so a
+    # prerequisite and the skill needing it can be finished in one request.
+    errors = []
+    status = {}
+    for skill_id, new_status in transitions.items():
+        i = graph.index.get(skill_id)
+        if i is None or i >= graph.own_count:
+            errors.append(f"Навичку {skill_id} не знайдено")
+        elif not isinstance(new_status, str) or new_status not in STATUS_CODES:
+            errors.append(f"Некоректний статус для '{graph.titles[i]}': {new_status!r}")
+        elif STATUS_CODES[new_status] != graph.status[i]:
+            status[i] = STATUS_CODES[new_status]
+    if errors:
+        raise TransitionError(errors)
+
+    def final(j):
+        return status.get(j, graph.status[j])
+
+    # starting or finishing needs every hard prerequisite done; going back never does
+    for i, code in status.items():
+        if code == STATUS_CODES['todo']:
+            continue
+        missing = [graph.titles[j] for j in _hard_prerequisites(graph, i) if final(j) != DONE]
+        if missing:
+            errors.append(f"'{graph.titles[i]}' заблокована, спершу завершіть: {', '.join(missing)}")
+    if errors:
+        raise TransitionError(errors)
+
+    def state(j):
+        locked = any(final(p) != DONE for p in _hard_prerequisites(graph, j))
+        return SkillState(graph.ids[j], graph.slugs[j], STATUS_NAMES[final(j)], locked)
+
+    changed = [state(i) for i in sorted(status)]
+    downstream = sorted({k for i in status for k in _hard_dependents(graph, i)} - set(status))
+    xp_delta = sum(
+        ((code == DONE) - (graph.status[i] == DONE)) * graph.difficulties[i] * XP_PER_DIFFICULTY
+        for i, code in status.items()
+    )
+    finished_delta = sum((code == DONE) - (graph.status[i] == DONE) for i, code in status.items())
+    return changed, [state(k) for k in downstream if k < graph.own_count], xp_delta, finished_delta
+
+
+def apply_transitions(user, transitions):
+    if len(transitions) > PROGRESS_BATCH_LIMIT:
+        raise TransitionError([f"Не більше {PROGRESS_BATCH_LIMIT} змін за раз"])
+
+    with transaction.atomic():
+        # one writer per user: the lock checks below read the graph this transaction changes
+        User.objects.select_for_update().filter(pk=user.pk).exists()
+        version, _ = get_graph_version(user)
+        graph = get_skill_graph(user, version)
+
+        changed, downstream, xp_delta, finished_delta = plan_transitions(graph, transitions)
+        if not changed:
+            return TransitionResult([], [], 0, version)
+
+        now = timezone.now()
+        record_transitions(user.pk, graph, changed, now)
+        with connection.cursor() as cursor:
+            cursor.execute(UPSERT_SQL.format(progress=UserSkillProgress._meta.db_table), {
+                'user': user.pk,
+                'now': now,
+                'skills': [state.id for state in changed],
+                'statuses': [state.status for state in changed],
+                'categories': [graph.categories[graph.index[state.id]] for state in changed],
+                'xp': [graph.difficulties[graph.index[state.id]] * XP_PER_DIFFICULTY for state in changed],
+            })
+
+        # raw SQL skips the progress signals, do their work here
+        if xp_delta or finished_delta:
+            add_xp(user.pk, xp_delta, finished_delta)
+        finished = Counter()
+        for state in changed:
+            i = graph.index[state.id]
+            finished[graph.categories[i]] += (state.status == 'done') - (graph.status[i] == DONE)
+        add_done_counts(user.pk, finished)
+        bump_graph_version(user.pk)
+        invalidate_skill_diagrams([state.id for state in changed])
+
+    return TransitionResult(changed, downstream, xp_delta, version + 1)
@@ -0,0 +1,57 @@
+import hashlib
+import threading
+
+import markdown as md
+from django.conf import settings
+from django.core.cache import caches
+
+from .lru import LRUCache
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'nl2br']
+# bump when the extensions or their options change
+MARKDOWN_RENDER_VERSION = 1
+
+MARKDOWN_LRU_SIZE = getattr(settings, 'MARKDOWN_LRU_SIZE', 1024)
+# optional shared tier, e.g. 'default'; None keeps rendering cache per process
+MARKDOWN_CACHE_ALIAS = getattr(settings, 'MARKDOWN_CACHE_ALIAS', None)
+MARKDOWN_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+markdown_lru = LRUCache(MARKDOWN_LRU_SIZE)
+
+# building a Markdown instance costs more than converting a short text;
+# instances are not thread-safe, so keep one per thread and reset() it
+_local = threading.local()
+
+
+def _converter():
+    converter = getattr(_local, 'converter', None)
+    if converter is None:
+        converter = _local.converter = md.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return converter.reset()
+
+
+def content_key(text):
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    return f'md:{MARKDOWN_RENDER_VERSION}:{digest}'
+
+
+def render_markdown(text):
+    if not text:
+        return ""
+
+    key = content_key(text)
+    html = markdown_lru.get(key)
+    if html is not None:
+        return html
+
+    shared = caches[MARKDOWN_CACHE_ALIAS] if MARKDOWN_CACHE_ALIAS else None
+    if shared is not None:
+        html = shared.get(key)
+
+    if html is None:
+        html = _converter().convert(text)
+        if shared is not None:
+            shared.set(key, html, MARKDOWN_CACHE_TIMEOUT)
+
+    markdown_lru.set(key, html)
+    return html
@@ -0,0 +1,94 @@
+import copy
+import re
+import threading
+import unicodedata
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .ai_service import generate_roadmap
+from .lru import LRUCache
+from .roadmaps import RoadmapValidationError, validate_roadmap
+
+ROADMAP_CACHE_SIZE = getattr(settings, 'ROADMAP_CACHE_SIZE', 256)
+ROADMAP_CACHE_TTL = getattr(settings, 'ROADMAP_CACHE_TTL', 60 * 60 * 24)
+
+CYRILLIC_RE = re.compile(r'[\u0400-\u04FF]')
+
+
+def normalize_topic(topic):
+    topic = unicodedata.normalize('NFKC', topic or '')
+    return ' '.join(topic.split()).casefold()
+
+
+def topic_language(topic):
+    # generate_roadmap answers in the topic's language, so it is part of the key
+    return 'uk' if CYRILLIC_RE.search(topic) else 'en'
+
+
+def is_cacheable(data):
+    try:
+        validate_roadmap(data)
+    except RoadmapValidationError:
+        return False
+    return True
+
+
+class RoadmapCache:
+    def __init__(self, maxsize, ttl):
+        self.lru = LRUCache(maxsize, ttl)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.coalesced = 0
+
+    def key(self, topic):
+        normalized = normalize_topic(topic)
+        return normalized, topic_language(normalized)
+
+    def get_or_generate(self, topic, generate=generate_roadmap):
+        key = self.key(topic)
+
+        data = self.lru.get(key)
+        if data is not None:
+            return copy.deepcopy(data)
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self.in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            data = future.result()
+            return copy.deepcopy(data) if data is not None else None
+
+        try:
+            data = generate(topic)
+            # failed or invalid generations are not cached, the next request retries
+            if data is not None and is_cacheable(data):
+                self.lru.set(key, data)
+            future.set_result(data)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+        return copy.deepcopy(data) if data is not None else None
+
+    def stats(self):
+        stats = self.lru.stats()
+        with self.lock:
+            stats['coalesced'] = self.coalesced
+            stats['in_flight'] = len(self.in_flight)
+        return stats
+
+
+roadmap_cache = RoadmapCache(ROADMAP_CACHE_SIZE, ROADMAP_CACHE_TTL)
+
+
+def generate_roadmap_cached(topic):
+    return roadmap_cache.get_or_generate(topic)
@@ -0,0 +1,147 @@
+from collections import namedtuple
+
+from django.db import transaction
+
+from .categories import add_category_counts, assign_categories
+from .closure import add_new_skills_closure
+from .graph import bump_graph_version
+from .models import Skill, SkillDependency
+from .slugs import bulk_create_skills
+from .topology import order_new_skills, topological_sort
+
+RoadmapResult = namedtuple('RoadmapResult', ['skills', 'dependencies'])
+
+VALID_DIFFICULTIES = {value for value, _ in Skill.DIFFICULTY_CHOICES}
+VALID_DEPENDENCY_TYPES = {value for value, _ in SkillDependency.DEPENDENCY_TYPE}
+
+
+class RoadmapValidationError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+def ai_category(topic):
+    return f"🤖 AI: {topic}"[:Skill._meta.get_field('category').max_length]
+
+
+def validate_roadmap(data):
+    # returns (skills, dependencies) cleaned up, or raises with every problem found
+    errors = []
+
+    if not isinstance(data, dict):
+        raise RoadmapValidationError(["План має бути JSON-обʼєктом"])
+
+    items = data.get('skills')
+    if not isinstance(items, list) or not items:
+        raise RoadmapValidationError(["План не містить навичок"])
+
+    title_length = Skill._meta.get_field('title').max_length
+    skills = []
+    titles = set()
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(f"skills[{i}] не є обʼєктом")
+            continue
+
+        title = str(item.get('title') or '').strip()
+        difficulty = item.get('difficulty')
+
+        if not title:
+            errors.append(f"skills[{i}] без назви")
+        elif len(title) > title_length:
+            errors.append(f"skills[{i}]: назва довша за {title_length} символів")
+        elif title in titles:
+            errors.append(f"Назва повторюється: {title}")
+
+        # the type first: a list or dict from the model is unhashable and would raise in the set lookup
+        if not isinstance(difficulty, int) or isinstance(difficulty, bool) or difficulty not in VALID_DIFFICULTIES:
+            errors.append(f"Некоректна складність для '{title}': {difficulty!r}")
+
+        titles.add(title)
+        skills.append({
+            'title': title,
+            'difficulty': difficulty,
+            'description': str(item.get('description') or ''),
+        })
+
+    dependencies = []
+    seen_edges = set()
+    raw_dependencies = data.get('dependencies') or []
+    if not isinstance(raw_dependencies, list):
+        errors.append("dependencies має бути списком")
+        raw_dependencies = []
+    for i, dep in enumerate(raw_dependencies):
+        if not isinstance(dep, dict):
+            errors.append(f"dependencies[{i}] не є обʼєктом")
+            continue
+
+        parent = str(dep.get('from') or '').strip()
+        child = str(dep.get('to') or '').strip()
+        dependency_type = dep.get('type', 'hard')
+
+        for title in (parent, child):
+            if title not in titles:
+                errors.append(f"Залежність посилається на невідому навичку: {title!r}")
+        if parent == child:
+            errors.append(f"Навичка залежить сама від себе: {parent}")
+        if not isinstance(dependency_type, str) or dependency_type not in VALID_DEPENDENCY_TYPES:
+            errors.append(f"Некоректний тип залежності {dependency_type!r}: {parent} -> {child}")
+
+        # repeated edges are harmless, keep the first one
+        if (parent, child) in seen_edges:
+            continue
+        seen_edges.add((parent, child))
+        dependencies.append({'from': parent, 'to': child, 'type': dependency_type})
+
+    if not errors:
+        _, cyclic = topological_sort(
+            [skill['title'] for skill in skills],
+            [(dep['from'], dep['to']) for dep in dependencies],
+        )
+        if cyclic:
+            errors.append(f"Залежності утворюють цикл: {', '.join(cyclic)}")
+
+    if errors:
+        raise RoadmapValidationError(errors)
+
+    return skills, dependencies
+
+
+def materialize_roadmap(user, data, category):
+    skills_data, dependencies_data = validate_roadmap(data)
+
+    skills = []
+    for item in skills_data:
+        skill = Skill(
+            title=item['title'],
+            category=category,
+            difficulty=item['difficulty'],
+            description=item['description'],
+            video_url="",
+            author=user,
+        )
+        skill.render_description()
+        skills.append(skill)
+
+    with transaction.atomic():
+        bulk_create_skills(assign_categories(skills))
+        # validate_roadmap never returns an empty plan, and every skill shares the category
+        add_category_counts(skills[0].category_ref_id, len(skills))
+
+        by_title = {skill.title: skill for skill in skills}
+        dependencies = SkillDependency.objects.bulk_create([
+            SkillDependency(
+                from_skill=by_title[dep['from']],
+                to_skill=by_title[dep['to']],
+                dependency_type=dep['type'],
+            )
+            for dep in dependencies_data
+        ])
+        order_new_skills(skills, dependencies)
+        add_new_skills_closure(skills, dependencies)
+
+        # bulk_create sends no post_save signals
+        bump_graph_version(user.id)
+
+    return RoadmapResult(skills, dependencies)
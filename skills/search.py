@@ -0,0 +1,40 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+# D, C, B, A as set by the search_vector trigger: description C, category B, title A
+SEARCH_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_query(text):
+    # English gets stemming; Ukrainian words are stored unstemmed, so match
+    # them by prefix ("навич" finds "навички" and "навичок")
+    query = SearchQuery(text, config='english', search_type='websearch')
+
+    words = WORD_RE.findall(text.lower())
+    if words:
+        prefixes = ' & '.join(f'{word}:*' for word in words)
+        query |= SearchQuery(prefixes, config='simple', search_type='raw')
+
+    return query
+
+
+def search_skills(queryset, text):
+    text = text.strip()
+    if not text:
+        return queryset
+
+    query = build_search_query(text)
+
+    return queryset.annotate(
+        search_rank=Greatest(
+            SearchRank(F('search_vector'), query, weights=SEARCH_WEIGHTS),
+            TrigramSimilarity('title', text),
+        )
+    ).filter(
+        Q(search_vector=query) | Q(title__trigram_similar=text)
+    )
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from .models import Profile, Skill, SkillDependency, UserSkillProgress, UserXP
+from .graph import bump_graph_version
+from .closure import add_edge, is_closure_edge, rebuild_author_closure, remove_edge, remove_skill
+from .diagrams import invalidate_skill_diagrams
+from .categories import add_category_counts, is_done_by_author
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -9,5 +14,89 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+def create_xp_ledger(sender, instance, created, **kwargs):
+    if created:
+        UserXP.objects.create(user=instance)
+
+
+def is_cascade(instance, origin):
+    # deletes cascading from a Skill/User are handled by the origin's own signal
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not type(instance)
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def skill_graph_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        bump_graph_version(instance.author_id)
+
+@receiver(post_save, sender=SkillDependency)
+@receiver(post_delete, sender=SkillDependency)
+def dependency_graph_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        bump_graph_version(instance.to_skill.author_id)
+
+@receiver(post_save, sender=UserSkillProgress)
+@receiver(post_delete, sender=UserSkillProgress)
+def progress_graph_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        bump_graph_version(instance.user_id)
+
+@receiver(pre_delete, sender=Skill)
+def skill_closure_removed(sender, instance, origin=None, **kwargs):
+    # dependencies deleted along with the skill are covered here, see closure_edge_removed
+    if not is_cascade(instance, origin):
+        remove_skill(instance.id)
+
+@receiver(post_save, sender=SkillDependency)
+def closure_edge_saved(sender, instance, created, **kwargs):
+    if created:
+        if is_closure_edge(instance):
+            add_edge(instance.from_skill_id, instance.to_skill_id, instance.dependency_type)
+    else:
+        # an edited edge (admin) has lost its old endpoints/type, recount the author
+        rebuild_author_closure(instance.to_skill.author_id)
+
+@receiver(post_delete, sender=SkillDependency)
+def closure_edge_removed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin) and is_closure_edge(instance):
+        remove_edge(instance.from_skill_id, instance.to_skill_id, instance.dependency_type)
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def skill_diagrams_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        invalidate_skill_diagrams([instance.id])
+
+@receiver(post_save, sender=SkillDependency)
+@receiver(post_delete, sender=SkillDependency)
+def dependency_diagrams_changed(sender, instance, origin=None, **kwargs):
+    # any diagram the edge changes already shows one of its ends
+    if not is_cascade(instance, origin):
+        invalidate_skill_diagrams([instance.from_skill_id, instance.to_skill_id])
+
+@receiver(post_save, sender=UserSkillProgress)
+@receiver(post_delete, sender=UserSkillProgress)
+def progress_diagrams_changed(sender, instance, origin=None, **kwargs):
+    if not is_cascade(instance, origin):
+        invalidate_skill_diagrams([instance.skill_id])
+
+@receiver(post_save, sender=Skill)
+def skill_category_counted(sender, instance, created, **kwargs):
+    if created:
+        add_category_counts(instance.category_ref_id, skills=1)
+    elif getattr(instance, '_category_moved', None):
+        # set by Skill.resolve_category() when the name changed
+        old_id, new_id = instance._category_moved
+        done = int(is_done_by_author(instance))
+        add_category_counts(old_id, -1, -done)
+        add_category_counts(new_id, 1, done)
+        instance._category_moved = None
+
+@receiver(pre_delete, sender=Skill)
+def skill_category_uncounted(sender, instance, origin=None, **kwargs):
+    # before the delete, while the author's progress row still exists
+    if not is_cascade(instance, origin):
+        add_category_counts(instance.category_ref_id, -1, -int(is_done_by_author(instance)))
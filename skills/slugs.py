@@ -0,0 +1,67 @@
+import secrets
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from .models import Skill
+
+# Slugs are "<title>-<author id>", with a random token appended when that is
+# taken. Nothing is counted or checked up front: the unique index on Skill.slug
+# decides, and an insert that loses is retried in a savepoint with new tokens.
+SLUG_ATTEMPTS = getattr(settings, 'SLUG_ATTEMPTS', 5)
+SLUG_BASE_LENGTH = 50
+SLUG_TOKEN_BYTES = 3
+
+SLUG_CONSTRAINTS = {'skills_skill_slug_key'}
+
+
+def base_slug(title, author_id):
+    return f"{slugify(title[:SLUG_BASE_LENGTH]) or 'skill'}-{author_id}"
+
+
+def with_token(slug):
+    # room for "-" and the token within the column
+    limit = Skill._meta.get_field('slug').max_length - SLUG_TOKEN_BYTES * 2 - 1
+    return f"{slug[:limit]}-{secrets.token_hex(SLUG_TOKEN_BYTES)}"
+
+
+def skill_slug(skill, attempt=1):
+    # attempt 0 goes for the plain slug, later ones never collide in practice
+    slug = base_slug(skill.title, skill.author_id)
+    return slug if attempt == 0 else with_token(slug)
+
+
+def is_slug_conflict(exc):
+    diag = getattr(exc.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) in SLUG_CONSTRAINTS
+
+
+def retry_slug_conflicts(insert, attempts=SLUG_ATTEMPTS):
+    # insert(attempt) runs in a savepoint and has to pick new slugs on every call
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return insert(attempt)
+        except IntegrityError as exc:
+            if not is_slug_conflict(exc) or attempt == attempts - 1:
+                raise
+
+
+def create_skill(skill):
+    def insert(attempt):
+        skill.slug = skill_slug(skill, attempt)
+        skill.save(force_insert=True)
+        return skill
+
+    return retry_slug_conflicts(insert)
+
+
+def bulk_create_skills(skills, batch_size=None):
+    # tokens from the first attempt: a conflict redoes the whole batch
+    def insert(attempt):
+        for skill in skills:
+            skill.slug = skill_slug(skill)
+        return Skill.objects.bulk_create(skills, batch_size=batch_size)
+
+    return retry_slug_conflicts(insert)
@@ -1,6 +1,6 @@
 from django import template
 from django.utils.safestring import mark_safe
-import markdown as md
+from skills.rendering import render_markdown
 
 register = template.Library()
 
@@ -9,6 +9,6 @@ def markdown_format(text):
     if not text:
         return ""
 
-    html = md.markdown(text, extensions=['fenced_code', 'nl2br'])
+    html = render_markdown(text)
 
-    return mark_safe(html)
\ No newline at end of file
+    return mark_safe(html)
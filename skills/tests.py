@@ -1,3 +1,1476 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import instrumentation
+from .activity import _streaks, activity_summary, rebuild_activity
+from .benchmarks import bench_users, benchmark_report, dataset_size, seed_dataset
+from .categories import rebuild_category_counts
+from .instrumentation import fingerprint, record_queries, view_metrics
+from .jobs import ROADMAP_JOB_TIMEOUT, fail_stale_jobs, run_job
+from .leaderboard import SNAPSHOT_CACHE_KEY, make_cursor, parse_cursor, public_ledger
+from .closure import rebuild_author_closure, unfinished_prerequisites, verify_closure
+from .diagrams import get_skill_mermaid
+from .graph import SkillGraph, compile_skill_graph, get_graph_version, get_skill_graph, load_skill_subgraph
+from .gamification import XP_PER_DIFFICULTY, verify_xp_ledger
+from .models import (
+    Category, DailyActivity, Profile, RoadmapJob, Skill, SkillClosure, SkillDependency, UserSkillProgress, UserXP,
+)
+from .overview import compute_overview, get_overview, node_layers
+from .pagecache import LANDING_CACHE_KEY, invalidate_skill_cards
+from .planner import get_learning_path, learning_path_cache, plan_steps
+from .rendering import content_key, markdown_lru, render_markdown
+from .roadmap_cache import RoadmapCache, is_cacheable
+from .roadmaps import RoadmapValidationError, validate_roadmap
+from .search import search_skills
+from .slugs import create_skill, retry_slug_conflicts
+from .topology import DependencyCycleError, add_dependency, reorder_author
+from .transfer import SkillImporter, TransferError, read_ndjson
+from .urls import urlpatterns
+
+
+# Upper bounds on SQL queries per view, session and auth lookups included.
+# A view that starts issuing a query per row goes over its budget as soon as the
+# fixture has a few rows, so a budget change should always be a conscious one.
+QUERY_BUDGETS = {
+    'skill_list': 8,
+    'skill_create': 2,
+    'skill_detail': 8,
+    'skill_plan': 4,
+    'skill_edit': 3,
+    'skill_delete': 3,
+    'change_status': 10,
+    'progress_bulk': 13,
+    'add_dependency': 4,
+    'remove_dependency': 4,
+    'register': 1,
+    'profile': 7,
+    'profile_edit': 2,
+    'leaderboard': 5,
+    'ai_generator': 2,
+    'ai_job': 4,
+    'ai_job_status': 3,
+    'ai_cache_stats': 2,
+    'roadmap_overview': 2,
+    'overview_json': 6,
+    'overview_cluster_json': 3,
+    'skill_graph_json': 4,
+    'skill_mermaid': 4,
+    'diagram_cache_stats': 2,
+    'category_graph_json': 3,
+    'category_delete': 14,
+    'metrics': 2,
+    'settings': 2,
+    'feedback': 2,
+}
+
+# the same statement this many times in one request is an N+1, whatever the budget
+DUPLICATE_LIMIT = 3
+
+# indexes the hot paths below are expected to be planned on
+PLANNED_INDEXES = {
+    'skill_author_topo_idx', 'skill_author_order_idx', 'progress_user_status_idx', 'progress_done_idx',
+    'dependency_to_type_idx', 'category_author_name_uniq', 'daily_activity_uniq', 'skill_closure_descendant_idx', 'userxp_leaderboard_idx',
+}
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='secret', is_staff=True)
+        skills = [
+            Skill.objects.create(title=f"Навичка {i}", slug=f"skill-{i}", category="Python" if i < 4 else "Django",
+                                 difficulty=i % 3 + 1, author=cls.user)
+            for i in range(8)
+        ]
+        for parent, child in zip(skills, skills[1:]):
+            SkillDependency.objects.create(from_skill=parent, to_skill=child)
+        SkillDependency.objects.create(from_skill=skills[0], to_skill=skills[5], dependency_type='soft')
+        for skill in skills[:3]:
+            UserSkillProgress.objects.create(user=cls.user, skill=skill, status='done')
+        UserSkillProgress.objects.create(user=cls.user, skill=skills[3], status='in_progress')
+
+        cls.skill = skills[4]
+        cls.dependency = SkillDependency.objects.get(to_skill=cls.skill)
+        # category_delete really deletes, so it gets a category of its own
+        cls.archive = Skill.objects.create(title="Стара нотатка", slug="old-note", category="Архів",
+                                           author=cls.user).category_ref
+        cls.job = RoadmapJob.objects.create(user=cls.user, topic="Python", status='done')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def requests(self):
+        slug = {'skill_slug': self.skill.slug}
+        return [
+            ('skill_list', {}, 'get', None),
+            ('skill_create', {}, 'get', None),
+            ('skill_detail', slug, 'get', None),
+            ('skill_plan', slug, 'get', None),
+            ('skill_edit', slug, 'get', None),
+            ('skill_delete', slug, 'get', None),
+            ('change_status', {'skill_slug': 'skill-3', 'new_status': 'done'}, 'get', None),
+            ('progress_bulk', {}, 'post', json.dumps({'transitions': [
+                {'skill': self.skill.slug, 'status': 'done'}, {'skill': 'skill-5', 'status': 'in_progress'},
+            ]})),
+            ('add_dependency', slug, 'get', None),
+            ('remove_dependency', {**slug, 'dependency_id': self.dependency.id}, 'get', None),
+            ('profile', {}, 'get', None),
+            ('profile_edit', {}, 'get', None),
+            ('leaderboard', {}, 'get', None),
+            ('ai_generator', {}, 'get', None),
+            ('ai_job', {'job_id': self.job.id}, 'get', None),
+            ('ai_job_status', {'job_id': self.job.id}, 'get', None),
+            ('ai_cache_stats', {}, 'get', None),
+            ('roadmap_overview', {}, 'get', None),
+            ('overview_json', {}, 'get', None),
+            ('overview_cluster_json', {'cluster_index': 0}, 'get', None),
+            ('skill_graph_json', slug, 'get', None),
+            ('skill_mermaid', slug, 'get', None),
+            ('diagram_cache_stats', {}, 'get', None),
+            ('category_graph_json', {'category_name': 'Python'}, 'get', None),
+            ('category_delete', {'category_id': self.archive.id}, 'post', None),
+            ('metrics', {}, 'get', None),
+            ('settings', {}, 'get', None),
+            ('feedback', {}, 'get', None),
+        ]
+
+    def measure(self, name, kwargs, method, body=None):
+        with record_queries() as recorder:
+            if body is None:
+                response = getattr(self.client, method)(reverse(name, kwargs=kwargs))
+            else:
+                response = getattr(self.client, method)(reverse(name, kwargs=kwargs), body, content_type='application/json')
+        self.assertLess(response.status_code, 400, name)
+        return recorder
+
+    def test_views_stay_within_query_budget(self):
+        for name, kwargs, method, body in self.requests():
+            with self.subTest(view=name):
+                recorder = self.measure(name, kwargs, method, body)
+                self.assertLessEqual(recorder.count, QUERY_BUDGETS[name],
+                                     f"{name}: {recorder.count} queries\n" + "\n".join(recorder.fingerprints))
+                self.assertEqual(recorder.duplicates(DUPLICATE_LIMIT), {}, name)
+
+    def test_register_within_query_budget(self):
+        self.client.logout()
+        with record_queries() as recorder:
+            self.client.get(reverse('register'))
+        self.assertLessEqual(recorder.count, QUERY_BUDGETS['register'])
+
+    def test_every_view_has_a_budget(self):
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(names - set(QUERY_BUDGETS), set())
+        self.assertEqual(names, {name for name, *_ in self.requests()} | {'register'})
+
+    def test_detail_does_not_grow_with_prerequisites(self):
+        # one more unfinished prerequisite must not mean one more query
+        baseline = self.measure('skill_detail', {'skill_slug': self.skill.slug}, 'get').count
+        extra = Skill.objects.create(title="Ще одна", slug="extra", category="Python", author=self.user)
+        SkillDependency.objects.create(from_skill=extra, to_skill=self.skill, dependency_type='soft')
+        self.assertEqual(self.measure('skill_detail', {'skill_slug': self.skill.slug}, 'get').count, baseline)
+
+
+class InstrumentationTests(TestCase):
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(fingerprint('SELECT 1 WHERE id IN (%s, %s, %s)'), fingerprint('SELECT 1 WHERE id IN (%s, %s)'))
+
+    def test_metrics_requires_staff_or_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        with override_settings(METRICS_TOKEN='scrape'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('aurora_view_queries_bucket', response.content.decode())
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer nope').status_code, 403)
+
+    def test_slow_requests_are_counted(self):
+        user = User.objects.create_user('slow', password='secret')
+        self.client.force_login(user)
+        before = view_metrics.warnings['skill_list']
+        old = instrumentation.QUERY_COUNT_WARNING
+        instrumentation.QUERY_COUNT_WARNING = 1
+        try:
+            with self.assertLogs('skills.instrumentation', 'WARNING'):
+                self.client.get(reverse('skill_list'))
+        finally:
+            instrumentation.QUERY_COUNT_WARNING = old
+        after = view_metrics.warnings['skill_list']
+        self.assertEqual(after, before + 1)
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_seeded_dataset_is_consistent(self):
+        created = seed_dataset(users=2, skills=40, prefix='bench-test')
+        self.assertEqual(created, dataset_size('bench-test'))
+        self.assertEqual(verify_closure(), [])
+        # progress never skips a hard prerequisite
+        done = set(UserSkillProgress.objects.filter(status='done').values_list('skill_id', flat=True))
+        for parent, child in SkillDependency.objects.filter(dependency_type='hard').values_list('from_skill', 'to_skill'):
+            if child in done:
+                self.assertIn(parent, done)
+
+        report = benchmark_report(repeat=1, warmup=0, prefix='bench-test', sample_users=1)
+        self.assertEqual(report['dataset']['skills'], 80)
+        for name in ('skill_list', 'skill_detail', 'leaderboard', 'user_profile', 'ai_generator', 'ai_generator_job'):
+            self.assertIn(name, report['views'])
+        self.assertEqual(report['views']['ai_generator_job']['statuses'], ['done'])
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cards', password='secret')
+        self.basics = Skill.objects.create(title="Основи", slug="basics", category="Python", author=self.user)
+        self.advanced = Skill.objects.create(title="Поглиблено", slug="advanced", category="Python", author=self.user)
+        SkillDependency.objects.create(from_skill=self.basics, to_skill=self.advanced)
+        self.client.force_login(self.user)
+
+    def test_landing_page_is_cached(self):
+        self.client.logout()
+        cache.delete(LANDING_CACHE_KEY)
+        first = self.client.get(reverse('skill_list'))
+        self.assertEqual(cache.get(LANDING_CACHE_KEY), first.content.decode())
+        self.assertEqual(self.client.get(reverse('skill_list')).content, first.content)
+
+    def test_cards_follow_status_and_prerequisites(self):
+        self.assertContains(self.client.get(reverse('skill_list')), 'Закрито')
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+
+        # the cached locked card of the other skill must not come back
+        response = self.client.get(reverse('skill_list'))
+        self.assertNotContains(response, 'Закрито')
+        self.assertContains(response, reverse('change_status', args=['advanced', 'in_progress']))
+
+    def test_cards_follow_skill_edits(self):
+        self.client.get(reverse('skill_list'))
+        Skill.objects.filter(pk=self.basics.pk).update(title="Старт")
+        self.assertNotContains(self.client.get(reverse('skill_list')), 'Старт')
+
+        invalidate_skill_cards([self.basics.pk])
+        self.assertContains(self.client.get(reverse('skill_list')), 'Старт')
+
+
+class ProfileSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='secret')
+
+    def test_login_does_not_touch_profile(self):
+        with record_queries() as recorder:
+            self.assertTrue(self.client.login(username='owner', password='secret'))
+        self.assertFalse([sql for sql in recorder.fingerprints if 'skills_profile' in sql])
+
+    def test_profile_writes_only_changes(self):
+        profile = Profile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            profile.save()
+
+        profile.dark_mode = True
+        with record_queries() as recorder:
+            profile.save()
+        [sql] = recorder.fingerprints
+        self.assertIn('"dark_mode"', sql)
+        self.assertNotIn('"bio"', sql)
+
+    def test_missing_profile_is_created_on_first_request(self):
+        Profile.objects.filter(user=self.user).delete()
+        self.client.force_login(self.user)
+
+        self.assertEqual(self.client.get(reverse('settings')).status_code, 200)
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_sessions_from_before_profile_backend_stay_logged_in(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('settings'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_model_backend_session_without_profile(self):
+        Profile.objects.filter(user=self.user).delete()
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+        for name in ('leaderboard', 'profile_edit', 'settings'):
+            with self.subTest(view=name):
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_register_logs_in_with_profile_backend(self):
+        self.client.post(reverse('register'), {
+            'username': 'newcomer', 'password1': 'Aurora-2026-pass', 'password2': 'Aurora-2026-pass',
+        })
+        self.assertEqual(self.client.session['_auth_user_backend'], 'skills.profiles.ProfileBackend')
+
+    def test_user_without_profile_is_on_the_leaderboard(self):
+        Profile.objects.filter(user=self.user).delete()
+        self.assertTrue(public_ledger().filter(user=self.user).exists())
+
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.players = [User.objects.create_user(f'player-{i}', password='secret') for i in range(3)]
+        for i, player in enumerate(self.players):
+            UserXP.objects.filter(user=player).update(total_xp=(i + 1) * 100)
+        cache.delete(SNAPSHOT_CACHE_KEY)
+        self.client.force_login(self.players[0])
+
+    def test_forged_cursor_is_ignored(self):
+        entry = {'xp': 300, 'user_id': self.players[2].id, 'position': 1}
+        self.assertEqual(parse_cursor(make_cursor(entry)), (300, self.players[2].id, 1))
+
+        forged = make_cursor(entry).replace('.1:', '.1000:')
+        self.assertIsNone(parse_cursor(forged))
+        self.assertIsNone(parse_cursor(f"300.{self.players[2].id}.1000"))
+        response = self.client.get(reverse('leaderboard'), {'after': forged})
+        self.assertEqual([entry['position'] for entry in response.context['leaders']], [1, 2, 3])
+
+    def test_own_position_is_counted_once(self):
+        with record_queries() as recorder:
+            response = self.client.get(reverse('leaderboard'), {'me': 1})
+        self.assertEqual(response.context['my_position'], 3)
+        self.assertEqual(len([sql for sql in recorder.fingerprints if 'COUNT(' in sql]), 1)
+
+
+@override_settings(ROADMAP_INLINE_WORKER=False)
+class RoadmapJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dreamer', password='secret')
+        self.client.force_login(self.user)
+
+    def test_long_topic_is_rejected(self):
+        response = self.client.post(reverse('ai_generator'), {'topic': "x" * 300})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertContains(response, 'maxlength="255"')
+        self.assertFalse(RoadmapJob.objects.exists())
+
+        response = self.client.post(reverse('ai_generator'), {'topic': "  Rust  "})
+        self.assertRedirects(response, reverse('ai_job', args=[RoadmapJob.objects.get(topic="Rust").id]))
+
+    def test_abandoned_jobs_are_failed(self):
+        started = timezone.now() - timedelta(seconds=ROADMAP_JOB_TIMEOUT + 60)
+        abandoned = RoadmapJob.objects.create(user=self.user, topic="Go", status='running', started_at=started)
+        running = RoadmapJob.objects.create(user=self.user, topic="Zig", status='running', started_at=timezone.now())
+
+        self.assertEqual(fail_stale_jobs(), 1)
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, 'failed')
+        self.assertIsNotNone(abandoned.finished_at)
+        self.assertEqual(RoadmapJob.objects.get(pk=running.pk).status, 'running')
+
+    def test_lost_queued_jobs_are_failed(self):
+        # queued before a restart: the in-process executor that held them is gone
+        lost = RoadmapJob.objects.create(user=self.user, topic="Go")
+        polled = RoadmapJob.objects.create(user=self.user, topic="Elm")
+        waiting = RoadmapJob.objects.create(user=self.user, topic="Zig")
+        RoadmapJob.objects.filter(pk__in=[lost.pk, polled.pk]).update(
+            created_at=timezone.now() - timedelta(seconds=ROADMAP_JOB_TIMEOUT + 60)
+        )
+
+        status = self.client.get(reverse('ai_job_status', args=[polled.id])).json()
+        self.assertEqual((status['status'], status['is_finished']), ('failed', True))
+
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.assertEqual(RoadmapJob.objects.get(pk=lost.pk).status, 'failed')
+        self.assertEqual(RoadmapJob.objects.get(pk=waiting.pk).status, 'queued')
+
+    def test_invalid_roadmap_is_not_cached(self):
+        roadmap_cache = RoadmapCache(8, 60)
+        calls = []
+
+        def generate(topic):
+            calls.append(topic)
+            # the second skill depends on itself
+            return {'skills': [{'title': "A", 'difficulty': 1}, {'title': "B", 'difficulty': 2}],
+                    'dependencies': [{'from': "B", 'to': "B"}]}
+
+        for _ in range(2):
+            job = RoadmapJob.objects.create(user=self.user, topic="Loops")
+            job = run_job(job.id, generate=lambda topic: roadmap_cache.get_or_generate(topic, generate))
+            self.assertEqual(job.status, 'failed')
+        self.assertEqual(calls, ["Loops", "Loops"])
+        self.assertEqual(roadmap_cache.stats()['size'], 0)
+
+    def test_malformed_values_are_validation_errors(self):
+        skills = [{'title': "A", 'difficulty': 1}, {'title': "B", 'difficulty': 2}]
+        plans = [
+            {'skills': [{'title': "A", 'difficulty': [1]}]},
+            {'skills': [{'title': "A", 'difficulty': {'level': 1}}]},
+            {'skills': skills, 'dependencies': [{'from': "A", 'to': "B", 'type': ['hard']}]},
+            {'skills': skills, 'dependencies': 5},
+        ]
+        for plan in plans:
+            with self.subTest(plan=plan):
+                with self.assertRaises(RoadmapValidationError):
+                    validate_roadmap(plan)
+                self.assertFalse(is_cacheable(plan))
+
+
+class TopologyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('sorter', password='secret')
+        self.admin = User.objects.create_superuser('keeper', password='secret')
+        self.a, self.b, self.c, self.d = [
+            Skill.objects.create(title=title, slug=title.lower(), category="Python", author=self.user)
+            for title in ("A", "B", "C", "D")
+        ]
+
+    def link(self, parent, child, dependency_type='hard'):
+        return add_dependency(SkillDependency(from_skill=parent, to_skill=child, dependency_type=dependency_type))
+
+    def assert_sorted(self):
+        order = dict(Skill.objects.filter(author=self.user).values_list('id', 'topo_order'))
+        self.assertEqual(len(set(order.values())), len(order))
+        for parent, child in SkillDependency.objects.values_list('from_skill_id', 'to_skill_id'):
+            self.assertLess(order[parent], order[child], (parent, child))
+
+    def test_back_edges_move_the_affected_region(self):
+        self.link(self.a, self.b)
+        self.link(self.c, self.d)
+        self.assert_sorted()
+
+        # D sorts after A and B, so this edge moves D (and C behind it) forward
+        self.link(self.d, self.a)
+        self.assert_sorted()
+        self.assertEqual(
+            list(Skill.objects.filter(author=self.user).order_by('topo_order').values_list('title', flat=True)),
+            ["C", "D", "A", "B"],
+        )
+        self.link(self.c, self.b, 'soft')
+        self.assert_sorted()
+
+    def test_cycle_is_rejected(self):
+        self.link(self.a, self.b)
+        self.link(self.b, self.c)
+        before = dict(Skill.objects.values_list('id', 'topo_order'))
+
+        with self.assertRaises(DependencyCycleError) as caught:
+            self.link(self.c, self.a)
+        self.assertEqual(caught.exception.path, [self.c.id, self.a.id, self.b.id, self.c.id])
+        with self.assertRaises(DependencyCycleError):
+            self.link(self.d, self.d)
+
+        self.assertEqual(SkillDependency.objects.count(), 2)
+        self.assertEqual(dict(Skill.objects.values_list('id', 'topo_order')), before)
+
+    def test_reorder_author_repairs_the_order(self):
+        SkillDependency.objects.bulk_create([
+            SkillDependency(from_skill=self.d, to_skill=self.c), SkillDependency(from_skill=self.c, to_skill=self.a),
+        ])
+        self.assertEqual(reorder_author(self.user.id), [])
+        self.assert_sorted()
+
+        SkillDependency.objects.create(from_skill=self.a, to_skill=self.d)
+        self.assertEqual(set(reorder_author(self.user.id)), {self.a.id, self.c.id, self.d.id})
+
+
+    def admin_post(self, dependency=None, **fields):
+        self.client.force_login(self.admin)
+        url = (reverse('admin:skills_skilldependency_change', args=[dependency.pk]) if dependency
+               else reverse('admin:skills_skilldependency_add'))
+        return self.client.post(url, {'dependency_type': 'hard', **fields})
+
+    def test_admin_rejects_cycles(self):
+        self.link(self.a, self.b)
+        response = self.admin_post(from_skill=self.b.id, to_skill=self.a.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "створить цикл")
+        self.assertEqual(SkillDependency.objects.count(), 1)
+
+    def test_admin_edit_goes_through_the_order_and_closure(self):
+        self.link(self.a, self.b)
+        edge = self.link(self.b, self.c)
+
+        # B -> C becomes D -> A: a back edge that moves D to the front
+        self.assertEqual(self.admin_post(edge, from_skill=self.d.id, to_skill=self.a.id).status_code, 302)
+        self.assertEqual(
+            set(SkillDependency.objects.values_list('from_skill__title', 'to_skill__title')), {("A", "B"), ("D", "A")}
+        )
+        self.assert_sorted()
+        self.assertEqual(verify_closure(), [])
+
+        # reversing A -> B would only form a cycle with the edge being replaced
+        first = SkillDependency.objects.get(from_skill=self.a)
+        self.assertEqual(self.admin_post(first, from_skill=self.b.id, to_skill=self.a.id).status_code, 302)
+        self.assert_sorted()
+        self.assertEqual(verify_closure(), [])
+
+        response = self.admin_post(first, from_skill=self.a.id, to_skill=self.d.id)
+        self.assertContains(response, "створить цикл")
+
+
+class ClosureTests(TestCase):
+    # every step is checked against a full recount by verify_closure()
+    def setUp(self):
+        self.user = User.objects.create_user('closer', password='secret')
+        self.a, self.b, self.c, self.d = [
+            Skill.objects.create(title=title, slug=title.lower(), category="Python", author=self.user)
+            for title in ("A", "B", "C", "D")
+        ]
+
+    def link(self, parent, child, dependency_type='hard'):
+        dependency = SkillDependency.objects.create(from_skill=parent, to_skill=child, dependency_type=dependency_type)
+        self.assertEqual(verify_closure(), [])
+        return dependency
+
+    def paths(self, ancestor, descendant):
+        return list(SkillClosure.objects.filter(ancestor=ancestor, descendant=descendant).order_by(
+            'depth', 'hard_only'
+        ).values_list('depth', 'hard_only', 'paths'))
+
+    def test_diamond_counts_both_paths(self):
+        left = self.link(self.a, self.b)
+        self.link(self.a, self.c)
+        self.link(self.b, self.d)
+        self.link(self.c, self.d)
+        self.assertEqual(self.paths(self.a, self.d), [(2, True, 2)])
+
+        left.delete()
+        self.assertEqual(verify_closure(), [])
+        self.assertEqual(self.paths(self.a, self.d), [(2, True, 1)])
+        self.assertEqual(self.paths(self.a, self.b), [])
+
+    def test_deleting_the_middle_of_a_chain(self):
+        self.link(self.a, self.b)
+        self.link(self.b, self.c)
+        self.link(self.c, self.d)
+        self.assertEqual(self.paths(self.a, self.d), [(3, True, 1)])
+
+        self.b.delete()
+        self.assertEqual(verify_closure(), [])
+        self.assertEqual(self.paths(self.a, self.c), [])
+        self.assertEqual(self.paths(self.a, self.d), [])
+        self.assertEqual(self.paths(self.c, self.d), [(1, True, 1)])
+
+    def test_hard_and_soft_paths_are_kept_apart(self):
+        self.link(self.a, self.b)
+        soft = self.link(self.b, self.c, 'soft')
+        self.link(self.a, self.c)
+        self.link(self.c, self.d)
+        self.assertEqual(self.paths(self.a, self.d), [(2, True, 1), (3, False, 1)])
+        self.assertEqual(set(unfinished_prerequisites(self.user, self.d)), {self.a, self.c})
+
+        soft.delete()
+        self.assertEqual(verify_closure(), [])
+        self.assertEqual(self.paths(self.a, self.d), [(2, True, 1)])
+        self.assertEqual(self.paths(self.b, self.d), [])
+
+    def test_prerequisite_from_another_author(self):
+        other = User.objects.create_user('lender', password='secret')
+        borrowed = Skill.objects.create(title="X", slug='x', category="Python", author=other)
+        self.link(borrowed, self.a)
+        self.link(self.a, self.b)
+
+        rebuild_author_closure(self.user.id)
+        self.assertEqual(verify_closure(), [])
+        self.assertEqual(self.paths(borrowed, self.b), [])
+        self.assertEqual(self.paths(self.a, self.b), [(1, True, 1)])
+
+    def test_path_counts_outgrow_bigint(self):
+        # two skills per layer, each linked to both of the next: 2**63 paths from top to bottom
+        layers = [[self.a, self.b]] + [
+            [Skill.objects.create(title=f"L{i}{side}", slug=f'l{i}{side}', category="Python", author=self.user)
+             for side in 'ab']
+            for i in range(64)
+        ]
+        for upper, lower in zip(layers, layers[1:]):
+            for parent in upper:
+                for child in lower:
+                    SkillDependency.objects.create(from_skill=parent, to_skill=child)
+
+        self.assertEqual(self.paths(self.a, layers[-1][0]), [(64, True, 2 ** 63)])
+        self.assertEqual(verify_closure(), [])
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('importer', password='secret')
+        self.a, self.b, self.c = [
+            Skill.objects.create(title=title, slug=title.lower(), category="Python", author=self.user)
+            for title in ("A", "B", "C")
+        ]
+        SkillDependency.objects.create(from_skill=self.a, to_skill=self.b)
+
+    def run_import(self, *records):
+        lines = [{'type': 'meta', 'format': 1}, *records]
+        importer = SkillImporter(self.user)
+        importer.run(read_ndjson(io.StringIO("\n".join(json.dumps(line) for line in lines))))
+        return importer
+
+    def test_edges_closing_a_cycle_are_skipped(self):
+        importer = self.run_import(
+            {'type': 'dependency', 'from': 'b', 'to': 'a', 'dependency_type': 'hard'},
+            {'type': 'dependency', 'from': 'c', 'to': 'a', 'dependency_type': 'soft'},
+            {'type': 'dependency', 'from': 'b', 'to': 'c', 'dependency_type': 'hard'},
+        )
+        self.assertEqual((importer.skipped['dependency'], importer.cycles), (2, 2))
+        # edges already in topo_order go in first, so c -> a is the one closing the cycle
+        self.assertEqual(
+            set(SkillDependency.objects.values_list('from_skill__slug', 'to_skill__slug')), {('a', 'b'), ('b', 'c')}
+        )
+        self.assertEqual(verify_closure(), [])
+
+    def test_back_edges_are_reordered(self):
+        self.run_import({'type': 'dependency', 'from': 'c', 'to': 'a', 'dependency_type': 'hard'})
+        order = dict(Skill.objects.values_list('slug', 'topo_order'))
+        self.assertLess(order['c'], order['a'])
+        self.assertLess(order['a'], order['b'])
+        self.assertEqual(verify_closure(), [])
+
+    def test_malformed_records_report_their_line(self):
+        records = [
+            {'type': 'skill', 'slug': 'x', 'title': "X", 'category': "Python", 'difficulty': 'hard'},
+            {'type': 'skill', 'title': "Y", 'category': "Python", 'difficulty': 1},
+            {'type': 'dependency', 'from': 'a', 'to': 'b'},
+            {'type': 'progress', 'skill': 'a', 'status': 'finished'},
+        ]
+        for record in records:
+            with self.subTest(record=record), self.assertRaisesMessage(TransferError, "line 2:"):
+                self.run_import(record)
+        self.assertFalse(Skill.objects.filter(slug='x').exists())
+
+        self.run_import({'type': 'skill', 'slug': 'x', 'title': "X", 'category': "Python", 'difficulty': '3'})
+        self.assertEqual(Skill.objects.get(slug='x').difficulty, 3)
+
+
+    def test_duplicate_slugs_in_one_file_are_renamed(self):
+        skill = {'type': 'skill', 'slug': 'x', 'category': "Python", 'difficulty': 1}
+        with mock.patch('skills.transfer.RENAMED_SAMPLE', 1):
+            importer = self.run_import(
+                {**skill, 'title': "X1"}, {**skill, 'title': "X2"}, {**skill, 'slug': 'a', 'title': "A2"},
+                {'type': 'dependency', 'from': 'a', 'to': 'x', 'dependency_type': 'hard'},
+            )
+
+        self.assertEqual(Skill.objects.filter(title__in=["X1", "X2"]).count(), 2)
+        self.assertEqual(importer.renamed_count, 2)
+        self.assertEqual(len(importer.renamed_sample), 1)
+        # references follow the renamed copies
+        dependency = SkillDependency.objects.get(to_skill__title="X2")
+        self.assertEqual(dependency.from_skill.title, "A2")
+
+    def test_exhausted_slug_retries_raise_transfer_error(self):
+        with mock.patch('skills.transfer.with_token', return_value='b'), self.assertRaises(TransferError):
+            self.run_import({'type': 'skill', 'slug': 'a', 'title': "A2", 'category': "Python", 'difficulty': 1})
+        self.assertEqual(Skill.objects.count(), 3)
+
+
+class DiagramCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('drawer', password='secret')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.basics = Skill.objects.create(title="Основи", slug="basics", category="Python", author=self.user)
+            self.advanced = Skill.objects.create(title="Поглиблено", slug="advanced", category="Python", author=self.user)
+            SkillDependency.objects.create(from_skill=self.basics, to_skill=self.advanced)
+
+    def test_change_committed_during_a_build_is_not_hidden(self):
+        done = f'class N{self.basics.id} done;'
+
+        def load_then_commit(skill, user):
+            # the progress commit and its token bump land after the subgraph was read
+            subgraph = load_skill_subgraph(skill, user)
+            with self.captureOnCommitCallbacks(execute=True):
+                UserSkillProgress.objects.create(user=self.user, skill=self.basics, status='done')
+            return subgraph
+
+        get_skill_mermaid(self.advanced, self.user)
+        with mock.patch('skills.diagrams.load_skill_subgraph', load_then_commit):
+            self.assertNotIn(done, get_skill_mermaid(self.advanced, self.user))
+        self.assertIn(done, get_skill_mermaid(self.advanced, self.user))
+
+class BulkProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('bulk', password='secret')
+        self.a, self.b, self.c = [
+            Skill.objects.create(title=title, slug=title.lower(), category="Python", difficulty=2, author=self.user)
+            for title in ("A", "B", "C")
+        ]
+        SkillDependency.objects.create(from_skill=self.a, to_skill=self.b)
+        SkillDependency.objects.create(from_skill=self.b, to_skill=self.c)
+        self.client.force_login(self.user)
+
+    def post(self, *transitions):
+        return self.client.post(reverse('progress_bulk'), json.dumps({'transitions': [
+            {'skill': slug, 'status': status} for slug, status in transitions
+        ]}), content_type='application/json')
+
+    def test_whole_chain_in_one_request(self):
+        response = self.post(('c', 'done'), ('b', 'done'), ('a', 'done'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([state['slug'] for state in response.json()['changed']], ['a', 'b', 'c'])
+
+        progress = UserSkillProgress.objects.get(user=self.user, skill=self.c)
+        self.assertEqual(progress.status, 'done')
+        self.assertIsNotNone(progress.started_at)
+        self.assertIsNotNone(progress.finished_at)
+        self.assertEqual(UserXP.objects.get(user=self.user).finished_count, 3)
+        self.assertEqual(verify_xp_ledger(), [])
+
+    def test_locked_skill_is_rejected_as_a_whole(self):
+        response = self.post(('a', 'done'), ('c', 'in_progress'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("'C'", response.json()['errors'][0])
+        self.assertFalse(UserSkillProgress.objects.filter(user=self.user).exists())
+
+        self.assertEqual(self.post(('a', 'finished')).status_code, 400)
+        self.assertEqual(self.post(('missing', 'done')).status_code, 400)
+
+    def test_downstream_lock_states(self):
+        self.post(('a', 'done'), ('b', 'in_progress'))
+        response = self.post(('b', 'done'))
+        self.assertEqual(response.json()['downstream'], [
+            {'id': self.c.id, 'slug': 'c', 'status': 'todo', 'locked': False},
+        ])
+
+        started = UserSkillProgress.objects.get(user=self.user, skill=self.b).started_at
+        response = self.post(('a', 'todo'))
+        self.assertEqual(response.json()['downstream'][0]['locked'], True)
+        self.assertEqual(UserSkillProgress.objects.get(user=self.user, skill=self.b).started_at, started)
+        self.assertIsNone(UserSkillProgress.objects.get(user=self.user, skill=self.a).finished_at)
+
+    def test_change_status_link_uses_the_same_rules(self):
+        self.client.get(reverse('change_status', args=['b', 'in_progress']))
+        self.assertFalse(UserSkillProgress.objects.filter(user=self.user, skill=self.b).exists())
+        self.client.get(reverse('change_status', args=['a', 'in_progress']))
+        self.assertEqual(UserSkillProgress.objects.get(user=self.user, skill=self.a).status, 'in_progress')
+
+
+class DailyActivityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('streak', password='secret')
+        self.basics = Skill.objects.create(title="Основи", slug="basics", category="Python", difficulty=2,
+                                           author=self.user)
+        self.orm = Skill.objects.create(title="ORM", slug="orm", category="Django", difficulty=3, author=self.user)
+        self.client.force_login(self.user)
+
+    def rollup(self):
+        return sorted(DailyActivity.objects.filter(completed__gt=0).values_list('category', 'completed', 'xp'))
+
+    def test_transitions_feed_the_rollup(self):
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+        self.client.get(reverse('change_status', args=['orm', 'done']))
+        self.assertEqual(self.rollup(), [('Django', 1, 30), ('Python', 1, 20)])
+
+        # undoing takes the completion back from the day it was made
+        day = timezone.localdate() - timedelta(days=3)
+        UserSkillProgress.objects.filter(skill=self.orm).update(finished_at=timezone.now() - timedelta(days=3))
+        DailyActivity.objects.filter(category='Django').update(day=day)
+        self.client.get(reverse('change_status', args=['orm', 'todo']))
+        self.assertEqual(self.rollup(), [('Python', 1, 20)])
+        self.assertFalse(DailyActivity.objects.filter(day=day, completed__gt=0).exists())
+
+    def test_undo_takes_back_what_was_credited(self):
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+        self.basics.category = "Django"
+        self.basics.difficulty = 4
+        self.basics.save()
+
+        self.client.get(reverse('change_status', args=['basics', 'todo']))
+        self.assertEqual(self.rollup(), [])
+        self.assertFalse(DailyActivity.objects.filter(completed__lt=0).exists())
+        self.assertFalse(DailyActivity.objects.filter(xp__lt=0).exists())
+
+    def test_import_adds_to_the_history(self):
+        self.client.get(reverse('change_status', args=['orm', 'done']))
+        self.orm.delete()
+
+        finished = timezone.now() - timedelta(days=2)
+        lines = [{'type': 'meta', 'format': 1}, {
+            'type': 'progress', 'skill': 'basics', 'status': 'done', 'finished_at': finished.isoformat(),
+        }]
+        SkillImporter(self.user).run(read_ndjson(io.StringIO("\n".join(json.dumps(line) for line in lines))))
+
+        self.assertEqual(self.rollup(), [('Django', 1, 30), ('Python', 1, 20)])
+        self.assertTrue(DailyActivity.objects.filter(day=timezone.localdate(finished), category="Python").exists())
+
+    def test_backfill_matches_incremental_rollup(self):
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+        self.client.get(reverse('change_status', args=['orm', 'done']))
+        before = self.rollup()
+
+        DailyActivity.objects.all().delete()
+        self.assertEqual(rebuild_activity(batch_size=1)[1], 2)
+        self.assertEqual(self.rollup(), before)
+
+    def test_streaks(self):
+        today = date(2026, 5, 10)
+        days = {today - timedelta(days=n) for n in (1, 2, 3, 7, 8)}
+        self.assertEqual(_streaks(days, today), (3, 3))
+        self.assertEqual(_streaks(days | {today}, today), (4, 4))
+        self.assertEqual(_streaks(set(), today), (0, 0))
+
+    def test_profile_renders_activity(self):
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+        summary = activity_summary(self.user)
+        self.assertEqual(summary.current_streak, 1)
+        self.assertEqual(summary.days[-1].completed, 1)
+        self.assertEqual(summary.days[-1].percent, 100)
+        self.assertContains(self.client.get(reverse('profile')), 'activity-bar-fill bg-success')
+
+
+class XPLedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('earner', password='secret')
+        self.basics = Skill.objects.create(title="Основи", slug="basics", category="Python", difficulty=2, author=self.user)
+        self.orm = Skill.objects.create(title="ORM", slug="orm", category="Django", difficulty=3, author=self.user)
+        self.client.force_login(self.user)
+
+    def ledger(self):
+        return UserXP.objects.filter(user=self.user).values_list('total_xp', 'finished_count').get()
+
+    def edit(self, skill, difficulty):
+        response = self.client.post(reverse('skill_edit', args=[skill.slug]), {
+            'title': skill.title, 'category': skill.category, 'difficulty': difficulty, 'description': "",
+        })
+        self.assertRedirects(response, reverse('skill_detail', args=[skill.slug]))
+
+    def test_difficulty_change_recredits_done_skills(self):
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+        self.assertEqual(self.ledger(), (20, 1))
+
+        self.edit(self.basics, 4)
+        self.assertEqual(self.ledger(), (40, 1))
+        self.edit(self.orm, 1)
+        self.assertEqual(self.ledger(), (40, 1))
+        self.assertEqual(verify_xp_ledger(), [])
+
+    def test_deleting_a_done_skill_debits_it(self):
+        self.client.get(reverse('change_status', args=['basics', 'done']))
+        self.client.get(reverse('change_status', args=['orm', 'done']))
+        self.assertEqual(self.ledger(), (50, 2))
+
+        self.client.post(reverse('skill_delete', args=['orm']))
+        self.assertEqual(self.ledger(), (20, 1))
+        self.assertEqual(verify_xp_ledger(), [])
+
+
+class CategoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('sorter', password='secret')
+        self.other = User.objects.create_user('neighbour', password='secret')
+        self.a = Skill.objects.create(title="A", slug="a", category="Python", difficulty=2, author=self.user)
+        self.b = Skill.objects.create(title="B", slug="b", category="Python", difficulty=1, author=self.user)
+        self.c = Skill.objects.create(title="C", slug="c", category="Django", difficulty=3, author=self.user)
+        self.foreign = Skill.objects.create(title="D", slug="d", category="Python", author=self.other)
+        SkillDependency.objects.create(from_skill=self.b, to_skill=self.c)
+        SkillDependency.objects.create(from_skill=self.a, to_skill=self.b)
+        self.python = Category.objects.get(author=self.user, name="Python")
+        self.client.force_login(self.user)
+
+    def counts(self):
+        return {
+            category.name: (category.skill_count, category.done_count)
+            for category in Category.objects.filter(author=self.user)
+        }
+
+    def test_counters_follow_skills_and_progress(self):
+        self.assertEqual(self.counts(), {'Python': (2, 0), 'Django': (1, 0)})
+        self.assertEqual(self.foreign.category_ref.author, self.other)
+
+        self.client.post(reverse('progress_bulk'), json.dumps({'transitions': [
+            {'skill': 'a', 'status': 'done'}, {'skill': 'b', 'status': 'done'},
+        ]}), content_type='application/json')
+        self.assertEqual(self.counts(), {'Python': (2, 2), 'Django': (1, 0)})
+
+        b = Skill.objects.get(slug='b')
+        b.category = "Django"
+        b.save()
+        self.assertEqual(self.counts(), {'Python': (1, 1), 'Django': (2, 1)})
+
+        self.client.post(reverse('skill_delete', args=['b']))
+        self.assertEqual(self.counts(), {'Python': (1, 1), 'Django': (1, 0)})
+
+        expected = self.counts()
+        Category.objects.update(skill_count=0, done_count=0)
+        rebuild_category_counts(self.user.id)
+        self.assertEqual(self.counts(), expected)
+
+    def test_ownerless_skills_have_no_category(self):
+        legacy = Skill.objects.create(title="Без автора", slug="legacy", category="Python")
+        legacy.title = "Досі без автора"
+        legacy.save()
+        self.assertIsNone(legacy.category_ref_id)
+        self.assertEqual(Category.objects.get(author=self.user, name="Python").skill_count, 2)
+
+    def test_list_filters_by_category_id(self):
+        response = self.client.get(reverse('skill_list'), {'category': self.python.id})
+        self.assertEqual({skill.slug for skill in response.context['skills']}, {'a', 'b'})
+        self.assertEqual([category.name for category in response.context['categories']], ['Django', 'Python'])
+
+        response = self.client.get(reverse('skill_list'), {'category': 'Python'})
+        self.assertEqual(len(response.context['skills']), 3)
+
+    def test_delete_removes_the_category_with_its_skills(self):
+        self.client.get(reverse('change_status', args=['a', 'done']))
+        self.assertEqual(self.client.post(
+            reverse('category_delete', args=[self.foreign.category_ref_id])
+        ).status_code, 404)
+
+        self.client.post(reverse('category_delete', args=[self.python.id]))
+        self.assertEqual(list(Skill.objects.filter(author=self.user).values_list('slug', flat=True)), ['c'])
+        self.assertFalse(Category.objects.filter(id=self.python.id).exists())
+        self.assertFalse(SkillDependency.objects.exists())
+        self.assertFalse(UserSkillProgress.objects.filter(user=self.user).exists())
+        self.assertEqual(verify_closure(), [])
+        self.assertEqual(verify_xp_ledger(), [])
+        self.assertTrue(Skill.objects.filter(slug='d').exists())
+        self.assertFalse(self.client.get(reverse('skill_detail', args=['c'])).context['skill'].is_locked)
+
+    def test_delete_does_not_grow_with_the_category(self):
+        def measure(name):
+            category = Category.objects.get(author=self.user, name=name)
+            with record_queries() as recorder:
+                self.client.post(reverse('category_delete', args=[category.id]))
+            return recorder.count
+
+        # same shape as Python: a chain with one edge leaving the category
+        chain = [Skill.objects.create(title=f"N{i}", slug=f"n{i}", category="Великий", author=self.user)
+                 for i in range(20)]
+        for parent, child in zip(chain, chain[1:]):
+            SkillDependency.objects.create(from_skill=parent, to_skill=child)
+        SkillDependency.objects.create(from_skill=chain[-1], to_skill=self.c)
+        # surviving paths, so both closure rebuilds have rows to write
+        last = Skill.objects.create(title="E", slug="e", category="Django", author=self.user)
+        SkillDependency.objects.create(from_skill=self.c, to_skill=last)
+        # the list page the delete is posted from has created the graph version row
+        self.client.get(reverse('skill_list'))
+
+        self.assertEqual(measure("Великий"), measure("Python"))
+
+
+def plan_nodes(plan, below_limit=True):
+    # below_limit=False skips everything under a Limit node, whose scans stop early
+    if not below_limit and plan['Node Type'] == 'Limit':
+        return
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child, below_limit)
+
+
+class QueryPlanTests(TestCase):
+    # Sequential scans and hash/merge joins are priced out while explaining, so the
+    # planner only picks a table scan when no index fits and joins probe an index per
+    # row: a Seq Scan on an app table, or an index scan with no Index Cond, means a hot
+    # query lost its index. Only scans feeding a LIMIT may read an index end to end.
+    PLAN_SETTINGS = ('enable_seqscan', 'enable_hashjoin', 'enable_mergejoin')
+
+    @classmethod
+    def setUpTestData(cls):
+        # enough small accounts that the leaderboard is planned on more than a page of rows
+        seed_dataset(users=50, skills=2, prefix='plan-crowd', seed=7)
+        seed_dataset(users=3, skills=150, prefix='plan-test', seed=7)
+        cls.user = bench_users('plan-test').first()
+        cls.skill = Skill.objects.filter(author=cls.user).order_by('-topo_order').first()
+        cls.done = UserSkillProgress.objects.filter(user=cls.user, status='done').select_related('skill').first().skill
+        cls.category = Category.objects.filter(author=cls.user).first()
+
+    def setUp(self):
+        # graph snapshots and diagrams are cached; their queries are part of the hot path
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def requests(self):
+        slug = [self.skill.slug]
+        return [
+            ('skill_list', [], None),
+            ('skill_list', [], {'category': self.category.id}),
+            ('skill_list', [], {'status': 'done'}),
+            ('skill_list', [], {'search': 'основи'}),
+            ('skill_detail', slug, None),
+            ('skill_plan', slug, None),
+            ('skill_graph_json', slug, None),
+            ('skill_mermaid', slug, None),
+            ('overview_json', [], None),
+            ('profile', [], None),
+            ('leaderboard', [], None),
+            ('change_status', [self.done.slug, 'todo'], None),
+        ]
+
+    def explain(self, name, args, data, settings=PLAN_SETTINGS):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse(name, args=args), data)
+
+        plans = []
+        with connection.cursor() as cursor:
+            # the seeded rows are never committed, so autovacuum may have analyzed them away
+            for model in [User, *apps.get_app_config('skills').get_models()]:
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+            for setting in settings:
+                cursor.execute(f'SET {setting} = off')
+            try:
+                for query in captured:
+                    if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE')):
+                        cursor.execute('EXPLAIN (FORMAT JSON) ' + query['sql'])
+                        plans.append((query['sql'], cursor.fetchone()[0][0]['Plan']))
+            finally:
+                for setting in settings:
+                    cursor.execute(f'RESET {setting}')
+        return plans
+
+    def test_hot_queries_do_not_scan_tables(self):
+        for name, args, data in self.requests():
+            with self.subTest(view=name, params=data):
+                scans = [
+                    f"{node['Node Type']} {node['Relation Name']}: {sql}"
+                    for sql, plan in self.explain(name, args, data)
+                    for node in plan_nodes(plan, below_limit=False)
+                    if node.get('Relation Name', '').startswith('skills_') and (
+                        node['Node Type'] == 'Seq Scan'
+                        or node['Node Type'] in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in node
+                    )
+                ]
+                self.assertEqual(scans, [])
+
+    def test_hot_queries_use_the_planned_indexes(self):
+        used = {
+            node['Index Name']
+            for name, args, data in self.requests()
+            for _, plan in self.explain(name, args, data)
+            for node in plan_nodes(plan)
+            if 'Index Name' in node
+        }
+        # the list's order only wins over a sort on a bigger table; price sorts out to see it
+        used |= {
+            node['Index Name']
+            for _, plan in self.explain('skill_list', [], None, self.PLAN_SETTINGS + ('enable_sort',))
+            for node in plan_nodes(plan)
+            if 'Index Name' in node
+        }
+        self.assertEqual(PLANNED_INDEXES - used, set())
+
+    def test_skill_list_reads_in_index_order(self):
+        # with sorts priced out a Sort node means no index gives Meta.ordering
+        plans = [
+            plan for sql, plan in self.explain('skill_list', [], None, self.PLAN_SETTINGS + ('enable_sort',))
+            if 'ORDER BY "skills_skill"."category" ASC, "skills_skill"."difficulty" ASC' in sql
+        ]
+        self.assertEqual(len(plans), 1)
+        self.assertEqual([node for node in plan_nodes(plans[0]) if node['Node Type'] == 'Sort'], [])
+
+
+class SlugTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('namer', password='secret')
+        self.client.force_login(self.user)
+
+    def test_form_takes_the_plain_slug_first(self):
+        form = {'title': "Docker Compose", 'category': "DevOps", 'difficulty': 2, 'video_url': '', 'description': ''}
+        for _ in range(3):
+            self.client.post(reverse('skill_create'), form)
+
+        slugs = sorted(Skill.objects.values_list('slug', flat=True), key=len)
+        self.assertEqual(slugs[0], f'docker-compose-{self.user.id}')
+        self.assertEqual(len(set(slugs)), 3)
+        self.assertTrue(all(slug.startswith(f'docker-compose-{self.user.id}-') for slug in slugs[1:]))
+
+    def test_conflicts_are_retried_and_other_errors_are_not(self):
+        taken = create_skill(Skill(title="Taken", category="Python", author=self.user))
+
+        def insert(attempt):
+            slug = taken.slug if attempt < 2 else 'free-slug'
+            return Skill.objects.create(title="Retry", slug=slug, category="Python", author=self.user)
+
+        self.assertEqual(retry_slug_conflicts(insert).slug, 'free-slug')
+        with self.assertRaises(IntegrityError):
+            retry_slug_conflicts(lambda attempt: Skill.objects.create(title="Retry", slug=taken.slug, category="Python",
+                                                                      author=self.user), attempts=2)
+        with self.assertRaises(IntegrityError):
+            retry_slug_conflicts(lambda attempt: UserXP.objects.create(user=self.user))
+
+
+class ConcurrentSlugTests(TransactionTestCase):
+    # real concurrent transactions: every thread has a connection of its own
+    THREADS = 8
+    PER_THREAD = 5
+
+    def test_concurrent_creates_get_unique_slugs(self):
+        author = User.objects.create_user('racer', password='secret')
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def create_many():
+            try:
+                barrier.wait()
+                for _ in range(self.PER_THREAD):
+                    with transaction.atomic():
+                        create_skill(Skill(title="Concurrent skill", category="Гонки", author=author))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create_many) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        slugs = list(Skill.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), self.THREADS * self.PER_THREAD)
+        self.assertEqual(len(set(slugs)), len(slugs))
+        self.assertIn(f'concurrent-skill-{author.id}', slugs)
+        self.assertEqual(Category.objects.get(author=author).skill_count, len(slugs))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('seeker', password='secret')
+        self.skills = {
+            slug: Skill.objects.create(title=title, slug=slug, category=category, description=description, author=self.user)
+            for slug, title, category, description in [
+                ('skills-ua', "Навички спілкування", "Софт", ""),
+                ('testing', "Testing web applications", "QA", ""),
+                ('docker', "Docker", "DevOps", "Containers and images"),
+                ('compose', "Compose files", "DevOps", "Running docker services together"),
+            ]
+        }
+
+    def search(self, text):
+        return list(search_skills(Skill.objects.filter(author=self.user), text).order_by(
+            '-search_rank', 'title'
+        ).values_list('slug', flat=True))
+
+    def test_ukrainian_words_match_by_prefix(self):
+        self.assertEqual(self.search("навич"), ['skills-ua'])
+        self.assertEqual(self.search("навички спілк"), ['skills-ua'])
+
+    def test_english_words_are_stemmed(self):
+        self.assertEqual(self.search("tested application"), ['testing'])
+
+    def test_typos_in_the_title_still_match(self):
+        self.assertEqual(self.search("Dockre"), ['docker'])
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search("docker"), ['docker', 'compose'])
+
+    def test_search_vector_follows_saves(self):
+        skill = self.skills['testing']
+        skill.title = "Kubernetes basics"
+        skill.save()
+
+        self.assertEqual(self.search("kubernetes"), ['testing'])
+        self.assertEqual(self.search("applications"), [])
+
+
+class PlannerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        learning_path_cache.clear()
+        self.user = User.objects.create_user('planner', password='secret')
+        self.a, self.b, self.c, self.d, self.target = [
+            Skill.objects.create(title=title, slug=title.lower(), category="Python", difficulty=difficulty, author=self.user)
+            for title, difficulty in (("A", 3), ("B", 1), ("C", 2), ("D", 1), ("Target", 2))
+        ]
+        for parent, child, dependency_type in [
+            (self.a, self.c, 'hard'), (self.b, self.c, 'hard'), (self.c, self.target, 'hard'),
+            (self.d, self.target, 'soft'),
+        ]:
+            SkillDependency.objects.create(from_skill=parent, to_skill=child, dependency_type=dependency_type)
+
+    def plan(self, include_soft=False):
+        graph = get_skill_graph(self.user)
+        return [step.title for step in plan_steps(graph, self.target.id, include_soft)]
+
+    def test_prerequisites_first_and_easier_first(self):
+        # A and B are both ready at the start, B is easier
+        self.assertEqual(self.plan(), ["B", "A", "C", "Target"])
+
+    def test_done_skills_are_skipped(self):
+        UserSkillProgress.objects.create(user=self.user, skill=self.a, status='done')
+        self.assertEqual(self.plan(), ["B", "C", "Target"])
+
+    def test_soft_prerequisites_only_on_request(self):
+        self.assertNotIn("D", self.plan())
+        self.assertEqual(self.plan(include_soft=True), ["B", "D", "A", "C", "Target"])
+
+    def test_memo_follows_the_graph_version(self):
+        path = get_learning_path(self.user, self.target.id)
+        self.assertIs(get_learning_path(self.user, self.target.id), path)
+        self.assertEqual((path.total_difficulty, path.total_xp), (8, 8 * XP_PER_DIFFICULTY))
+
+        UserSkillProgress.objects.create(user=self.user, skill=self.b, status='done')
+        updated = get_learning_path(self.user, self.target.id)
+        self.assertGreater(updated.version, path.version)
+        self.assertEqual([step.title for step in updated.steps], ["A", "C", "Target"])
+
+
+class GraphConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('grapher', password='secret')
+        self.skills = [
+            Skill.objects.create(title=f"Навичка {number}", slug=f"skill-{number}", category="Python", author=self.user)
+            for number in range(6)
+        ]
+        for parent, child in zip(self.skills, self.skills[1:]):
+            SkillDependency.objects.create(from_skill=parent, to_skill=child)
+        self.url = reverse('skill_graph_json', args=[self.skills[-1].slug])
+        self.client.force_login(self.user)
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_unmodified_since_returns_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response['Last-Modified'])
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_progress_change_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        UserSkillProgress.objects.create(user=self.user, skill=self.skills[0], status='done')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_response_is_gzipped(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        payload = json.loads(gzip.decompress(response.content))
+        self.assertEqual(payload['root'], self.skills[-1].id)
+        self.assertEqual(len(payload['nodes']), len(self.skills))
+
+
+class RoadmapCacheTests(TestCase):
+    ROADMAP = {'skills': [{'title': "Основи", 'difficulty': 1}, {'title': "Функції", 'difficulty': 2}],
+               'dependencies': [{'from': "Основи", 'to': "Функції"}]}
+
+    def setUp(self):
+        self.roadmap_cache = RoadmapCache(2, 60)
+        self.calls = []
+
+    def generate(self, topic):
+        self.calls.append(topic)
+        return self.ROADMAP
+
+    def test_normalized_topics_share_an_entry(self):
+        for topic in ["Python", "  python ", "PYTHON", "Ｐｙｔｈｏｎ"]:
+            self.assertEqual(self.roadmap_cache.get_or_generate(topic, self.generate), self.ROADMAP)
+        self.assertEqual(self.calls, ["Python"])
+        self.assertEqual(self.roadmap_cache.stats()['hits'], 3)
+
+    def test_cached_roadmap_is_a_copy(self):
+        self.roadmap_cache.get_or_generate("Python", self.generate)['skills'].clear()
+        self.assertEqual(self.roadmap_cache.get_or_generate("Python", self.generate), self.ROADMAP)
+
+    def test_entries_expire(self):
+        with mock.patch('skills.lru.time.monotonic', return_value=1000):
+            self.roadmap_cache.get_or_generate("Python", self.generate)
+        with mock.patch('skills.lru.time.monotonic', return_value=1059):
+            self.roadmap_cache.get_or_generate("Python", self.generate)
+        self.assertEqual(len(self.calls), 1)
+
+        with mock.patch('skills.lru.time.monotonic', return_value=1061):
+            self.roadmap_cache.get_or_generate("Python", self.generate)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_least_recently_used_is_evicted(self):
+        for topic in ["Python", "Rust", "Python", "Go"]:
+            self.roadmap_cache.get_or_generate(topic, self.generate)
+        self.assertEqual(self.roadmap_cache.stats()['evictions'], 1)
+
+        # Python was used after Rust, so Rust went first
+        self.roadmap_cache.get_or_generate("Python", self.generate)
+        self.roadmap_cache.get_or_generate("Rust", self.generate)
+        self.assertEqual(self.calls, ["Python", "Rust", "Go", "Rust"])
+
+    def test_concurrent_misses_call_the_backend_once(self):
+        release = threading.Event()
+        results = []
+
+        def generate(topic):
+            release.wait(5)
+            return self.generate(topic)
+
+        threads = [
+            threading.Thread(target=lambda: results.append(self.roadmap_cache.get_or_generate("Python", generate)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in range(500):
+            if self.roadmap_cache.stats()['coalesced'] == 3:
+                break
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.calls, ["Python"])
+        self.assertEqual(results, [self.ROADMAP] * 4)
+        self.assertEqual(self.roadmap_cache.stats()['coalesced'], 3)
+        self.assertEqual(self.roadmap_cache.stats()['in_flight'], 0)
+
+
+class RenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        markdown_lru.clear()
+        self.user = User.objects.create_user('writer', password='secret')
+
+    def test_process_cache_skips_the_converter(self):
+        text = "**жирний** текст"
+        html = render_markdown(text)
+        self.assertEqual(html, "<p><strong>жирний</strong> текст</p>")
+
+        with mock.patch('skills.rendering._converter') as converter:
+            self.assertEqual(render_markdown(text), html)
+        converter.assert_not_called()
+
+    def test_shared_tier_fills_the_process_cache(self):
+        text = "`код`"
+        with mock.patch('skills.rendering.MARKDOWN_CACHE_ALIAS', 'default'):
+            html = render_markdown(text)
+            self.assertEqual(cache.get(content_key(text)), html)
+
+            # another process: its own LRU is cold, the shared tier is warm
+            markdown_lru.clear()
+            with mock.patch('skills.rendering._converter') as converter:
+                self.assertEqual(render_markdown(text), html)
+            converter.assert_not_called()
+        self.assertEqual(markdown_lru.get(content_key(text)), html)
+
+    def test_description_html_follows_description(self):
+        skill = Skill.objects.create(title="Markdown", slug="markdown", description="*перша*", author=self.user)
+        self.assertEqual(skill.description_html, "<p><em>перша</em></p>")
+
+        skill.description = "*друга*"
+        skill.save(update_fields=['description'])
+        skill.refresh_from_db()
+        self.assertEqual(skill.description_html, "<p><em>друга</em></p>")
+
+        skill.description = ""
+        skill.save()
+        self.assertEqual(Skill.objects.get(pk=skill.pk).description_html, "")
+
+
+class OverviewTests(TestCase):
+    NODES = [
+        (1, "Основи", "Python", "osnovy", 1), (2, "Функції", "Python", "funktsii", 2), (3, "Класи", "Python", "klasy", 3),
+        (4, "HTML", "Web", "html", 1), (5, "Django", "Web", "django", 3),
+        # another author's prerequisite, outside the layout
+        (6, "Чужа", "Python", "chuzha", 1),
+    ]
+    EDGES = [
+        (1, 2, 'hard'), (2, 3, 'hard'), (1, 3, 'hard'), (3, 5, 'hard'), (1, 5, 'hard'), (4, 5, 'soft'), (6, 4, 'hard'),
+    ]
+
+    def graph(self, edges=EDGES, progress=()):
+        return SkillGraph(self.NODES, edges, progress, own_count=5)
+
+    def test_layers_follow_the_longest_chain(self):
+        self.assertEqual(node_layers(self.graph()), [0, 1, 2, 0, 3])
+
+    def test_cycle_goes_after_everything_else(self):
+        edges = [(1, 2, 'hard'), (2, 3, 'hard'), (3, 2, 'hard')]
+        self.assertEqual(node_layers(self.graph(edges)), [0, 2, 2, 0, 0])
+        self.assertEqual(len(compute_overview(self.graph(edges))['clusters']), 2)
+
+    def test_categories_become_clusters(self):
+        overview = compute_overview(self.graph(progress=[(1, 'done')]))
+
+        python, web = overview['clusters']
+        self.assertEqual((python['name'], python['size'], python['row']), ("Python", 3, 0))
+        self.assertEqual((web['name'], web['size'], web['row']), ("Web", 2, 1))
+        self.assertEqual(python['counts'], {'done': 1, 'in_progress': 0, 'todo': 1, 'locked': 1})
+        self.assertEqual(web['counts'], {'done': 0, 'in_progress': 0, 'todo': 0, 'locked': 2})
+
+        # two Python -> Web edges collapse into one weighted edge
+        self.assertEqual(overview['edges'], [[0, 1, 2]])
+        self.assertEqual(overview['details'][1]['edges'], [[4, 5, 'soft']])
+        self.assertEqual(len(overview['details'][0]['edges']), 3)
+        self.assertEqual(overview['details'][0]['columns'], 3)
+
+    def test_layout_is_cached_per_graph_version(self):
+        cache.clear()
+        user = User.objects.create_user('mapper', password='secret')
+        skill = Skill.objects.create(title="Основи", slug="osnovy", category="Python", author=user)
+
+        with mock.patch('skills.overview.compute_overview', wraps=compute_overview) as compute:
+            version, _ = get_graph_version(user)
+            first = get_overview(user, version)
+            self.assertEqual(get_overview(user, version), first)
+            self.assertEqual(compute.call_count, 1)
+
+            UserSkillProgress.objects.create(user=user, skill=skill, status='done')
+            version, _ = get_graph_version(user)
+            self.assertEqual(get_overview(user, version)['clusters'][0]['counts']['done'], 1)
+            self.assertEqual(compute.call_count, 2)
+
+
+class SkillGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('learner', password='secret')
+        self.other = User.objects.create_user('teacher', password='secret')
+        self.basics, self.extra, self.target = [
+            Skill.objects.create(title=title, slug=title.lower(), category="Python", author=self.user)
+            for title in ("Basics", "Extra", "Target")
+        ]
+        SkillDependency.objects.create(from_skill=self.basics, to_skill=self.target, dependency_type='hard')
+        SkillDependency.objects.create(from_skill=self.extra, to_skill=self.target, dependency_type='soft')
+
+    def test_only_hard_prerequisites_lock(self):
+        graph = compile_skill_graph(self.user)
+        self.assertTrue(graph.is_locked(self.target.id))
+        self.assertEqual(graph.locked_ids(), {self.target.id})
+
+        UserSkillProgress.objects.create(user=self.user, skill=self.basics, status='done')
+        # the soft prerequisite is still todo
+        self.assertFalse(compile_skill_graph(self.user).is_locked(self.target.id))
+
+    def test_foreign_prerequisite_locks(self):
+        foreign = Skill.objects.create(title="Foreign", slug="foreign", category="Python", author=self.other)
+        SkillDependency.objects.create(from_skill=foreign, to_skill=self.basics, dependency_type='hard')
+
+        graph = compile_skill_graph(self.user)
+        self.assertTrue(graph.is_locked(self.basics.id))
+        self.assertEqual(graph.own_count, 3)
+        self.assertEqual([prerequisite.title for prerequisite in graph.prerequisites(self.basics.id)], ["Foreign"])
+
+        UserSkillProgress.objects.create(user=self.user, skill=foreign, status='done')
+        self.assertFalse(compile_skill_graph(self.user).is_locked(self.basics.id))
+
+    def test_graph_is_recompiled_after_a_version_bump(self):
+        self.assertTrue(get_skill_graph(self.user).is_locked(self.target.id))
+        with mock.patch('skills.graph.compile_skill_graph') as compile_graph:
+            self.assertTrue(get_skill_graph(self.user).is_locked(self.target.id))
+        compile_graph.assert_not_called()
+
+        UserSkillProgress.objects.create(user=self.user, skill=self.basics, status='done')
+        graph = get_skill_graph(self.user)
+        self.assertFalse(graph.is_locked(self.target.id))
+        self.assertEqual(graph.status_of(self.basics.id), 'done')
+
+    def test_detail_loads_direct_neighbours_only(self):
+        deep = Skill.objects.create(title="Deep", slug="deep", category="Python", author=self.user)
+        SkillDependency.objects.create(from_skill=deep, to_skill=self.basics, dependency_type='hard')
+        self.client.force_login(self.user)
+
+        with mock.patch('skills.views.load_skill_subgraph', wraps=load_skill_subgraph) as load:
+            response = self.client.get(reverse('skill_detail', args=[self.target.slug]))
+        self.assertEqual(load.call_args.kwargs, {'depth': 1})
+        self.assertEqual({edge.parent.slug for edge in response.context['requires']}, {'basics', 'extra'})
+        self.assertTrue(response.context['skill'].is_locked)
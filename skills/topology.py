@@ -0,0 +1,189 @@
+from collections import defaultdict, deque
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Skill, SkillDependency
+
+
+class DependencyCycleError(ValueError):
+    def __init__(self, path):
+        self.path = path
+        super().__init__(" -> ".join(str(node) for node in path))
+
+
+def topological_sort(nodes, edges):
+    # Kahn's algorithm; returns (ordered, nodes left on cycles), both in input order
+    nodes = list(nodes)
+    children = defaultdict(list)
+    pending = dict.fromkeys(nodes, 0)
+    for parent, child in edges:
+        children[parent].append(child)
+        pending[child] += 1
+
+    ready = deque(node for node in nodes if not pending[node])
+    ordered = []
+    while ready:
+        node = ready.popleft()
+        ordered.append(node)
+        for child in children[node]:
+            pending[child] -= 1
+            if not pending[child]:
+                ready.append(child)
+
+    placed = set(ordered)
+    return ordered, [node for node in nodes if node not in placed]
+
+
+def _region(author_id, lower, upper, exclude=None):
+    # only edges with both ends inside [lower, upper] can matter for the reorder
+    edges = SkillDependency.objects.filter(
+        from_skill__author_id=author_id,
+        from_skill__topo_order__range=(lower, upper),
+        to_skill__topo_order__range=(lower, upper),
+    ).exclude(pk=exclude).values_list('from_skill_id', 'to_skill_id', 'from_skill__topo_order', 'to_skill__topo_order')
+
+    order = {}
+    children = defaultdict(list)
+    parents = defaultdict(list)
+    for from_id, to_id, from_order, to_order in edges:
+        order[from_id] = from_order
+        order[to_id] = to_order
+        children[from_id].append(to_id)
+        parents[to_id].append(from_id)
+    return order, children, parents
+
+
+def _reach(start, neighbours, stop=None):
+    seen = {start: None}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        for nxt in neighbours[node]:
+            if nxt in seen:
+                continue
+            seen[nxt] = node
+            if nxt == stop:
+                return seen, True
+            stack.append(nxt)
+    return seen, False
+
+
+def _cycle_path(forward, from_id, to_id):
+    path = [from_id]
+    while path[-1] != to_id:
+        path.append(forward[path[-1]])
+    path.reverse()
+    return [from_id] + path
+
+
+def check_dependency(dependency):
+    # the cycle check of reorder_for_edge without writing anything; an edited edge
+    # (admin) is checked as if its stored version were already gone
+    from_skill, to_skill = dependency.from_skill, dependency.to_skill
+    if from_skill.id == to_skill.id:
+        raise DependencyCycleError([from_skill.id, to_skill.id])
+    if from_skill.author_id != to_skill.author_id or from_skill.topo_order < to_skill.topo_order:
+        return
+
+    _, children, _ = _region(to_skill.author_id, to_skill.topo_order, from_skill.topo_order, exclude=dependency.pk)
+    forward, closes_cycle = _reach(to_skill.id, children, stop=from_skill.id)
+    if closes_cycle:
+        raise DependencyCycleError(_cycle_path(forward, from_skill.id, to_skill.id))
+
+
+def reorder_for_edge(author_id, from_skill, to_skill):
+    # Pearce–Kelly: prerequisites must sort before the skills that need them
+    lower, upper = to_skill.topo_order, from_skill.topo_order
+    if upper < lower:
+        return
+
+    order, children, parents = _region(author_id, lower, upper)
+    order[from_skill.id] = upper
+    order[to_skill.id] = lower
+
+    forward, closes_cycle = _reach(to_skill.id, children, stop=from_skill.id)
+    if closes_cycle or from_skill.id == to_skill.id:
+        raise DependencyCycleError(_cycle_path(forward, from_skill.id, to_skill.id))
+
+    backward, _ = _reach(from_skill.id, parents)
+
+    moved = sorted(backward, key=order.get) + sorted(forward, key=order.get)
+    slots = sorted(order[node] for node in moved)
+    updates = [Skill(id=node, topo_order=slot) for node, slot in zip(moved, slots) if order[node] != slot]
+    if updates:
+        Skill.objects.bulk_update(updates, ['topo_order'])
+
+    for skill in (from_skill, to_skill):
+        skill.topo_order = slots[moved.index(skill.id)]
+
+
+def add_dependency(dependency):
+    author_id = dependency.to_skill.author_id
+    if dependency.from_skill.author_id != author_id:
+        # a prerequisite borrowed from another author sits outside this author's
+        # order, like it sits outside the closure (skills.closure.is_closure_edge)
+        dependency.save()
+        return dependency
+
+    with transaction.atomic():
+        # one writer per author graph, otherwise two reorders could interleave
+        User.objects.select_for_update().filter(pk=author_id).exists()
+
+        orders = dict(Skill.objects.filter(
+            pk__in=[dependency.from_skill_id, dependency.to_skill_id]
+        ).values_list('id', 'topo_order'))
+        dependency.from_skill.topo_order = orders[dependency.from_skill_id]
+        dependency.to_skill.topo_order = orders[dependency.to_skill_id]
+
+        reorder_for_edge(author_id, dependency.from_skill, dependency.to_skill)
+        dependency.save()
+    return dependency
+
+
+def replace_dependency(dependency):
+    # an edited edge goes out and comes back in through add_dependency, so the
+    # closure and the order see the new endpoints; it keeps its id
+    with transaction.atomic():
+        SkillDependency.objects.filter(pk=dependency.pk).delete()
+        return add_dependency(dependency)
+
+
+def order_new_skills(skills, dependencies):
+    # freshly bulk-created skills only depend on each other, so shuffling their own
+    # sequence values is enough to keep the author's order valid
+    ordered, cyclic = topological_sort(
+        [skill.id for skill in skills],
+        [(dep.from_skill_id, dep.to_skill_id) for dep in dependencies],
+    )
+    if cyclic:
+        raise DependencyCycleError(cyclic)
+
+    by_id = {skill.id: skill for skill in skills}
+    slots = sorted(skill.topo_order for skill in skills)
+    moved = []
+    for skill_id, slot in zip(ordered, slots):
+        skill = by_id[skill_id]
+        if skill.topo_order != slot:
+            skill.topo_order = slot
+            moved.append(skill)
+    if moved:
+        Skill.objects.bulk_update(moved, ['topo_order'])
+
+
+def reorder_author(author_id, batch_size=1000):
+    # full recount for paths that bypass add_dependency (imports); returns skills left on cycles
+    skills = list(Skill.objects.filter(author_id=author_id).order_by('topo_order').values_list('id', 'topo_order'))
+    edges = SkillDependency.objects.filter(
+        from_skill__author_id=author_id, to_skill__author_id=author_id
+    ).values_list('from_skill_id', 'to_skill_id')
+
+    ordered, cyclic = topological_sort([skill_id for skill_id, _ in skills], edges)
+    current = dict(skills)
+    slots = [topo_order for _, topo_order in skills]
+    Skill.objects.bulk_update(
+        [Skill(id=skill_id, topo_order=slot) for skill_id, slot in zip(ordered + cyclic, slots) if current[skill_id] != slot],
+        ['topo_order'],
+        batch_size=batch_size,
+    )
+    return cyclic
@@ -0,0 +1,406 @@
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .activity import add_activity
+from .categories import assign_categories, rebuild_category_counts
+from .closure import rebuild_author_closure
+from .diagrams import invalidate_skill_diagrams
+from .gamification import XP_PER_DIFFICULTY, rebuild_user_xp
+from .graph import bump_graph_version
+from .models import Skill, SkillDependency, UserSkillProgress
+from .slugs import is_slug_conflict, retry_slug_conflicts, with_token
+from .topology import DependencyCycleError, reorder_for_edge
+
+# NDJSON layout: one meta line, then skills (in topological order per author),
+# dependencies and progress, all keyed by slug and username instead of ids
+EXPORT_FORMAT = 1
+RECORD_TYPES = ('skill', 'dependency', 'progress')
+
+# record key -> (model, field) whose clean() checks the value; a bad row stops the
+# import with its line number instead of failing a batch with a KeyError or DataError
+RECORD_FIELDS = {
+    'skill': {
+        'slug': (Skill, 'slug'), 'title': (Skill, 'title'), 'category': (Skill, 'category'),
+        'difficulty': (Skill, 'difficulty'), 'description': (Skill, 'description'), 'video_url': (Skill, 'video_url'),
+    },
+    'dependency': {
+        'from': (Skill, 'slug'), 'to': (Skill, 'slug'), 'dependency_type': (SkillDependency, 'dependency_type'),
+    },
+    'progress': {
+        'skill': (Skill, 'slug'), 'status': (UserSkillProgress, 'status'),
+        'started_at': (UserSkillProgress, 'started_at'), 'finished_at': (UserSkillProgress, 'finished_at'),
+    },
+}
+OPTIONAL_FIELDS = {'description', 'video_url', 'started_at', 'finished_at'}
+
+# original slug -> slug it was imported under, for the dependency and progress records
+# that follow; kept in a temporary table so memory does not grow with the conflicts
+RENAMED_TABLE = 'skills_import_renamed'
+# renames kept in memory for the import report
+RENAMED_SAMPLE = 20
+
+
+class TransferError(ValueError):
+    pass
+
+
+class RateReporter:
+    # writes "<kind>: N rows (R rows/s)" at most every `interval` seconds
+    def __init__(self, stream, interval=2.0):
+        self.stream = stream
+        self.interval = interval
+        self.counts = dict.fromkeys(RECORD_TYPES, 0)
+        self.started = self.reported = time.monotonic()
+
+    def add(self, kind, count=1):
+        self.counts[kind] += count
+        now = time.monotonic()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            self.write(kind, now)
+
+    def write(self, kind, now=None):
+        elapsed = (now or time.monotonic()) - self.started
+        total = sum(self.counts.values())
+        self.stream.write(f"{kind}: {self.counts[kind]} rows, {total / elapsed if elapsed else 0:.0f} rows/s overall")
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        total = sum(self.counts.values())
+        parts = ", ".join(f"{count} {kind}" for kind, count in self.counts.items())
+        return f"{parts} in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)"
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def export_records(user=None, chunk_size=2000):
+    skills = Skill.objects.all()
+    dependencies = SkillDependency.objects.all()
+    progress = UserSkillProgress.objects.all()
+    if user is not None:
+        skills = skills.filter(author=user)
+        dependencies = dependencies.filter(to_skill__author=user)
+        progress = progress.filter(skill__author=user)
+
+    yield {'type': 'meta', 'format': EXPORT_FORMAT, 'user': user.username if user else None}
+
+    for row in skills.order_by('author_id', 'topo_order').values(
+            'slug', 'title', 'category', 'difficulty', 'description', 'video_url', 'author__username'
+    ).iterator(chunk_size=chunk_size):
+        row['author'] = row.pop('author__username')
+        yield {'type': 'skill', **row}
+
+    for parent, child, dependency_type in dependencies.order_by('id').values_list(
+            'from_skill__slug', 'to_skill__slug', 'dependency_type'
+    ).iterator(chunk_size=chunk_size):
+        yield {'type': 'dependency', 'from': parent, 'to': child, 'dependency_type': dependency_type}
+
+    for username, slug, status, started_at, finished_at in progress.order_by('id').values_list(
+            'user__username', 'skill__slug', 'status', 'started_at', 'finished_at'
+    ).iterator(chunk_size=chunk_size):
+        yield {
+            'type': 'progress', 'user': username, 'skill': slug, 'status': status,
+            'started_at': _isoformat(started_at), 'finished_at': _isoformat(finished_at),
+        }
+
+
+def write_ndjson(records, stream, reporter=None):
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if reporter is not None and record['type'] in RECORD_TYPES:
+            reporter.add(record['type'])
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise TransferError(f"line {number}: {exc}") from exc
+        if not isinstance(record, dict) or record.get('type') not in RECORD_TYPES + ('meta',):
+            raise TransferError(f"line {number}: unknown record")
+        errors = clean_record(record)
+        if errors:
+            raise TransferError(f"line {number}: {'; '.join(errors)}")
+        yield record
+
+
+def clean_record(record):
+    # replaces the values with the cleaned ones, returns what is wrong with the rest
+    errors = []
+    for key, (model, name) in RECORD_FIELDS.get(record['type'], {}).items():
+        value = record.get(key)
+        if value in (None, '') and key in OPTIONAL_FIELDS:
+            record[key] = None
+            continue
+        try:
+            value = model._meta.get_field(name).clean(value, None)
+        except ValidationError as exc:
+            errors.append(f"{key}: {' '.join(exc.messages)}")
+            continue
+        # stamps without an offset are in the site's time zone, as Django would save them
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        record[key] = value
+    return errors
+
+
+class SkillImporter:
+    # state is bounded by the number of users, not catalog size or slug conflicts
+    def __init__(self, user=None, on_conflict='rename', batch_size=1000, reporter=None):
+        self.user = user
+        self.on_conflict = on_conflict
+        self.batch_size = batch_size
+        self.reporter = reporter
+        self.user_ids = {}
+        self.renamed_count = 0
+        self.renamed_sample = {}
+        self.authors = set()
+        self.linked_authors = set()
+        self.learners = set()
+        self.skipped = dict.fromkeys(RECORD_TYPES, 0)
+        self.cycles = 0
+
+    def run(self, records):
+        slug_type = f"varchar({Skill._meta.get_field('slug').max_length})"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {RENAMED_TABLE} (slug {slug_type} PRIMARY KEY, new_slug {slug_type} NOT NULL)"
+            )
+        try:
+            batch, kind = [], None
+            for record in records:
+                if record['type'] == 'meta':
+                    if record.get('format') != EXPORT_FORMAT:
+                        raise TransferError(f"unsupported export format {record.get('format')!r}")
+                    continue
+
+                if record['type'] != kind or len(batch) >= self.batch_size:
+                    self.flush(kind, batch)
+                    batch, kind = [], record['type']
+                batch.append(record)
+            self.flush(kind, batch)
+            self.finish()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {RENAMED_TABLE}")
+
+    def flush(self, kind, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            getattr(self, f'import_{kind}')(batch)
+        if self.reporter is not None:
+            self.reporter.add(kind, len(batch))
+
+    def user_id(self, username):
+        if self.user is not None:
+            return self.user.id
+        if username not in self.user_ids:
+            self.user_ids[username] = User.objects.filter(username=username).values_list('id', flat=True).first()
+        return self.user_ids[username]
+
+    def current_slugs(self, slugs):
+        # slug in the database -> slug in the file
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT slug, new_slug FROM {RENAMED_TABLE} WHERE slug = ANY(%s)", [list(slugs)])
+            renamed = dict(cursor.fetchall())
+        return {renamed.get(slug, slug): slug for slug in slugs}
+
+    def remember_renames(self, renamed):
+        if not renamed:
+            return
+        self.renamed_count += len(renamed)
+        for slug, new_slug in renamed.items():
+            if len(self.renamed_sample) >= RENAMED_SAMPLE:
+                break
+            self.renamed_sample[slug] = new_slug
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {RENAMED_TABLE} (slug, new_slug) SELECT * FROM unnest(%s::text[], %s::text[]) "
+                "ON CONFLICT (slug) DO UPDATE SET new_slug = EXCLUDED.new_slug",
+                [list(renamed), list(renamed.values())]
+            )
+
+    def skill_ids(self, lookup):
+        return {
+            lookup[slug]: (skill_id, author_id, topo_order, category, difficulty)
+            for slug, skill_id, author_id, topo_order, category, difficulty in Skill.objects.filter(
+                slug__in=lookup
+            ).values_list('slug', 'id', 'author_id', 'topo_order', 'category', 'difficulty')
+        }
+
+    def lock_authors(self, slugs):
+        # one writer per author graph, as in add_dependency; taken before topo_order is read
+        list(User.objects.select_for_update(of=('self',)).filter(
+            skills__slug__in=slugs
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def import_skill(self, batch):
+        # a skill created meanwhile can still take one of the slugs, the batch is then checked again
+        try:
+            skipped, renamed, authors = retry_slug_conflicts(lambda attempt: self.insert_skills(batch))
+        except IntegrityError as exc:
+            if not is_slug_conflict(exc):
+                raise
+            raise TransferError(
+                f"no free slug for the skills {batch[0]['slug']!r}..{batch[-1]['slug']!r}, try the import again"
+            ) from exc
+        self.skipped['skill'] += skipped
+        self.remember_renames(renamed)
+        self.authors.update(authors)
+
+    def insert_skills(self, batch):
+        # slugs handed out earlier in the batch count as taken too
+        existing = set(Skill.objects.filter(slug__in=[row['slug'] for row in batch]).values_list('slug', flat=True))
+
+        skipped = 0
+        renamed = {}
+        skills = []
+        for row in batch:
+            author_id = self.user_id(row.get('author'))
+            if author_id is None:
+                skipped += 1
+                continue
+
+            slug = row['slug']
+            if slug in existing:
+                if self.on_conflict == 'skip':
+                    skipped += 1
+                    continue
+                slug = renamed[row['slug']] = with_token(slug)
+            existing.add(slug)
+
+            skill = Skill(
+                title=row['title'],
+                slug=slug,
+                category=row['category'],
+                difficulty=row['difficulty'],
+                description=row.get('description') or '',
+                video_url=row.get('video_url') or '',
+                author_id=author_id,
+            )
+            skill.render_description()
+            skills.append(skill)
+
+        Skill.objects.bulk_create(assign_categories(skills))
+        return skipped, renamed, {skill.author_id for skill in skills}
+
+    def import_dependency(self, batch):
+        lookup = self.current_slugs({row['from'] for row in batch} | {row['to'] for row in batch})
+        self.lock_authors(lookup)
+        found = self.skill_ids(lookup)
+
+        # edges that already follow topo_order cannot close a cycle and go in as they are
+        forward, backward = [], []
+        for row in batch:
+            parent, child = found.get(row['from']), found.get(row['to'])
+            # dependencies never cross authors, see DependencyForm
+            if parent is None or child is None or parent[1] != child[1] or parent[0] == child[0]:
+                self.skipped['dependency'] += 1
+                continue
+            dependency = SkillDependency(
+                from_skill_id=parent[0], to_skill_id=child[0], dependency_type=row['dependency_type']
+            )
+            (forward if parent[2] < child[2] else backward).append((child[1], dependency))
+            self.linked_authors.add(child[1])
+
+        dependencies = [dependency for _, dependency in forward]
+        SkillDependency.objects.bulk_create(dependencies, ignore_conflicts=True)
+
+        # the rest one by one, checked and reordered like add_dependency does
+        for author_id, dependency in backward:
+            orders = dict(Skill.objects.filter(
+                pk__in=[dependency.from_skill_id, dependency.to_skill_id]
+            ).values_list('id', 'topo_order'))
+            try:
+                reorder_for_edge(
+                    author_id,
+                    Skill(id=dependency.from_skill_id, topo_order=orders[dependency.from_skill_id]),
+                    Skill(id=dependency.to_skill_id, topo_order=orders[dependency.to_skill_id]),
+                )
+            except DependencyCycleError:
+                self.skipped['dependency'] += 1
+                self.cycles += 1
+                continue
+            SkillDependency.objects.bulk_create([dependency], ignore_conflicts=True)
+            dependencies.append(dependency)
+
+        # with --on-conflict skip the edges can reach skills that already have diagrams
+        invalidate_skill_diagrams({skill_id for dep in dependencies for skill_id in (dep.from_skill_id, dep.to_skill_id)})
+
+    def import_progress(self, batch):
+        found = self.skill_ids(self.current_slugs({row['skill'] for row in batch}))
+
+        rows = {}
+        for row in batch:
+            user_id = self.user_id(row.get('user'))
+            skill = found.get(row['skill'])
+            if user_id is None or skill is None:
+                self.skipped['progress'] += 1
+                continue
+            rows.setdefault((user_id, skill[0]), (row, skill))
+
+        # progress a learner already has stays as it is, and so does its activity
+        existing = set(UserSkillProgress.objects.filter(
+            user_id__in={user_id for user_id, _ in rows}, skill_id__in={skill_id for _, skill_id in rows}
+        ).values_list('user_id', 'skill_id'))
+
+        progress = []
+        activity = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+        for (user_id, skill_id), (row, skill) in rows.items():
+            if (user_id, skill_id) in existing:
+                continue
+            # credited like a finish through apply_transitions, see skills.activity
+            credited = row['status'] == 'done' and row.get('finished_at') is not None
+            xp = skill[4] * XP_PER_DIFFICULTY
+            progress.append(UserSkillProgress(
+                user_id=user_id,
+                skill_id=skill_id,
+                status=row['status'],
+                started_at=row.get('started_at'),
+                finished_at=row.get('finished_at'),
+                credited_category=skill[3] if credited else None,
+                credited_xp=xp if credited else None,
+            ))
+            if credited:
+                entry = activity[user_id][timezone.localdate(row['finished_at']), skill[3]]
+                entry[0] += 1
+                entry[1] += xp
+            self.learners.add(user_id)
+
+        UserSkillProgress.objects.bulk_create(progress, ignore_conflicts=True)
+        # added to the rollup rather than recounted, which would drop deleted skills' history
+        for user_id, deltas in activity.items():
+            add_activity(user_id, deltas)
+
+    def finish(self):
+        # bulk_create skips signals: redo what they would have kept in sync
+        # topo_order is kept by import_dependency, only the closure is recounted
+        for author_id in self.linked_authors:
+            with transaction.atomic():
+                rebuild_author_closure(author_id)
+
+        for author_id in self.authors | self.linked_authors:
+            bump_graph_version(author_id)
+
+        # skill counts of the authors, done counts of learners finishing their own skills
+        for user_id in self.authors | self.learners:
+            rebuild_category_counts(user_id)
+
+        for user_id in self.learners:
+            with transaction.atomic():
+                rebuild_user_xp(user_id)
+                bump_graph_version(user_id)
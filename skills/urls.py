@@ -5,9 +5,11 @@ urlpatterns = [
     path('', views.skill_list, name='skill_list'),
     path('skill/new/', views.skill_create, name='skill_create'),
     path('skill/<slug:skill_slug>/', views.skill_detail, name='skill_detail'),
+    path('skill/<slug:skill_slug>/plan/', views.skill_plan, name='skill_plan'),
     path('skill/<slug:skill_slug>/edit/', views.skill_edit, name='skill_edit'),
     path('skill/<slug:skill_slug>/delete/', views.skill_delete, name='skill_delete'),
     path('skill/<slug:skill_slug>/change/<str:new_status>/', views.change_status, name='change_status'),
+    path('progress/bulk/', views.progress_bulk, name='progress_bulk'),
     path('skill/<slug:skill_slug>/add-dependency/', views.skill_add_dependency, name='add_dependency'),
     path('skill/<slug:skill_slug>/remove-dependency/<int:dependency_id>/', views.skill_remove_dependency,
          name='remove_dependency'),
@@ -16,7 +18,18 @@ urlpatterns = [
     path('profile/edit/', views.profile_edit, name='profile_edit'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
     path('ai-generator/', views.ai_generator, name='ai_generator'),
-    path('category/delete/<path:category_name>/', views.category_delete, name='category_delete'),
+    path('ai-generator/job/<int:job_id>/', views.ai_job, name='ai_job'),
+    path('ai-generator/job/<int:job_id>/status/', views.ai_job_status, name='ai_job_status'),
+    path('ai-generator/cache-stats/', views.ai_cache_stats, name='ai_cache_stats'),
+    path('overview/', views.roadmap_overview, name='roadmap_overview'),
+    path('overview/data/', views.overview_json, name='overview_json'),
+    path('overview/cluster/<int:cluster_index>/', views.overview_cluster_json, name='overview_cluster_json'),
+    path('graph/skill/<slug:skill_slug>/', views.skill_graph_json, name='skill_graph_json'),
+    path('graph/skill/<slug:skill_slug>/mermaid/', views.skill_mermaid, name='skill_mermaid'),
+    path('graph/cache-stats/', views.diagram_cache_stats, name='diagram_cache_stats'),
+    path('graph/category/<path:category_name>/', views.category_graph_json, name='category_graph_json'),
+    path('category/delete/<int:category_id>/', views.category_delete, name='category_delete'),
+    path('metrics', views.metrics, name='metrics'),
     path('settings/', views.settings_view, name='settings'),
     path('feedback/', views.feedback_view, name='feedback'),
 ]
\ No newline at end of file
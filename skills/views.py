@@ -1,35 +1,58 @@
+import json
+
+from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
-from django.db.models import Sum, F
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from .models import Skill, UserSkillProgress, SkillDependency
-from django.views.decorators.cache import never_cache
-from .gamification import get_rank_info
-from django.contrib.auth.models import User
-from django.db.models import Case, When, IntegerField, Q
-from .forms import SkillForm, DependencyForm, UserUpdateForm, ProfileUpdateForm, SettingsForm, FeedbackForm
-from .ai_service import generate_roadmap
-from django.utils.text import slugify
-import uuid
+from django.contrib.admin.views.decorators import staff_member_required
+from .models import Category, Skill, UserSkillProgress, SkillDependency, RoadmapJob
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_POST
+from .gamification import (
+    get_rank_info, get_user_xp, apply_difficulty_change, apply_skills_deleted
+)
+from .forms import SkillForm, DependencyForm, UserUpdateForm, ProfileUpdateForm, SettingsForm, FeedbackForm, RoadmapForm
+from .jobs import enqueue_roadmap, fail_if_stale
+from .roadmaps import ai_category
+from .roadmap_cache import roadmap_cache
+from .leaderboard import leaderboard_page, page_around, parse_cursor, position_of
+from .search import search_skills
+from .graph import GRAPH_FORMAT, SUBGRAPH_MAX_DEPTH, get_graph_version, get_skill_graph, load_skill_subgraph
+from .topology import DependencyCycleError, add_dependency
+from .closure import downstream_count, unfinished_prerequisites
+from .planner import get_learning_path
+from .diagrams import diagram_stats, get_skill_mermaid
+from .overview import get_overview
+from .pagecache import landing_page, render_skill_cards
+from .activity import activity_summary
+from .categories import author_categories, delete_category
+from .slugs import create_skill
+from .progress import PROGRESS_BATCH_LIMIT, TransitionError, apply_transitions
+from .profiles import get_profile
+from .instrumentation import view_metrics
+from django.utils.crypto import constant_time_compare
 
 @login_required
 def user_profile(request):
     user_progress = UserSkillProgress.objects.filter(user=request.user).select_related('skill')
     in_progress_skills = user_progress.filter(status='in_progress')
-    finished_skills = user_progress.filter(status='done')
 
-    total_xp = finished_skills.aggregate(
-        total_points=Sum(F('skill__difficulty') * 10)
-    )['total_points'] or 0
+    ledger = get_user_xp(request.user)
+    total_xp = ledger.total_xp
 
     rank_data = get_rank_info(total_xp)
 
     context = {
         'in_progress': in_progress_skills,
-        'finished_count': finished_skills.count(),
+        'finished_count': ledger.finished_count,
         'total_xp': total_xp,
         'rank': rank_data,
+        'activity': activity_summary(request.user),
     }
 
     return render(request, 'skills/profile.html', context)
@@ -38,47 +61,28 @@ def user_profile(request):
 @never_cache
 def skill_list(request):
     if not request.user.is_authenticated:
-        return render(request, 'landing.html')
+        return landing_page(request)
+
+    graph = get_skill_graph(request.user)
 
-    skills = Skill.objects.filter(author=request.user).prefetch_related(
-        'requires__from_skill',
-        'required_by__to_skill'
+    skills = Skill.objects.filter(author=request.user).select_related('category_ref').only(
+        'id', 'title', 'slug', 'category', 'difficulty', 'updated_at',
+        'category_ref__name', 'category_ref__skill_count', 'category_ref__done_count',
     ).order_by('category', 'difficulty', 'title')
-    categories = Skill.objects.filter(author=request.user).values_list('category', flat=True).distinct()
+    categories = author_categories(request.user)
     search_query = request.GET.get('search', '')
-    category_filter = request.GET.get('category', '')
+    category_param = request.GET.get('category', '')
+    category_filter = int(category_param) if category_param.isdigit() else None
     status_filter = request.GET.get('status', 'all')
 
     if search_query:
-        skills = skills.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    if category_filter:
-        skills = skills.filter(category=category_filter)
-
-    user_progress_qs = UserSkillProgress.objects.filter(user=request.user)
-    user_progress_map = {p.skill_id: p.status for p in user_progress_qs}
-    completed_ids = {p.skill_id for p in user_progress_qs if p.status == 'done'}
-
-    final_skills = []
-
-    for skill in skills:
-        skill.my_status = user_progress_map.get(skill.id, 'todo')
-        skill.is_locked = False
+        skills = search_skills(skills, search_query).order_by('category', '-search_rank', 'title')
+    if category_filter is not None:
+        skills = skills.filter(category_ref_id=category_filter)
+    if status_filter != 'all':
+        skills = skills.filter(id__in=graph.ids_with_status(status_filter))
 
-        for req in skill.requires.all():
-            if req.dependency_type == 'hard':
-                if req.from_skill.id in completed_ids:
-                    req.is_met = True
-                else:
-                    req.is_met = False
-                    skill.is_locked = True
-
-        if status_filter == 'all':
-            final_skills.append(skill)
-        elif status_filter == skill.my_status:
-            final_skills.append(skill)
+    final_skills = render_skill_cards(graph.annotate(list(skills)), request.user)
 
     context = {
         'skills': final_skills,
@@ -92,92 +96,190 @@ def skill_list(request):
 
 @login_required
 def change_status(request, skill_slug, new_status):
-    skill = get_object_or_404(Skill, slug=skill_slug)
-
-    progress, created = UserSkillProgress.objects.get_or_create(
-        user=request.user,
-        skill=skill
-    )
+    skill = get_object_or_404(Skill, slug=skill_slug, author=request.user)
 
-    progress.status = new_status
-    progress.save()
+    try:
+        apply_transitions(request.user, {skill.id: new_status})
+    except TransitionError as exc:
+        messages.error(request, " ".join(exc.errors))
 
     return redirect('skill_list')
 
 
+@login_required
+@require_POST
+def progress_bulk(request):
+    # {"transitions": [{"skill": "<slug>", "status": "todo|in_progress|done"}, ...]}
+    try:
+        items = json.loads(request.body)['transitions']
+        requested = {item['skill']: item['status'] for item in items}
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'errors': ["Очікується {\"transitions\": [{\"skill\": ..., \"status\": ...}]}"]}, status=400)
+
+    if len(requested) > PROGRESS_BATCH_LIMIT:
+        return JsonResponse({'errors': [f"Не більше {PROGRESS_BATCH_LIMIT} змін за раз"]}, status=400)
+
+    ids = dict(Skill.objects.filter(author=request.user, slug__in=requested).order_by().values_list('slug', 'id'))
+    unknown = [slug for slug in requested if slug not in ids]
+    if unknown:
+        return JsonResponse({'errors': [f"Навичку '{slug}' не знайдено" for slug in unknown]}, status=400)
+
+    try:
+        result = apply_transitions(request.user, {ids[slug]: status for slug, status in requested.items()})
+    except TransitionError as exc:
+        return JsonResponse({'errors': exc.errors}, status=400)
+
+    return JsonResponse({
+        'version': result.version,
+        'xp_delta': result.xp_delta,
+        'changed': [state._asdict() for state in result.changed],
+        'downstream': [state._asdict() for state in result.downstream],
+    })
+
+
 @never_cache
 @login_required
 def skill_detail(request, skill_slug):
     skill = get_object_or_404(Skill, slug=skill_slug, author=request.user)
-    try:
-        progress = UserSkillProgress.objects.get(user=request.user, skill=skill)
-        skill.my_status = progress.status
-    except UserSkillProgress.DoesNotExist:
-        skill.my_status = 'todo'
-
-    if skill.my_status == 'todo':
-        skill.is_locked = False
-        for req in skill.requires.all():
-            if req.dependency_type == 'hard':
-                is_parent_done = UserSkillProgress.objects.filter(
-                    user=request.user,
-                    skill=req.from_skill,
-                    status='done'
-                ).exists()
-                if not is_parent_done:
-                    skill.is_locked = True
-                    break
-
-    mermaid_graph = ["graph TD"]
-
-    mermaid_graph.append("classDef done fill:#198754,stroke:#198754,stroke-width:2px,color:#fff;")
-    mermaid_graph.append("classDef in_progress fill:#ffc107,stroke:#ffc107,stroke-width:2px,color:#000;")
-    mermaid_graph.append(
-        "classDef todo fill:transparent,stroke:#6c757d,stroke-width:1px,stroke-dasharray: 5 5,color:#e9ecef;")
-    mermaid_graph.append("classDef locked fill:#343a40,stroke:#adb5bd,stroke-width:1px,color:#6c757d;")
-    mermaid_graph.append("classDef current fill:#0d6efd,stroke:#0d6efd,stroke-width:4px,color:#fff;")
-
-    def pad(text):
-        return f" {text} "
-
-    for req in skill.requires.all():
-        parent = req.from_skill
-        try:
-            p_status = UserSkillProgress.objects.get(user=request.user, skill=parent).status
-        except UserSkillProgress.DoesNotExist:
-            p_status = 'todo'
-
-        mermaid_graph.append(f'N{parent.id}["{pad(parent.title)}"] --> N{skill.id}')
-        mermaid_graph.append(f'class N{parent.id} {p_status};')
-        mermaid_graph.append(f'click N{parent.id} "/skill/{parent.slug}/"')
-
-    mermaid_graph.append(f'N{skill.id}["{pad(skill.title)}"]')
-    mermaid_graph.append(f'class N{skill.id} current;')
-
-    for req in skill.required_by.all():
-        child = req.to_skill
-        try:
-            c_status = UserSkillProgress.objects.get(user=request.user, skill=child).status
-        except UserSkillProgress.DoesNotExist:
-            c_status = 'todo'
-
-        mermaid_graph.append(f'N{skill.id} --> N{child.id}["{pad(child.title)}"]')
-        mermaid_graph.append(f'class N{child.id} {c_status};')
-        mermaid_graph.append(f'click N{child.id} "/skill/{child.slug}/"')
-
-    mermaid_string = "\n".join(mermaid_graph)
+    skill.my_status = UserSkillProgress.objects.filter(
+        user=request.user,
+        skill=skill
+    ).values_list('status', flat=True).first() or 'todo'
+
+    # the page shows direct neighbours only, deeper levels would be fetched and dropped
+    subgraph = load_skill_subgraph(skill, request.user, depth=1)
+    skill.is_locked = skill.my_status == 'todo' and subgraph.is_locked()
+    learning_path = get_learning_path(request.user, skill.id) if skill.is_locked else None
 
     return render(request, 'skills/skill_detail.html', {
         'skill': skill,
-        'mermaid_graph': mermaid_string
+        'requires': subgraph.requires(),
+        'required_by': subgraph.required_by(),
+        'chain_missing': unfinished_prerequisites(request.user, skill).count(),
+        'downstream_count': downstream_count(skill),
+        'learning_path': learning_path,
+    })
+
+@login_required
+def skill_plan(request, skill_slug):
+    skill = get_object_or_404(Skill.objects.only('id', 'title', 'slug'), slug=skill_slug, author=request.user)
+    include_soft = request.GET.get('soft') == '1'
+    path = get_learning_path(request.user, skill.id, include_soft)
+
+    return JsonResponse({
+        'skill': {'id': skill.id, 'title': skill.title, 'slug': skill.slug},
+        'include_soft': include_soft,
+        'graph_version': path.version,
+        'total_difficulty': path.total_difficulty,
+        'total_xp': path.total_xp,
+        'steps': [step._asdict() for step in path.steps],
     })
 
+def _graph_version(request):
+    # shared by the conditional-GET hooks and the view within one request
+    if not hasattr(request, '_graph_version'):
+        request._graph_version = get_graph_version(request.user)
+    return request._graph_version
+
+
+def graph_etag(request, *args, **kwargs):
+    version, _ = _graph_version(request)
+    return f"{GRAPH_FORMAT}-{request.user.pk}-{version}"
+
+
+def graph_last_modified(request, *args, **kwargs):
+    return _graph_version(request)[1]
+
+
+def graph_response(request, payload):
+    version, _ = _graph_version(request)
+    return JsonResponse({'version': version, **payload})
+
+
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=graph_etag, last_modified_func=graph_last_modified)
+def skill_graph_json(request, skill_slug):
+    skill_id = Skill.objects.filter(slug=skill_slug, author=request.user).values_list('id', flat=True).first()
+    if skill_id is None:
+        raise Http404
+
+    try:
+        depth = min(max(int(request.GET.get('depth', SUBGRAPH_MAX_DEPTH)), 1), SUBGRAPH_MAX_DEPTH)
+    except ValueError:
+        depth = SUBGRAPH_MAX_DEPTH
+
+    graph = get_skill_graph(request.user, _graph_version(request)[0])
+    return graph_response(request, {'root': skill_id, **graph.payload(graph.neighborhood(skill_id, depth))})
+
+
+@login_required
+def roadmap_overview(request):
+    return render(request, 'skills/overview.html')
+
+
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=graph_etag, last_modified_func=graph_last_modified)
+def overview_json(request):
+    overview = get_overview(request.user, _graph_version(request)[0])
+    return graph_response(request, {key: value for key, value in overview.items() if key != 'details'})
+
+
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=graph_etag, last_modified_func=graph_last_modified)
+def overview_cluster_json(request, cluster_index):
+    details = get_overview(request.user, _graph_version(request)[0])['details']
+    if cluster_index not in details:
+        raise Http404
+    return graph_response(request, details[cluster_index])
+
+
+@login_required
+def skill_mermaid(request, skill_slug):
+    skill = get_object_or_404(Skill.objects.only('id', 'title', 'slug'), slug=skill_slug, author=request.user)
+    response = HttpResponse(get_skill_mermaid(skill, request.user), content_type='text/plain; charset=utf-8')
+    if request.GET.get('download'):
+        response['Content-Disposition'] = f'attachment; filename="{skill.slug}.mmd"'
+    return response
+
+
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    authorized = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not authorized and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse(status=403)
+    return HttpResponse(view_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def diagram_cache_stats(request):
+    return JsonResponse(diagram_stats.as_dict())
+
+
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=graph_etag, last_modified_func=graph_last_modified)
+def category_graph_json(request, category_name):
+    graph = get_skill_graph(request.user, _graph_version(request)[0])
+    indexes = graph.category_indexes(category_name)
+    if not indexes:
+        raise Http404
+
+    return graph_response(request, {'category': category_name, **graph.payload(indexes)})
+
+
 def register(request):
     if request.method == 'POST':
         form = UserCreationForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            login(request, user, backend='skills.profiles.ProfileBackend')
             return redirect('skill_list')
     else:
         form = UserCreationForm()
@@ -192,9 +294,7 @@ def skill_create(request):
         if form.is_valid():
             skill = form.save(commit=False)
             skill.author = request.user
-            base_slug = slugify(skill.title)
-            skill.slug = f"{base_slug}-{request.user.id}-{Skill.objects.count()}"
-            skill.save()
+            create_skill(skill)
 
             return redirect('skill_list')
     else:
@@ -207,9 +307,12 @@ def skill_create(request):
 def skill_edit(request, skill_slug):
     skill = get_object_or_404(Skill, slug=skill_slug, author=request.user)
     if request.method == 'POST':
+        old_difficulty = skill.difficulty
         form = SkillForm(request.POST, instance=skill)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
+                apply_difficulty_change(skill, old_difficulty)
             return redirect('skill_detail', skill_slug=skill.slug)
     else:
         form = SkillForm(instance=skill)
@@ -225,7 +328,9 @@ def skill_delete(request, skill_slug):
     skill = get_object_or_404(Skill, slug=skill_slug, author=request.user)
 
     if request.method == 'POST':
-        skill.delete()
+        with transaction.atomic():
+            apply_skills_deleted([skill])
+            skill.delete()
         return redirect('skill_list')
 
     return render(request, 'skills/skill_confirm_delete.html', {'skill': skill})
@@ -240,8 +345,12 @@ def skill_add_dependency(request, skill_slug):
         if form.is_valid():
             dependency = form.save(commit=False)
             dependency.to_skill = current_skill
-            dependency.save()
-            return redirect('skill_detail', skill_slug=current_skill.slug)
+            try:
+                add_dependency(dependency)
+            except DependencyCycleError:
+                form.add_error('from_skill', "Ця залежність створить цикл: обрана навичка сама залежить від поточної.")
+            else:
+                return redirect('skill_detail', skill_slug=current_skill.slug)
     else:
         form = DependencyForm(request.user, current_skill)
 
@@ -264,34 +373,35 @@ def skill_remove_dependency(request, skill_slug, dependency_id):
 
 @login_required
 def leaderboard(request):
-    users = User.objects.filter(profile__is_public=True).annotate(  # <--- ДОДАВ ФІЛЬТР ТУТ
-        total_xp=Sum(
-            Case(
-                When(skill_progress__status='done', then=F('skill_progress__skill__difficulty') * 10),
-                default=0,
-                output_field=IntegerField()
-            )
-        )
-    ).order_by('-total_xp')
-
-    leaderboard_data = []
-    for user in users:
-        xp = user.total_xp or 0
-        rank_info = get_rank_info(xp)
-        leaderboard_data.append({
-            'user': user,
-            'xp': xp,
-            'rank': rank_info['current_rank']
-        })
+    ledger = get_user_xp(request.user)
+    is_public = get_profile(request.user).is_public
+    my_position = None
 
-    return render(request, 'skills/leaderboard.html', {'leaders': leaderboard_data})
+    if request.GET.get('me') and is_public:
+        page, my_position = page_around(ledger)
+    else:
+        page = leaderboard_page(
+            after=parse_cursor(request.GET.get('after')),
+            before=parse_cursor(request.GET.get('before')),
+        )
+        if is_public:
+            my_position = position_of(ledger)
+
+    return render(request, 'skills/leaderboard.html', {
+        'leaders': page.entries,
+        'prev_cursor': page.prev_cursor,
+        'next_cursor': page.next_cursor,
+        'snapshot_taken_at': page.taken_at,
+        'my_xp': ledger.total_xp,
+        'my_position': my_position,
+    })
 
 
 @login_required
 def profile_edit(request):
     if request.method == 'POST':
         u_form = UserUpdateForm(request.POST, instance=request.user)
-        p_form = ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
+        p_form = ProfileUpdateForm(request.POST, request.FILES, instance=get_profile(request.user))
 
         if u_form.is_valid() and p_form.is_valid():
             u_form.save()
@@ -299,7 +409,7 @@ def profile_edit(request):
             return redirect('profile')
     else:
         u_form = UserUpdateForm(instance=request.user)
-        p_form = ProfileUpdateForm(instance=request.user.profile)
+        p_form = ProfileUpdateForm(instance=get_profile(request.user))
 
     context = {
         'u_form': u_form,
@@ -311,88 +421,69 @@ def profile_edit(request):
 @login_required
 def ai_generator(request):
     if request.method == 'POST':
-        topic = request.POST.get('topic')
-
-        data = generate_roadmap(topic)
-
-        if data:
-            created_skills = []
-            created_skills_map = {}
-            for item in data.get('skills', []):
-                safe_title = item['title'][:50]
-                base_slug = slugify(safe_title)
-                unique_slug = f"{base_slug}-{request.user.id}-{uuid.uuid4().hex[:6]}"
-
-                ai_category = f"🤖 AI: {topic}"
-
-                skill = Skill.objects.create(
-                    title=item['title'],
-                    category=ai_category,
-                    difficulty=item['difficulty'],
-                    description=item['description'],
-                    video_url="",  # Пусто
-                    author=request.user,
-                    slug=unique_slug
-                )
-                created_skills_map[item['title']] = skill
-                created_skills.append(skill)
-
-            mermaid_graph = ["graph TD"]
-            mermaid_graph.append("classDef default fill:#e3f2fd,stroke:#0d6efd,stroke-width:2px;")
-
-            for dep in data.get('dependencies', []):
-                parent = created_skills_map.get(dep['from'])
-                child = created_skills_map.get(dep['to'])
-
-                if parent and child:
-                    SkillDependency.objects.create(
-                        from_skill=parent,
-                        to_skill=child,
-                        dependency_type=dep['type']
-                    )
-                    mermaid_graph.append(f'N{parent.id}["{parent.title}"] --> N{child.id}["{child.title}"]')
-
-            if len(mermaid_graph) == 2:
-                for s in created_skills:
-                    mermaid_graph.append(f'N{s.id}["{s.title}"]')
-
-            mermaid_string = "\n".join(mermaid_graph)
-
-            return render(request, 'skills/ai_success.html', {
-                'topic': topic,
-                'skills_count': len(created_skills),
-                'mermaid_graph': mermaid_string
-            })
-
-        else:
-            error = "AI не зміг згенерувати план. Спробуйте спростити тему (наприклад 'Python Basics')."
-            return render(request, 'skills/ai_generator.html', {'error': error})
-
-    return render(request, 'skills/ai_generator.html')
+        form = RoadmapForm(request.POST)
+        if form.is_valid():
+            job = enqueue_roadmap(request.user, form.cleaned_data['topic'])
+            return redirect('ai_job', job_id=job.id)
+    else:
+        form = RoadmapForm()
+
+    return render(request, 'skills/ai_generator.html', {'form': form})
+
 
 @login_required
-def category_delete(request, category_name):
-    skills_to_delete = Skill.objects.filter(
-        author=request.user,
-        category=category_name
-    )
+def ai_job(request, job_id):
+    job = fail_if_stale(get_object_or_404(RoadmapJob, id=job_id, user=request.user))
+
+    if job.status == 'done':
+        return render(request, 'skills/ai_success.html', {
+            'topic': job.topic,
+            'category': Category.objects.filter(author=request.user, name=ai_category(job.topic)).first(),
+            'skills_count': job.skills_count,
+            'mermaid_graph': job.mermaid_graph
+        })
+
+    if job.status == 'failed':
+        return render(request, 'skills/ai_generator.html', {
+            'form': RoadmapForm(initial={'topic': job.topic}),
+            'error': job.error
+        })
 
+    return render(request, 'skills/ai_job.html', {'job': job})
+
+
+@login_required
+def ai_job_status(request, job_id):
+    job = fail_if_stale(get_object_or_404(RoadmapJob, id=job_id, user=request.user))
+
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'is_finished': job.is_finished,
+    })
+
+
+@staff_member_required
+def ai_cache_stats(request):
+    return JsonResponse(roadmap_cache.stats())
+
+@login_required
+def category_delete(request, category_id):
     if request.method == 'POST':
-        deleted_count = skills_to_delete.count()
-        skills_to_delete.delete()
-        return redirect('skill_list')
+        category = get_object_or_404(Category, id=category_id, author=request.user)
+        delete_category(category)
     return redirect('skill_list')
 
 
 @login_required
 def settings_view(request):
     if request.method == 'POST':
-        form = SettingsForm(request.POST, instance=request.user.profile)
+        form = SettingsForm(request.POST, instance=get_profile(request.user))
         if form.is_valid():
             form.save()
             return redirect('settings')
     else:
-        form = SettingsForm(instance=request.user.profile)
+        form = SettingsForm(instance=get_profile(request.user))
 
     return render(request, 'skills/settings.html', {'form': form})
 
@@ -0,0 +1,120 @@
+// Draws the precomputed overview layout from /overview/data/: positions come
+// from the server as grid cells, this file only scales them to pixels.
+(function () {
+    var SVG = 'http://www.w3.org/2000/svg';
+    var CLUSTER = {width: 200, height: 74, gapX: 70, gapY: 24};
+    var NODE = {width: 170, height: 36, gapX: 50, gapY: 14};
+    var STATUS_COLORS = {done: '#198754', in_progress: '#ffc107', todo: '#6c757d', locked: '#343a40'};
+
+    function el(name, attrs, parent) {
+        var node = document.createElementNS(SVG, name);
+        Object.keys(attrs).forEach(function (key) { node.setAttribute(key, attrs[key]); });
+        if (parent) parent.appendChild(node);
+        return node;
+    }
+
+    function text(parent, x, y, value, attrs) {
+        var node = el('text', Object.assign({x: x, y: y}, attrs || {}), parent);
+        node.textContent = value.length > 24 ? value.slice(0, 23) + '…' : value;
+        return node;
+    }
+
+    function place(item, box) {
+        return {x: item.column * (box.width + box.gapX) + 10, y: item.row * (box.height + box.gapY) + 10};
+    }
+
+    function resize(svg, columns, rows, box) {
+        svg.setAttribute('width', columns * (box.width + box.gapX) + 20);
+        svg.setAttribute('height', rows * (box.height + box.gapY) + 20);
+    }
+
+    function link(svg, from, to, box, attrs) {
+        el('line', Object.assign({
+            x1: from.x + box.width, y1: from.y + box.height / 2,
+            x2: to.x, y2: to.y + box.height / 2
+        }, attrs), svg);
+    }
+
+    function drawOverview(svg, data) {
+        svg.innerHTML = '';
+        resize(svg, data.columns, data.rows, CLUSTER);
+
+        var positions = data.clusters.map(function (cluster) { return place(cluster, CLUSTER); });
+        data.edges.forEach(function (edge) {
+            link(svg, positions[edge[0]], positions[edge[1]], CLUSTER, {
+                class: 'overview-edge', 'stroke-width': Math.min(1 + Math.log2(edge[2]), 6)
+            });
+        });
+
+        data.clusters.forEach(function (cluster, i) {
+            var pos = positions[i];
+            var group = el('g', {class: 'overview-cluster', tabindex: 0}, svg);
+            el('rect', {x: pos.x, y: pos.y, width: CLUSTER.width, height: CLUSTER.height, rx: 10}, group);
+            text(group, pos.x + 12, pos.y + 24, cluster.name, {class: 'overview-title'});
+            text(group, pos.x + 12, pos.y + 44, cluster.counts.done + ' / ' + cluster.size + ' вивчено', {class: 'overview-meta'});
+
+            var offset = 0;
+            ['done', 'in_progress', 'todo', 'locked'].forEach(function (status) {
+                var width = (CLUSTER.width - 24) * cluster.counts[status] / cluster.size;
+                el('rect', {x: pos.x + 12 + offset, y: pos.y + 54, width: width, height: 6, fill: STATUS_COLORS[status]}, group);
+                offset += width;
+            });
+
+            group.addEventListener('click', function () { expand(cluster.index); });
+        });
+    }
+
+    function drawCluster(svg, data) {
+        svg.innerHTML = '';
+        resize(svg, data.columns, data.rows, NODE);
+
+        var positions = {};
+        data.nodes.forEach(function (node) { positions[node.id] = place(node, NODE); });
+        data.edges.forEach(function (edge) {
+            link(svg, positions[edge[0]], positions[edge[1]], NODE, {
+                class: 'overview-edge' + (edge[2] === 'soft' ? ' overview-edge-soft' : '')
+            });
+        });
+
+        data.nodes.forEach(function (node) {
+            var pos = positions[node.id];
+            var status = node.status === 'todo' && node.locked ? 'locked' : node.status;
+            var anchor = el('a', {href: '/skill/' + node.slug + '/'}, svg);
+            el('rect', {
+                x: pos.x, y: pos.y, width: NODE.width, height: NODE.height, rx: 8,
+                class: 'overview-node', stroke: STATUS_COLORS[status]
+            }, anchor);
+            text(anchor, pos.x + 10, pos.y + 23, node.title, {class: 'overview-meta'});
+        });
+    }
+
+    function load(url) {
+        return fetch(url, {credentials: 'same-origin'}).then(function (response) { return response.json(); });
+    }
+
+    function expand(index) {
+        var svg = document.getElementById('clusterGraph');
+        var url = svg.dataset.urlTemplate.replace(/0\/$/, index + '/');
+        load(url).then(function (data) {
+            document.getElementById('clusterTitle').textContent = data.name;
+            document.getElementById('clusterCard').classList.remove('d-none');
+            drawCluster(svg, data);
+            svg.scrollIntoView({behavior: 'smooth', block: 'nearest'});
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        var svg = document.getElementById('overviewGraph');
+        load(svg.dataset.url).then(function (data) {
+            if (!data.clusters.length) {
+                svg.classList.add('d-none');
+                document.getElementById('overviewEmpty').classList.remove('d-none');
+                return;
+            }
+            drawOverview(svg, data);
+        });
+        document.getElementById('clusterClose').addEventListener('click', function () {
+            document.getElementById('clusterCard').classList.add('d-none');
+        });
+    });
+})();
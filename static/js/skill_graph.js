@@ -0,0 +1,50 @@
+// Builds Mermaid source from /graph/... JSON and renders it in the browser.
+// Keep the class definitions in sync with skills/mermaid.py.
+(function () {
+    var STATUS_CLASSES = [
+        "classDef done fill:#198754,stroke:#198754,stroke-width:2px,color:#fff;",
+        "classDef in_progress fill:#ffc107,stroke:#ffc107,stroke-width:2px,color:#000;",
+        "classDef todo fill:transparent,stroke:#6c757d,stroke-width:1px,stroke-dasharray: 5 5,color:#e9ecef;",
+        "classDef locked fill:#343a40,stroke:#adb5bd,stroke-width:1px,color:#6c757d;",
+        "classDef current fill:#0d6efd,stroke:#0d6efd,stroke-width:4px,color:#fff;"
+    ];
+
+    function label(title) {
+        return '" ' + title.replace(/"/g, '#quot;') + ' "';
+    }
+
+    function nodeClass(node, root) {
+        if (node.id === root) return 'current';
+        if (node.status === 'todo' && node.locked) return 'locked';
+        return node.status;
+    }
+
+    function toMermaid(data) {
+        var lines = ['graph TD'].concat(STATUS_CLASSES);
+        data.nodes.forEach(function (node) {
+            lines.push('N' + node.id + '[' + label(node.title) + ']');
+            lines.push('class N' + node.id + ' ' + nodeClass(node, data.root) + ';');
+            if (node.id !== data.root) {
+                lines.push('click N' + node.id + ' "/skill/' + node.slug + '/"');
+            }
+        });
+        data.edges.forEach(function (edge) {
+            lines.push('N' + edge[0] + (edge[2] === 'hard' ? ' --> ' : ' -.-> ') + 'N' + edge[1]);
+        });
+        return lines.join('\n');
+    }
+
+    window.renderSkillGraph = function (element) {
+        // the browser revalidates with If-None-Match, unchanged graphs come back as 304
+        return fetch(element.dataset.graphUrl, {credentials: 'same-origin'})
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                element.textContent = toMermaid(data);
+                return mermaid.run({nodes: [element]});
+            });
+    };
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-graph-url]').forEach(window.renderSkillGraph);
+    });
+})();